@@ -1,6 +1,9 @@
 import asyncpg
 import os
+import time
 from dotenv import load_dotenv
+from utils.metrics import InstrumentedConnection, record_acquire
+from config.statements import init_connection, REGISTRY
 
 load_dotenv()
 
@@ -11,16 +14,50 @@ DATABASE_URL = os.getenv('DATABASE_URL') or \
     f"{os.getenv('DB_PORT', '5432')}/" \
     f"{os.getenv('DB_NAME', 'academia_final')}"
 
+# Global connection budget shared by every worker process: with N workers
+# (APP_WORKERS, set by gunicorn.conf.py) each pool may open budget / N.
+DB_POOL_BUDGET = int(os.getenv('DB_POOL_BUDGET', '20'))
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '5'))
+APP_WORKERS = max(1, int(os.getenv('APP_WORKERS', '1')))
+POOL_MAX_SIZE = DB_POOL_BUDGET // APP_WORKERS
+if POOL_MAX_SIZE < 2:
+    raise RuntimeError(
+        f"DB_POOL_BUDGET={DB_POOL_BUDGET} no alcanza para {APP_WORKERS} workers "
+        f"(mínimo 2 conexiones por worker)"
+    )
+POOL_MIN_SIZE = min(DB_POOL_MIN, POOL_MAX_SIZE)
+
 pool = None
 
+# asyncpg's per-connection statement cache: room for every registered
+# statement plus this many ad hoc ones (LRU)
+ADHOC_STATEMENT_CACHE = int(os.getenv('ADHOC_STATEMENT_CACHE', '100'))
+
+class AcademiaConnection(asyncpg.Connection):
+    """Connection that parses config.statements.REGISTRY when it opens"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()  # names parsed at connect (or first use)
+
+    async def prepare_cached(self, sql: str):
+        """Parse `sql` into the statement cache that fetch()/execute() use"""
+        # The public prepare() bypasses that cache (use_cache=False), so this
+        # relies on asyncpg's private _get_statement: re-check it whenever
+        # the asyncpg==0.30.0 pin in requirements.txt moves
+        await self._get_statement(sql, None)
+
 async def get_db_pool():
     global pool
     if pool is None:
         pool = await asyncpg.create_pool(
             DATABASE_URL,
-            min_size=5,
-            max_size=20,
-            command_timeout=60
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            command_timeout=60,
+            statement_cache_size=len(REGISTRY) + ADHOC_STATEMENT_CACHE,
+            connection_class=AcademiaConnection,
+            init=init_connection
         )
     return pool
 
@@ -32,5 +69,7 @@ async def close_db_pool():
 
 async def get_db():
     pool = await get_db_pool()
+    started = time.perf_counter()
     async with pool.acquire() as connection:
-        yield connection
\ No newline at end of file
+        record_acquire(time.perf_counter() - started)
+        yield InstrumentedConnection(connection)
\ No newline at end of file
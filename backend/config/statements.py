@@ -0,0 +1,499 @@
+import asyncpg
+
+# ===========================================================
+# Registry of hot statements, parsed once per pooled connection when it
+# opens (init_connection, the pool's `init` hook) and reused from asyncpg's
+# statement cache on every request.
+# ===========================================================
+
+
+# name -> SQL text. register() hands back the plain SQL string: asyncpg only
+# accepts exact str instances, so a registered statement works with any
+# connection. InstrumentedConnection recognises it by its text
+# (STATEMENT_NAMES) for the hit/miss stats.
+REGISTRY = {}
+STATEMENT_NAMES = {}
+# update_statement() SQL -> its canonical column order
+UPDATE_COLUMNS = {}
+
+stats = {"at_connect": 0, "late": 0, "fallbacks": 0, "adhoc": 0}
+
+
+def register(name: str, sql: str) -> str:
+    if name in REGISTRY and REGISTRY[name] != sql:
+        raise ValueError(f"Statement {name} already registered with different SQL")
+    REGISTRY[name] = sql
+    STATEMENT_NAMES.setdefault(sql, name)
+    return sql
+
+
+def update_statement(table: str, columns) -> str:
+    """Single canonical UPDATE for a table, regardless of which fields the
+    client sent. Each column gets a (flag, value) parameter pair:
+
+        SET col = CASE WHEN $1 THEN $2 ELSE col END, ...
+
+    so partial updates all share one prepared statement."""
+    columns = sorted(columns)
+    sets = []
+    for i, column in enumerate(columns):
+        sets.append(f"{column} = CASE WHEN ${2 * i + 1} THEN ${2 * i + 2} ELSE {column} END")
+    sql = f"UPDATE {table} SET {', '.join(sets)} WHERE id = ${2 * len(columns) + 1}"
+    statement = register(f"update_{table}", sql)
+    UPDATE_COLUMNS[statement] = tuple(columns)
+    return statement
+
+
+def update_args(statement: str, data: dict, key) -> list:
+    """Arguments for an update_statement() in its canonical column order"""
+    args = []
+    for column in UPDATE_COLUMNS[statement]:
+        args.append(column in data)
+        args.append(data.get(column))
+    args.append(key)
+    return args
+
+
+async def init_connection(conn):
+    """Pool `init` hook: parse every registered statement on a new connection.
+
+    They go into asyncpg's per-connection statement cache, which outlives
+    pool releases (PreparedStatement objects do not) and is sized to hold
+    the whole registry (see config.database)."""
+    for name, sql in REGISTRY.items():
+        try:
+            await conn.prepare_cached(sql)
+            conn.prepared.add(name)
+        except asyncpg.PostgresError as e:
+            print(f"⚠ No se pudo preparar {name}: {e}")
+
+
+def track_statement(conn, name: str):
+    """Count a registered statement run: at_connect when the connection
+    parsed it at connect time (or on an earlier run), late when this run
+    parses it, fallback when the connection has no registry (e.g. plain
+    asyncpg.connect in scripts).
+
+    This tracks what was registered, not asyncpg's LRU: a registered
+    statement pushed out by more than ADHOC_STATEMENT_CACHE ad hoc ones is
+    parsed again but still counted as at_connect."""
+    prepared = getattr(conn, "prepared", None)
+    if prepared is None:
+        stats["fallbacks"] += 1
+    elif name in prepared:
+        stats["at_connect"] += 1
+    else:
+        stats["late"] += 1
+        prepared.add(name)
+
+
+def get_statement_stats() -> dict:
+    registered = stats["at_connect"] + stats["late"]
+    return {
+        **stats,
+        "registered": len(REGISTRY),
+        "at_connect_rate": round(stats["at_connect"] / registered, 4) if registered else None,
+        "registry_share": round(registered / (registered + stats["adhoc"]), 4)
+        if registered + stats["adhoc"] else None,
+    }
+
+
+# ===========================================================
+# Hot statements
+# ===========================================================
+
+# Authentication
+STUDENT_PRINCIPAL = register("student_principal", "SELECT id, dni FROM students WHERE id = $1")
+USER_PRINCIPAL = register(
+    "user_principal", "SELECT id, username, role, related_id FROM users WHERE id = $1"
+)
+# Login in one round trip: users (admin/teacher, with the teacher profile)
+# take priority over students with the same DNI, as in the Node.js backend.
+# Each branch is an index lookup on its unique key (users.username, students.dni).
+LOGIN_PRINCIPAL = register(
+    "login_principal",
+    """SELECT * FROM (
+           SELECT 1 AS priority, u.id, u.username, u.role, u.password_hash, u.related_id,
+                  t.first_name, t.last_name, t.email
+           FROM users u
+           LEFT JOIN teachers t ON u.role = 'teacher' AND t.id = u.related_id
+           WHERE u.username = $1
+           UNION ALL
+           SELECT 2, s.id, s.dni, 'student'::user_role, s.password_hash, NULL,
+                  s.first_name, s.last_name, NULL
+           FROM students s
+           WHERE s.dni = $1
+       ) AS candidates
+       ORDER BY priority
+       LIMIT 1""",
+)
+# Transparent hash upgrade at login, keyed by LOGIN_PRINCIPAL's priority.
+# Only replaces the hash that was verified (a concurrent change wins).
+PASSWORD_REHASH = {
+    1: register(
+        "password_rehash_user",
+        "UPDATE users SET password_hash = $1 WHERE id = $2 AND password_hash = $3",
+    ),
+    2: register(
+        "password_rehash_student",
+        "UPDATE students SET password_hash = $1 WHERE id = $2 AND password_hash = $3",
+    ),
+}
+STUDENT_ID_BY_DNI = register("student_id_by_dni", "SELECT id FROM students WHERE dni = $1")
+
+# Refresh tokens (see controllers.authController)
+REFRESH_TOKEN_INSERT = register(
+    "refresh_token_insert",
+    """INSERT INTO refresh_tokens (token_hash, session_id, subject_id, role, expires_at)
+       VALUES ($1, $2, $3, $4, NOW() + make_interval(days => $5))""",
+)
+# Single use: only the first caller gets the row back
+REFRESH_TOKEN_ROTATE = register(
+    "refresh_token_rotate",
+    """UPDATE refresh_tokens SET rotated_at = NOW()
+       WHERE token_hash = $1 AND rotated_at IS NULL AND revoked_at IS NULL AND expires_at > NOW()
+       RETURNING session_id, subject_id, role""",
+)
+# A rotated token presented again (outside the $2-second grace for
+# concurrent refreshes) means it leaked: revoke its whole session
+REFRESH_TOKEN_REUSE = register(
+    "refresh_token_reuse",
+    """UPDATE refresh_tokens SET revoked_at = NOW()
+       WHERE session_id = (
+           SELECT session_id FROM refresh_tokens
+           WHERE token_hash = $1 AND revoked_at IS NULL
+             AND rotated_at < NOW() - make_interval(secs => $2)
+       ) AND revoked_at IS NULL
+       RETURNING session_id""",
+)
+SESSION_REVOKE = register(
+    "session_revoke",
+    """UPDATE refresh_tokens SET revoked_at = NOW()
+       WHERE session_id = (SELECT session_id FROM refresh_tokens WHERE token_hash = $1)
+         AND revoked_at IS NULL
+       RETURNING session_id""",
+)
+
+# Attendance
+SCHEDULE_OWNER = register(
+    "schedule_owner",
+    """SELECT co.teacher_id FROM schedules s
+       JOIN course_offerings co ON s.course_offering_id = co.id
+       WHERE s.id = $1""",
+)
+ACCEPTED_ENROLLMENT_FOR_SCHEDULE = register(
+    "accepted_enrollment_for_schedule",
+    """SELECT e.id
+       FROM enrollments e
+       JOIN schedules s ON s.course_offering_id = e.course_offering_id
+       WHERE s.id = $1
+         AND e.student_id = $2
+         AND e.enrollment_type = 'course'
+         AND e.status = 'aceptado'
+       LIMIT 1""",
+)
+ATTENDANCE_UPSERT = register(
+    "attendance_upsert",
+    """INSERT INTO attendance (student_id, schedule_id, date, status)
+       VALUES ($1, $2, $3, $4)
+       ON CONFLICT (student_id, schedule_id, date)
+       DO UPDATE SET status = EXCLUDED.status""",
+)
+STUDENT_BY_ID = register("student_by_id", "SELECT * FROM students WHERE id = $1")
+ACCEPTED_STUDENTS_FOR_SCHEDULE = register(
+    "accepted_students_for_schedule",
+    """SELECT DISTINCT e.student_id
+       FROM enrollments e
+       JOIN schedules s ON s.course_offering_id = e.course_offering_id
+       WHERE s.id = $1
+         AND e.student_id = ANY($2::int[])
+         AND e.enrollment_type = 'course'
+         AND e.status = 'aceptado'""",
+)
+ATTENDANCE_UPSERT_ROSTER = register(
+    "attendance_upsert_roster",
+    """INSERT INTO attendance (student_id, schedule_id, date, status)
+       SELECT r.student_id, $1, $2, r.status::attendance_status
+       FROM unnest($3::int[], $4::text[]) AS r(student_id, status)
+       ON CONFLICT (student_id, schedule_id, date)
+       DO UPDATE SET status = EXCLUDED.status""",
+)
+ABSENCE_THRESHOLDS = register(
+    "absence_thresholds",
+    """SELECT a.student_id, COUNT(*) AS count,
+              s.first_name, s.last_name, s.parent_phone
+       FROM attendance a
+       JOIN students s ON s.id = a.student_id
+       WHERE a.schedule_id = $1
+         AND a.status = 'ausente'
+         AND a.student_id = ANY($2::int[])
+       GROUP BY a.student_id, s.first_name, s.last_name, s.parent_phone
+       HAVING COUNT(*) >= $3""",
+)
+
+# Schedules and timetables
+SCHEDULE_BY_ID = register("schedule_by_id", "SELECT * FROM schedules WHERE id = $1")
+# Schedules that would clash with a candidate slot (same cycle, overlapping
+# week_slot, same classroom or same teacher); served by the exclusion
+# constraints' GiST indexes. $6 is a schedule id to ignore (0 on create).
+SCHEDULE_CONFLICTS = register(
+    "schedule_conflicts",
+    """WITH candidate AS (
+         SELECT co.cycle_id, co.teacher_id,
+                schedule_week_slot($2::day_of_week, $3::time, $4::time) AS slot
+         FROM course_offerings co
+         WHERE co.id = $1
+       )
+       SELECT s.id, s.day_of_week, s.start_time, s.end_time, s.classroom,
+              c.name AS course_name, co.group_label,
+              CASE WHEN s.classroom = $5 THEN 'classroom' ELSE 'teacher' END AS conflict
+       FROM candidate k
+       JOIN schedules s ON s.cycle_id = k.cycle_id AND s.week_slot && k.slot
+       JOIN course_offerings co ON co.id = s.course_offering_id
+       JOIN courses c ON c.id = co.course_id
+       WHERE s.id <> $6
+         AND (s.classroom = $5 OR s.teacher_id = k.teacher_id)
+       ORDER BY s.week_slot""",
+)
+# Bulk timetable setup: arrays of (idx, offering, day, start, end, classroom).
+# Returns clashes with stored schedules (other_idx NULL) and between rows of
+# the batch itself, plus rows whose offering does not exist (missing = true).
+BULK_SCHEDULE_CHECK = register(
+    "bulk_schedule_check",
+    """WITH batch AS (
+         SELECT b.idx, b.classroom, co.id AS offering_id, co.cycle_id, co.teacher_id,
+                schedule_week_slot(b.day_of_week, b.start_time, b.end_time) AS slot
+         FROM unnest($1::int[], $2::int[], $3::day_of_week[], $4::time[], $5::time[], $6::varchar[])
+              AS b(idx, course_offering_id, day_of_week, start_time, end_time, classroom)
+         LEFT JOIN course_offerings co ON co.id = b.course_offering_id
+       )
+       SELECT a.idx, NULL::int AS other_idx, true AS missing, NULL::int AS schedule_id,
+              NULL::text AS course_name, NULL::varchar AS group_label, NULL::text AS conflict
+       FROM batch a
+       WHERE a.offering_id IS NULL
+       UNION ALL
+       SELECT a.idx, NULL, false, s.id, c.name, co.group_label,
+              CASE WHEN s.classroom = a.classroom THEN 'classroom' ELSE 'teacher' END
+       FROM batch a
+       JOIN schedules s ON s.cycle_id = a.cycle_id AND s.week_slot && a.slot
+                       AND (s.classroom = a.classroom OR s.teacher_id = a.teacher_id)
+       JOIN course_offerings co ON co.id = s.course_offering_id
+       JOIN courses c ON c.id = co.course_id
+       UNION ALL
+       SELECT a.idx, b.idx, false, NULL, NULL, NULL,
+              CASE WHEN a.classroom = b.classroom THEN 'classroom' ELSE 'teacher' END
+       FROM batch a
+       JOIN batch b ON a.idx < b.idx AND a.cycle_id = b.cycle_id AND a.slot && b.slot
+                   AND (a.classroom = b.classroom OR a.teacher_id = b.teacher_id)
+       ORDER BY 1, 2""",
+)
+SCHEDULE_INSERT_MANY = register(
+    "schedule_insert_many",
+    """INSERT INTO schedules (course_offering_id, day_of_week, start_time, end_time, classroom)
+       SELECT * FROM unnest($1::int[], $2::day_of_week[], $3::time[], $4::time[], $5::varchar[])
+       RETURNING id""",
+)
+
+TIMETABLE_COLUMNS = """s.id, s.day_of_week, s.start_time, s.end_time, s.classroom,
+              s.course_offering_id, co.group_label, c.name AS course_name,
+              t.id AS teacher_id, t.first_name AS teacher_first_name,
+              t.last_name AS teacher_last_name"""
+TIMETABLE_JOINS = """JOIN course_offerings co ON co.id = s.course_offering_id
+       JOIN courses c ON c.id = co.course_id
+       LEFT JOIN teachers t ON t.id = s.teacher_id"""
+# Course offerings a student is (or is asking to be) in: direct course
+# enrollments plus the courses of their package offerings
+STUDENT_OFFERINGS = """SELECT e.course_offering_id, e.status
+         FROM enrollments e
+         WHERE e.student_id = $1 AND e.enrollment_type = 'course'
+           AND e.status IN ('pendiente', 'aceptado')
+         UNION
+         SELECT poc.course_offering_id, e.status
+         FROM enrollments e
+         JOIN package_offering_courses poc ON poc.package_offering_id = e.package_offering_id
+         WHERE e.student_id = $1 AND e.enrollment_type = 'package'
+           AND e.status IN ('pendiente', 'aceptado')"""
+
+TIMETABLE_BY_STUDENT = register(
+    "timetable_by_student",
+    f"""WITH offerings AS ({STUDENT_OFFERINGS})
+       SELECT DISTINCT ON (s.id) {TIMETABLE_COLUMNS}, o.status AS enrollment_status
+       FROM offerings o
+       JOIN schedules s ON s.course_offering_id = o.course_offering_id
+       {TIMETABLE_JOINS}
+       WHERE s.cycle_id = $2
+       ORDER BY s.id, o.status = 'aceptado' DESC""",
+)
+TIMETABLE_BY_TEACHER = register(
+    "timetable_by_teacher",
+    f"""SELECT {TIMETABLE_COLUMNS}
+       FROM schedules s
+       {TIMETABLE_JOINS}
+       WHERE s.teacher_id = $1 AND s.cycle_id = $2
+       ORDER BY s.week_slot""",
+)
+TIMETABLE_BY_CLASSROOM = register(
+    "timetable_by_classroom",
+    f"""SELECT {TIMETABLE_COLUMNS}
+       FROM schedules s
+       {TIMETABLE_JOINS}
+       WHERE s.classroom = $1 AND s.cycle_id = $2
+       ORDER BY s.week_slot""",
+)
+
+# Schedule clashes for an enrollment cart: $1 student, $2 course offering
+# ids, $3 package offering ids. Each cart slot is compared with the other
+# cart items and with the student's pending/accepted offerings; pairs from
+# the same package (or the same offering) are not reported.
+ENROLLMENT_SCHEDULE_CLASHES = register(
+    "enrollment_schedule_clashes",
+    f"""WITH cart AS (
+         SELECT c.id AS course_offering_id, 'course:' || c.id AS source
+         FROM unnest($2::int[]) AS c(id)
+         UNION ALL
+         SELECT poc.course_offering_id, 'package:' || poc.package_offering_id
+         FROM package_offering_courses poc
+         WHERE poc.package_offering_id = ANY($3::int[])
+       ), enrolled AS ({STUDENT_OFFERINGS}
+       ), candidates AS (
+         SELECT course_offering_id, source, true AS in_cart FROM cart
+         UNION ALL
+         SELECT DISTINCT course_offering_id, 'enrolled', false FROM enrolled
+         WHERE course_offering_id NOT IN (SELECT course_offering_id FROM cart)
+       ), slots AS (
+         SELECT k.course_offering_id, k.source, k.in_cart,
+                s.day_of_week, s.start_time, s.end_time, s.week_slot,
+                daterange(cy.start_date, cy.end_date, '[]') AS period,
+                c.name AS course_name, co.group_label
+         FROM candidates k
+         JOIN schedules s ON s.course_offering_id = k.course_offering_id
+         JOIN course_offerings co ON co.id = k.course_offering_id
+         JOIN courses c ON c.id = co.course_id
+         JOIN cycles cy ON cy.id = co.cycle_id
+       )
+       SELECT a.course_offering_id, a.course_name, a.group_label,
+              b.course_offering_id AS other_offering_id, b.course_name AS other_course_name,
+              b.group_label AS other_group_label, NOT b.in_cart AS other_enrolled,
+              a.day_of_week,
+              GREATEST(a.start_time, b.start_time) AS overlap_start,
+              LEAST(a.end_time, b.end_time) AS overlap_end
+       FROM slots a
+       JOIN slots b ON a.week_slot && b.week_slot
+                   AND a.period && b.period
+                   AND a.course_offering_id <> b.course_offering_id
+                   AND a.source <> b.source
+       WHERE a.in_cart AND (NOT b.in_cart OR a.course_offering_id < b.course_offering_id)
+       ORDER BY a.week_slot""",
+)
+
+# Search ($1 words, $2 prefix tsquery, $3 limit; see adminController.search).
+# The documents repeat the indexed expressions of migration 006 verbatim:
+# prefix words through the tsvector index, fuzzy words and substrings
+# (middle of a DNI or phone) through the trigram index.
+STUDENT_SEARCH_DOC = "search_norm(s.dni, s.first_name, s.last_name, s.parent_name, s.phone, s.parent_phone)"
+TEACHER_SEARCH_DOC = "search_norm(t.dni, t.first_name, t.last_name, t.email, t.phone, t.specialization)"
+
+
+def _search_where(doc: str) -> str:
+    return f"""(to_tsvector('simple', {doc}) @@ to_tsquery('simple', search_norm($2::text))
+            OR search_norm($1::text) <% {doc}
+            OR {doc} LIKE '%' || search_norm($1::text) || '%')"""
+
+
+def _search_score(doc: str, dni: str) -> str:
+    # exact DNI first, then every word matched as a prefix, then similarity
+    return f"""(({dni} = $1::text)::int * 2
+              + (to_tsvector('simple', {doc}) @@ to_tsquery('simple', search_norm($2::text)))::int
+              + word_similarity(search_norm($1::text), {doc}))::float4 AS score"""
+
+
+STUDENT_SEARCH = register(
+    "student_search",
+    f"""SELECT s.id, s.dni, s.first_name, s.last_name, s.phone, s.parent_name, s.parent_phone,
+              {_search_score(STUDENT_SEARCH_DOC, "s.dni")}
+       FROM students s
+       WHERE {_search_where(STUDENT_SEARCH_DOC)}
+       ORDER BY score DESC, s.last_name, s.first_name
+       LIMIT $3""",
+)
+TEACHER_SEARCH = register(
+    "teacher_search",
+    f"""SELECT t.id, t.dni, t.first_name, t.last_name, t.phone, t.email, t.specialization,
+              {_search_score(TEACHER_SEARCH_DOC, "t.dni")}
+       FROM teachers t
+       WHERE {_search_where(TEACHER_SEARCH_DOC)}
+       ORDER BY score DESC, t.last_name, t.first_name
+       LIMIT $3""",
+)
+# Enrollments of the best matching students
+ENROLLMENT_SEARCH = register(
+    "enrollment_search",
+    f"""WITH matched AS (
+         SELECT s.id, {_search_score(STUDENT_SEARCH_DOC, "s.dni")}
+         FROM students s
+         WHERE {_search_where(STUDENT_SEARCH_DOC)}
+         ORDER BY score DESC
+         LIMIT $3
+       )
+       SELECT e.id, e.status, e.enrollment_type, e.registered_at,
+              s.id AS student_id, s.dni, s.first_name, s.last_name,
+              COALESCE(c.name, p.name) AS item_name,
+              COALESCE(co.group_label, po.group_label) AS group_label,
+              cyc.name AS cycle_name, m.score
+       FROM matched m
+       JOIN students s ON s.id = m.id
+       JOIN enrollments e ON e.student_id = m.id
+       LEFT JOIN course_offerings co ON co.id = e.course_offering_id
+       LEFT JOIN courses c ON c.id = co.course_id
+       LEFT JOIN package_offerings po ON po.id = e.package_offering_id
+       LEFT JOIN packages p ON p.id = po.package_id
+       LEFT JOIN cycles cyc ON cyc.id = COALESCE(co.cycle_id, po.cycle_id)
+       ORDER BY m.score DESC, s.last_name, s.first_name, e.registered_at DESC
+       LIMIT $3""",
+)
+
+# Notification outbox (drained by utils.notifications.NotificationDispatcher)
+NOTIFICATION_ENQUEUE = register(
+    "notification_enqueue",
+    """INSERT INTO notifications_log (student_id, parent_phone, message, type)
+       VALUES ($1, $2, $3, $4)
+       RETURNING id""",
+)
+NOTIFICATION_ENQUEUE_MANY = register(
+    "notification_enqueue_many",
+    """INSERT INTO notifications_log (student_id, parent_phone, message, type)
+       SELECT * FROM unnest($1::int[], $2::varchar[], $3::text[], $4::notification_type[])""",
+)
+
+# Catalog reads
+TEACHER_BY_ID = register("teacher_by_id", "SELECT * FROM teachers WHERE id = $1")
+CYCLE_BY_ID = register("cycle_by_id", "SELECT * FROM cycles WHERE id = $1")
+ACTIVE_CYCLE = register(
+    "active_cycle", "SELECT * FROM cycles WHERE status = 'open' ORDER BY start_date DESC LIMIT 1"
+)
+INSTALLMENTS_BY_PLAN = register(
+    "installments_by_plan",
+    """SELECT * FROM installments
+       WHERE payment_plan_id = $1
+       ORDER BY installment_number""",
+)
+
+# Analytics: one statement per filter combination, conditions in canonical order
+ANALYTICS = {
+    (False, False): register(
+        "analytics_all", "SELECT * FROM analytics_summary ORDER BY updated_at DESC"
+    ),
+    (True, False): register(
+        "analytics_by_cycle",
+        "SELECT * FROM analytics_summary WHERE cycle_id = $1 ORDER BY updated_at DESC",
+    ),
+    (False, True): register(
+        "analytics_by_student",
+        "SELECT * FROM analytics_summary WHERE student_id = $1 ORDER BY updated_at DESC",
+    ),
+    (True, True): register(
+        "analytics_by_cycle_student",
+        """SELECT * FROM analytics_summary WHERE cycle_id = $1 AND student_id = $2
+           ORDER BY updated_at DESC""",
+    ),
+}
@@ -0,0 +1,39 @@
+import asyncio
+import time
+from config.database import POOL_MIN_SIZE
+from utils.metrics import InstrumentedConnection
+from controllers.cycleController import get_all_cycles, get_active_cycle
+from controllers.courseController import get_all_courses
+from controllers.packageController import get_all_packages
+
+# ===========================================================
+# Startup warm-up. The pool opens POOL_MIN_SIZE connections and
+# init_connection prepares the registered statements on each; the
+# catalog reads below then run once per connection, so each backend
+# has its relation/type caches and asyncpg its codecs loaded before
+# the lifespan marks the worker ready (/ready).
+# ===========================================================
+
+CATALOG_READS = (get_active_cycle, get_all_cycles, get_all_packages, get_all_courses)
+
+readiness = {"ready": False, "warmup_ms": None}
+
+
+async def _warm_connection(pool):
+    async with pool.acquire() as connection:
+        db = InstrumentedConnection(connection)
+        for read in CATALOG_READS:
+            await read(db)
+
+
+async def warm_up(pool):
+    """Run the catalog reads on every idle connection (all held at once, so
+    no connection is warmed twice)"""
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(_warm_connection(pool) for _ in range(POOL_MIN_SIZE)))
+    except Exception as e:
+        # A cold cache is slower, not broken: still serve traffic
+        print(f"⚠ Warm-up incompleto: {e}")
+    readiness["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"✓ Pool warmed up ({POOL_MIN_SIZE} connections, {readiness['warmup_ms']} ms)")
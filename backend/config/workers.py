@@ -0,0 +1,13 @@
+from uvicorn.workers import UvicornWorker
+
+
+class AcademiaUvicornWorker(UvicornWorker):
+    """Gunicorn worker running the app on uvloop with the httptools parser
+    (both come with uvicorn[standard])"""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "proxy_headers": True,
+    }
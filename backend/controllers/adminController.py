@@ -1,32 +1,36 @@
 import asyncpg
+import re
+from config.statements import ANALYTICS, STUDENT_SEARCH, TEACHER_SEARCH, ENROLLMENT_SEARCH
+from utils.responses import json_array_sql
 
-async def get_dashboard_data(db: asyncpg.Connection):
+SEARCH_SCOPES = {
+    "students": STUDENT_SEARCH,
+    "teachers": TEACHER_SEARCH,
+    "enrollments": ENROLLMENT_SEARCH,
+}
+MAX_SEARCH_LIMIT = 100
+MAX_SEARCH_WORDS = 8
+# Shortest normalized query text (letters and digits, words joined by one space)
+MIN_SEARCH_CHARS = 2
+
+# Letters and digits only: the words are safe inside a tsquery and a LIKE pattern
+_search_word_re = re.compile(r"[^\W_]+")
+
+DASHBOARD_ORDER = "student_id DESC, enrollment_id DESC"
+DASHBOARD_SQL = f"SELECT * FROM view_dashboard_admin_extended ORDER BY {DASHBOARD_ORDER}"
+
+async def get_dashboard_data(db: asyncpg.Connection, as_json: bool = False):
     """Get dashboard using the extended view (like Node.js)"""
-    dashboard = await db.fetch(
-        "SELECT * FROM view_dashboard_admin_extended ORDER BY student_id DESC"
-    )
-    return [dict(d) for d in dashboard]
+    if as_json:
+        return await db.fetchval(json_array_sql(DASHBOARD_SQL, DASHBOARD_ORDER))
+    # Records go to orjson without jsonable_encoder (see utils.responses.json_response)
+    return await db.fetch(DASHBOARD_SQL)
 
 async def get_analytics(cycle_id: int, student_id: int, db: asyncpg.Connection):
     """Get analytics summary - matches Node.js logic"""
-    sql = "SELECT * FROM analytics_summary WHERE 1=1"
-    params = []
-    param_index = 1
-    
-    if cycle_id:
-        sql += f" AND cycle_id = ${param_index}"
-        params.append(cycle_id)
-        param_index += 1
-    
-    if student_id:
-        sql += f" AND student_id = ${param_index}"
-        params.append(student_id)
-        param_index += 1
-    
-    sql += " ORDER BY updated_at DESC"
-    
-    analytics = await db.fetch(sql, *params)
-    return [dict(a) for a in analytics]
+    # One registered statement per filter combination (cycle first, then student)
+    params = [p for p in (cycle_id, student_id) if p]
+    return await db.fetch(ANALYTICS[(bool(cycle_id), bool(student_id))], *params)
 
 async def get_notifications(student_id: int, notification_type: str, limit: int, db: asyncpg.Connection):
     """Get notifications - matches Node.js logic"""
@@ -120,3 +124,19 @@ async def get_general_stats(db: asyncpg.Connection):
     stats['pending_payments'] = float(result['total'])
     
     return stats
+
+def search_terms(q: str):
+    """Query text -> (normalized text, prefix tsquery), e.g. "Pérez, ana" ->
+    ("Pérez ana", "Pérez:* & ana:*"). Accents and case are normalized in SQL."""
+    words = _search_word_re.findall(q)[:MAX_SEARCH_WORDS]
+    return " ".join(words), " & ".join(f"{w}:*" for w in words)
+
+async def search(q: str, scope: str, limit: int, db: asyncpg.Connection):
+    """Ranked prefix/fuzzy search by DNI, names, parent name or phone"""
+    if scope not in SEARCH_SCOPES:
+        return {"error": "scope debe ser students, teachers o enrollments"}
+    text, tsquery = search_terms(q)
+    if len(text) < MIN_SEARCH_CHARS:
+        return {"error": f"La búsqueda debe tener al menos {MIN_SEARCH_CHARS} letras o dígitos"}
+    limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+    return await db.fetch(SEARCH_SCOPES[scope], text, tsquery, limit)
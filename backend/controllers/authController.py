@@ -1,15 +1,66 @@
 import asyncpg
+import uuid
 from models.student import StudentCreate
 from models.user import UserLogin
-from utils.security import get_password_hash, verify_password, create_access_token
+from utils.security import (
+    hash_password, verify_and_update_password, create_access_token, access_claims,
+    new_refresh_token, hash_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+)
+from utils.revocation import revocations
+from middleware.auth import load_principal
+from config.statements import (
+    STUDENT_ID_BY_DNI, LOGIN_PRINCIPAL, PASSWORD_REHASH,
+    REFRESH_TOKEN_INSERT, REFRESH_TOKEN_ROTATE, REFRESH_TOKEN_REUSE, SESSION_REVOKE
+)
+
+# Two tabs refreshing with the same token at once is not a leak: within the
+# grace the loser gets an error, not a revocation, and picks up the pair the
+# winning tab stored (frontend AuthContext)
+REFRESH_REUSE_GRACE_S = 10
+
+async def issue_session(principal: dict, db: asyncpg.Connection, session_id: str = None):
+    """Access token with claims plus a new refresh token of the session"""
+    session_id = session_id or uuid.uuid4().hex
+    refresh_token, token_hash = new_refresh_token()
+    await db.execute(
+        REFRESH_TOKEN_INSERT, token_hash, uuid.UUID(session_id),
+        principal["id"], principal["role"], REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    return {
+        "token": create_access_token(access_claims(principal, session_id)),
+        "refresh_token": refresh_token
+    }
+
+async def refresh_session(refresh_token: str, db: asyncpg.Connection):
+    """Rotate a refresh token: the old one is spent, a new pair is issued"""
+    token_hash = hash_refresh_token(refresh_token)
+    async with db.transaction():
+        row = await db.fetchrow(REFRESH_TOKEN_ROTATE, token_hash)
+        if row is None:
+            reused = await db.fetchval(REFRESH_TOKEN_REUSE, token_hash, REFRESH_REUSE_GRACE_S)
+            if reused:
+                revocations.add(reused.hex)
+                print(f"⚠ Refresh token reutilizado: sesión {reused.hex} revocada")
+            return {"error": "Refresh token inválido o expirado"}
+        
+        principal = await load_principal(db, row['subject_id'], row['role'])
+        if principal is None:
+            return {"error": "Usuario no encontrado"}
+        return await issue_session(principal, db, row['session_id'].hex)
+
+async def logout(refresh_token: str, db: asyncpg.Connection):
+    session_id = await db.fetchval(SESSION_REVOKE, hash_refresh_token(refresh_token))
+    if session_id:
+        revocations.add(session_id.hex)
+    return {"message": "Sesión cerrada"}
 
 async def register_student(data: StudentCreate, db: asyncpg.Connection):
     # Check if student exists
-    existing = await db.fetchrow("SELECT id FROM students WHERE dni = $1", data.dni)
+    existing = await db.fetchrow(STUDENT_ID_BY_DNI, data.dni)
     if existing:
         return {"error": "El estudiante ya existe"}
     
-    password_hash = get_password_hash(data.password)
+    password_hash = await hash_password(data.password)
     
     result = await db.fetchrow(
         """INSERT INTO students (dni, first_name, last_name, phone, parent_name, parent_phone, password_hash)
@@ -18,10 +69,12 @@ async def register_student(data: StudentCreate, db: asyncpg.Connection):
         data.parent_name, data.parent_phone, password_hash
     )
     
-    token = create_access_token({"id": result['id'], "role": "student"})
+    session = await issue_session(
+        {"id": result['id'], "username": data.dni, "role": "student"}, db
+    )
     
     return {
-        "token": token,
+        **session,
         "user": {
             "id": result['id'],
             "dni": data.dni,
@@ -32,58 +85,54 @@ async def register_student(data: StudentCreate, db: asyncpg.Connection):
     }
 
 async def login_user(credentials: UserLogin, db: asyncpg.Connection):
-    """Login - matches Node.js logic: check users table first, then students"""
-    # First try users table (admin/teacher) - like Node.js
-    user = await db.fetchrow(
-        "SELECT id, username, role, password_hash, related_id FROM users WHERE username = $1",
-        credentials.dni
-    )
+    """Login - matches Node.js logic: users table first, then students,
+    resolved by LOGIN_PRINCIPAL in a single query"""
+    user = await db.fetchrow(LOGIN_PRINCIPAL, credentials.dni)
     
-    if user:
-        if not verify_password(credentials.password, user['password_hash']):
-            return {"error": "Contraseña incorrecta"}
-        
-        # Build user data
-        user_data = {
-            "id": user['id'],
-            "username": user['username'],
-            "role": user['role']
-        }
+    if not user:
+        return {"error": "Usuario no encontrado"}
+    
+    # bcrypt runs on the worker pool; an outdated hash is replaced on success
+    valid, new_hash = await verify_and_update_password(credentials.password, user['password_hash'])
+    if valid and new_hash:
+        await db.execute(PASSWORD_REHASH[user['priority']], new_hash, user['id'], user['password_hash'])
+    
+    if user['priority'] == 2:  # students row
+        if not valid:
+            return {"error": "DNI o contraseña incorrectos"}
         
-        # Get additional info for teacher (like Node.js)
-        if user['role'] == 'teacher' and user['related_id']:
-            teacher = await db.fetchrow(
-                "SELECT first_name, last_name, email FROM teachers WHERE id = $1",
-                user['related_id']
-            )
-            if teacher:
-                user_data['name'] = f"{teacher['first_name']} {teacher['last_name']}"
-                user_data['email'] = teacher['email']
-                user_data['related_id'] = user['related_id']
+        session = await issue_session(
+            {"id": user['id'], "username": user['username'], "role": "student"}, db
+        )
         
-        token = create_access_token({"id": user['id'], "role": user['role']})
-        return {"token": token, "user": user_data}
-    
-    # If not in users, try student table - like Node.js
-    student = await db.fetchrow(
-        "SELECT id, dni, first_name, last_name, password_hash FROM students WHERE dni = $1",
-        credentials.dni
-    )
+        return {
+            **session,
+            "user": {
+                "id": user['id'],
+                "dni": user['username'],
+                "role": "student",
+                "name": f"{user['first_name']} {user['last_name']}"
+            }
+        }
     
-    if not student:
-        return {"error": "Usuario no encontrado"}
+    if not valid:
+        return {"error": "Contraseña incorrecta"}
     
-    if not verify_password(credentials.password, student['password_hash']):
-        return {"error": "DNI o contraseña incorrectos"}
+    # Build user data
+    user_data = {
+        "id": user['id'],
+        "username": user['username'],
+        "role": user['role']
+    }
     
-    token = create_access_token({"id": student['id'], "role": "student"})
+    # Teacher profile comes joined in (like Node.js)
+    if user['role'] == 'teacher' and user['first_name'] is not None:
+        user_data['name'] = f"{user['first_name']} {user['last_name']}"
+        user_data['email'] = user['email']
+        user_data['related_id'] = user['related_id']
     
-    return {
-        "token": token,
-        "user": {
-            "id": student['id'],
-            "dni": student['dni'],
-            "role": "student",
-            "name": f"{student['first_name']} {student['last_name']}"
-        }
-    }
+    session = await issue_session(
+        {"id": user['id'], "username": user['username'], "role": user['role'],
+         "related_id": user['related_id']}, db
+    )
+    return {**session, "user": user_data}
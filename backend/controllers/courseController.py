@@ -1,5 +1,9 @@
 import asyncpg
 from models.course import CourseCreate, CourseUpdate, CourseOfferingCreate, CourseOfferingUpdate
+from config.statements import update_statement, update_args
+
+UPDATE_COURSE = update_statement("courses", CourseUpdate.model_fields)
+UPDATE_COURSE_OFFERING = update_statement("course_offerings", CourseOfferingUpdate.model_fields)
 
 async def get_all_courses(db: asyncpg.Connection):
     courses = await db.fetch("SELECT * FROM courses ORDER BY name")
@@ -46,21 +50,11 @@ async def create_course(data: CourseCreate, db: asyncpg.Connection):
     return {"id": result['id'], "message": "Curso creado exitosamente"}
 
 async def update_course(course_id: int, data: CourseUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
-    
-    for field, value in data.dict(exclude_unset=True).items():
-        fields.append(f"{field} = ${idx}")
-        values.append(value)
-        idx += 1
-    
-    if not fields:
+    update_data = data.dict(exclude_unset=True)
+    if not update_data:
         return {"message": "No hay campos para actualizar"}
     
-    values.append(course_id)
-    query = f"UPDATE courses SET {', '.join(fields)} WHERE id = ${idx}"
-    await db.execute(query, *values)
+    await db.execute(UPDATE_COURSE, *update_args(UPDATE_COURSE, update_data, course_id))
     return {"message": "Curso actualizado correctamente"}
 
 async def delete_course(course_id: int, db: asyncpg.Connection):
@@ -91,21 +85,15 @@ async def create_course_offering(data: CourseOfferingCreate, db: asyncpg.Connect
     return {"id": result['id'], "message": "Oferta de curso creada exitosamente"}
 
 async def update_course_offering(offering_id: int, data: CourseOfferingUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
-    
-    for field, value in data.dict(exclude_unset=True).items():
-        fields.append(f"{field} = ${idx}")
-        values.append(value)
-        idx += 1
-    
-    if not fields:
+    update_data = data.dict(exclude_unset=True)
+    if not update_data:
         return {"message": "No hay campos para actualizar"}
     
-    values.append(offering_id)
-    query = f"UPDATE course_offerings SET {', '.join(fields)} WHERE id = ${idx}"
-    await db.execute(query, *values)
+    try:
+        await db.execute(UPDATE_COURSE_OFFERING, *update_args(UPDATE_COURSE_OFFERING, update_data, offering_id))
+    except asyncpg.ExclusionViolationError:
+        # trg_sync_schedule_offering re-checks the offering's schedules for the new teacher
+        return {"error": "El docente ya tiene otra clase en alguno de los horarios de esta oferta"}
     return {"message": "Oferta actualizada correctamente"}
 
 async def delete_course_offering(offering_id: int, db: asyncpg.Connection):
@@ -1,12 +1,15 @@
 import asyncpg
 from models.cycle import CycleCreate, CycleUpdate
+from config.statements import update_statement, update_args, CYCLE_BY_ID, ACTIVE_CYCLE
+
+UPDATE_CYCLE = update_statement("cycles", CycleUpdate.model_fields)
 
 async def get_all_cycles(db: asyncpg.Connection):
     cycles = await db.fetch("SELECT * FROM cycles ORDER BY start_date DESC")
     return [dict(c) for c in cycles]
 
 async def get_cycle_by_id(cycle_id: int, db: asyncpg.Connection):
-    cycle = await db.fetchrow("SELECT * FROM cycles WHERE id = $1", cycle_id)
+    cycle = await db.fetchrow(CYCLE_BY_ID, cycle_id)
     if not cycle:
         return None
     return dict(cycle)
@@ -20,21 +23,11 @@ async def create_cycle(data: CycleCreate, db: asyncpg.Connection):
     return {"id": result['id'], "message": "Ciclo creado exitosamente"}
 
 async def update_cycle(cycle_id: int, data: CycleUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
-    
-    for field, value in data.dict(exclude_unset=True).items():
-        fields.append(f"{field} = ${idx}")
-        values.append(value)
-        idx += 1
-    
-    if not fields:
+    update_data = data.dict(exclude_unset=True)
+    if not update_data:
         return {"message": "No hay campos para actualizar"}
     
-    values.append(cycle_id)
-    query = f"UPDATE cycles SET {', '.join(fields)} WHERE id = ${idx}"
-    await db.execute(query, *values)
+    await db.execute(UPDATE_CYCLE, *update_args(UPDATE_CYCLE, update_data, cycle_id))
     return {"message": "Ciclo actualizado correctamente"}
 
 async def delete_cycle(cycle_id: int, db: asyncpg.Connection):
@@ -43,9 +36,7 @@ async def delete_cycle(cycle_id: int, db: asyncpg.Connection):
 
 async def get_active_cycle(db: asyncpg.Connection):
     """Get the currently active cycle (status='open')"""
-    cycle = await db.fetchrow(
-        "SELECT * FROM cycles WHERE status = 'open' ORDER BY start_date DESC LIMIT 1"
-    )
+    cycle = await db.fetchrow(ACTIVE_CYCLE)
     if not cycle:
         return None
     return dict(cycle)
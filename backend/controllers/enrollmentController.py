@@ -1,6 +1,8 @@
 import asyncpg
 from models.enrollment import EnrollmentCreate, EnrollmentStatusUpdate
 from datetime import date, timedelta
+from config.statements import INSTALLMENTS_BY_PLAN, ENROLLMENT_SCHEDULE_CLASHES
+from utils.responses import json_array_sql
 
 async def get_student_enrollments(student_id: int, db: asyncpg.Connection):
     """Get student enrollments with installments - matches Node.js getByStudent"""
@@ -51,12 +53,7 @@ async def get_student_enrollments(student_id: int, db: asyncpg.Connection):
         enr_dict = dict(enrollment)
         
         if enr_dict.get('payment_plan_id'):
-            installments = await db.fetch(
-                """SELECT * FROM installments 
-                   WHERE payment_plan_id = $1 
-                   ORDER BY installment_number""",
-                enr_dict['payment_plan_id']
-            )
+            installments = await db.fetch(INSTALLMENTS_BY_PLAN, enr_dict['payment_plan_id'])
             enr_dict['installments'] = [dict(i) for i in installments]
         else:
             enr_dict['installments'] = []
@@ -95,9 +92,30 @@ async def get_enrollments_by_offering(type: str, id: int, status: str, db: async
     )
     return [dict(e) for e in enrollments]
 
+def _clash_message(clashes) -> str:
+    parts = []
+    for c in clashes:
+        other = f"{c['other_course_name']} (Grupo {c['other_group_label']})"
+        if c['other_enrolled']:
+            other += " en el que ya estás matriculado"
+        parts.append(
+            f"{c['course_name']} (Grupo {c['group_label']}) se cruza con {other} el "
+            f"{c['day_of_week']} {c['overlap_start']:%H:%M}-{c['overlap_end']:%H:%M}"
+        )
+    return "Cruce de horario: " + "; ".join(parts)
+
 async def create_enrollment(student_id: int, data: EnrollmentCreate, db: asyncpg.Connection):
     created = []
     
+    # Whole cart against itself and the student's current offerings, in one query
+    clashes = await db.fetch(
+        ENROLLMENT_SCHEDULE_CLASHES, student_id,
+        [item.id for item in data.items if item.type == "course"],
+        [item.id for item in data.items if item.type != "course"]
+    )
+    if clashes:
+        return {"error": _clash_message(clashes), "conflicts": [dict(c) for c in clashes]}
+    
     for item in data.items:
         # Check if already enrolled
         if item.type == "course":
@@ -230,9 +248,7 @@ async def update_enrollment_status(data: EnrollmentStatusUpdate, db: asyncpg.Con
     
     return {"message": f"Matrícula {data.status}"}
 
-async def get_admin_enrollments(db: asyncpg.Connection):
-    enrollments = await db.fetch(
-        """SELECT e.*, s.first_name, s.last_name, s.dni,
+ADMIN_ENROLLMENTS_SQL = """SELECT e.*, s.first_name, s.last_name, s.dni,
                   COALESCE(c.name, p.name) as item_name,
                   COALESCE(co.group_label, po.group_label) as group_label,
                   cyc.name as cycle_name
@@ -243,9 +259,17 @@ async def get_admin_enrollments(db: asyncpg.Connection):
            LEFT JOIN package_offerings po ON e.package_offering_id = po.id
            LEFT JOIN packages p ON po.package_id = p.id
            LEFT JOIN cycles cyc ON cyc.id = COALESCE(co.cycle_id, po.cycle_id)
-           ORDER BY e.registered_at DESC"""
-    )
-    return [dict(e) for e in enrollments]
+           ORDER BY e.registered_at DESC, e.id DESC"""
+# Same order over the output columns, for json_array_sql
+ADMIN_ENROLLMENTS_ORDER = "registered_at DESC, id DESC"
+
+async def get_admin_enrollments(db: asyncpg.Connection, as_json: bool = False):
+    """All enrollments for the admin list. With as_json the rows come back
+    as one JSON array built by Postgres."""
+    if as_json:
+        return await db.fetchval(json_array_sql(ADMIN_ENROLLMENTS_SQL, ADMIN_ENROLLMENTS_ORDER))
+    # Records go to orjson without jsonable_encoder (see utils.responses.json_response)
+    return await db.fetch(ADMIN_ENROLLMENTS_SQL)
 
 async def delete_enrollment(enrollment_id: int, db: asyncpg.Connection):
     await db.execute("DELETE FROM enrollments WHERE id = $1", enrollment_id)
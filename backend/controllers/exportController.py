@@ -0,0 +1,123 @@
+import asyncio
+import os
+from config.database import get_db_pool
+from utils.xlsx import StreamingXlsxWriter
+
+# Exports stream rows straight from Postgres to the client: CSV through
+# COPY ... TO STDOUT, XLSX through a server-side cursor. Memory stays
+# bounded by COPY_QUEUE_CHUNKS / CURSOR_BATCH whatever the row count.
+EXPORT_TIMEOUT_S = float(os.getenv("EXPORT_TIMEOUT_S", "1800"))
+CURSOR_BATCH = 2000
+COPY_QUEUE_CHUNKS = 16
+
+# Excel needs the BOM to read UTF-8 CSV (accents in names)
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# dataset -> (sheet name, query). $1 is an optional cycle_id filter.
+EXPORTS = {
+    "enrollments": ("Matrículas", """
+        SELECT e.id, e.registered_at, e.status, e.enrollment_type,
+               s.dni, s.first_name, s.last_name,
+               COALESCE(c.name, p.name) AS item_name,
+               COALESCE(co.group_label, po.group_label) AS group_label,
+               cyc.name AS cycle_name, pp.total_amount
+        FROM enrollments e
+        JOIN students s ON s.id = e.student_id
+        LEFT JOIN course_offerings co ON co.id = e.course_offering_id
+        LEFT JOIN courses c ON c.id = co.course_id
+        LEFT JOIN package_offerings po ON po.id = e.package_offering_id
+        LEFT JOIN packages p ON p.id = po.package_id
+        LEFT JOIN cycles cyc ON cyc.id = COALESCE(co.cycle_id, po.cycle_id)
+        LEFT JOIN payment_plans pp ON pp.enrollment_id = e.id
+        WHERE $1::int IS NULL OR cyc.id = $1
+        ORDER BY e.id"""),
+    "installments": ("Cuotas", """
+        SELECT i.id, pp.enrollment_id, s.dni, s.first_name, s.last_name,
+               COALESCE(c.name, p.name) AS item_name, cyc.name AS cycle_name,
+               i.installment_number, i.amount, i.due_date, i.status, i.paid_at,
+               e.status AS enrollment_status
+        FROM installments i
+        JOIN payment_plans pp ON pp.id = i.payment_plan_id
+        JOIN enrollments e ON e.id = pp.enrollment_id
+        JOIN students s ON s.id = e.student_id
+        LEFT JOIN course_offerings co ON co.id = e.course_offering_id
+        LEFT JOIN courses c ON c.id = co.course_id
+        LEFT JOIN package_offerings po ON po.id = e.package_offering_id
+        LEFT JOIN packages p ON p.id = po.package_id
+        LEFT JOIN cycles cyc ON cyc.id = COALESCE(co.cycle_id, po.cycle_id)
+        WHERE $1::int IS NULL OR cyc.id = $1
+        ORDER BY i.id"""),
+    "attendance": ("Asistencias", """
+        SELECT a.id, a.date, a.status, s.dni, s.first_name, s.last_name,
+               c.name AS course_name, co.group_label, cyc.name AS cycle_name,
+               sch.day_of_week, sch.start_time, sch.end_time
+        FROM attendance a
+        JOIN students s ON s.id = a.student_id
+        JOIN schedules sch ON sch.id = a.schedule_id
+        JOIN course_offerings co ON co.id = sch.course_offering_id
+        JOIN courses c ON c.id = co.course_id
+        JOIN cycles cyc ON cyc.id = co.cycle_id
+        WHERE $1::int IS NULL OR co.cycle_id = $1
+        ORDER BY a.id"""),
+}
+
+async def stream_csv(dataset: str, cycle_id: int = None):
+    """Async iterator of CSV bytes produced by COPY (query) TO STDOUT.
+
+    The response body is sent after the request's get_db connection is
+    released, so the export holds its own pooled connection. COPY pushes
+    chunks into a bounded queue; when the client reads slowly, COPY waits."""
+    _, sql = EXPORTS[dataset]
+    pool = await get_db_pool()
+    queue = asyncio.Queue(maxsize=COPY_QUEUE_CHUNKS)
+
+    async def run_copy():
+        try:
+            async with pool.acquire() as conn:
+                await conn.copy_from_query(
+                    sql, cycle_id, output=queue.put, format="csv", header=True,
+                    timeout=EXPORT_TIMEOUT_S
+                )
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(run_copy())
+    try:
+        yield UTF8_BOM
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await task  # surface COPY errors
+    except Exception as e:
+        print(f"⚠ Export {dataset} (csv) failed: {e}")
+        raise
+    finally:
+        if not task.done():
+            # Client went away: stop COPY and release the connection
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+async def stream_xlsx(dataset: str, cycle_id: int = None):
+    """Async iterator of XLSX bytes, written batch by batch from a cursor"""
+    sheet_name, sql = EXPORTS[dataset]
+    pool = await get_db_pool()
+
+    async with pool.acquire() as conn:
+        # Server-side cursors live inside a transaction
+        async with conn.transaction(readonly=True):
+            stmt = await conn.prepare(sql)
+            writer = StreamingXlsxWriter(sheet_name, [a.name for a in stmt.get_attributes()])
+            yield writer.start()
+
+            cursor = await stmt.cursor(cycle_id)
+            while not writer.full:
+                rows = await cursor.fetch(CURSOR_BATCH, timeout=EXPORT_TIMEOUT_S)
+                if not rows:
+                    break
+                yield writer.write_rows(rows)
+
+            if writer.full:
+                print(f"⚠ Export {dataset} (xlsx) truncated at the Excel row limit")
+            yield writer.finish()
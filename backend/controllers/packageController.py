@@ -1,5 +1,8 @@
 import asyncpg
 from models.enrollment import PackageCreate, PackageUpdate, PackageOfferingCreate
+from config.statements import update_statement, update_args
+
+UPDATE_PACKAGE = update_statement("packages", [f for f in PackageUpdate.model_fields if f != "course_ids"])
 
 async def get_all_packages(db: asyncpg.Connection):
     packages = await db.fetch(
@@ -31,20 +34,9 @@ async def create_package(data: PackageCreate, db: asyncpg.Connection):
     return {"id": package_id, "message": "Paquete creado exitosamente"}
 
 async def update_package(package_id: int, data: PackageUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
-    
     update_data = data.dict(exclude_unset=True, exclude={'course_ids'})
-    for field, value in update_data.items():
-        fields.append(f"{field} = ${idx}")
-        values.append(value)
-        idx += 1
-    
-    if fields:
-        values.append(package_id)
-        query = f"UPDATE packages SET {', '.join(fields)} WHERE id = ${idx}"
-        await db.execute(query, *values)
+    if update_data:
+        await db.execute(UPDATE_PACKAGE, *update_args(UPDATE_PACKAGE, update_data, package_id))
     
     # Update courses if provided
     if data.course_ids is not None:
@@ -2,6 +2,9 @@ import asyncpg
 from fastapi import UploadFile
 import os
 from datetime import datetime, date
+from config.statements import INSTALLMENTS_BY_PLAN
+from utils.notifications import send_notification_to_parent, dispatcher
+from utils.responses import json_array_sql
 
 async def get_payment_plan(enrollment_id: int, db: asyncpg.Connection):
     plan = await db.fetchrow(
@@ -16,12 +19,7 @@ async def get_payment_plan(enrollment_id: int, db: asyncpg.Connection):
     return dict(plan)
 
 async def get_installments(payment_plan_id: int, db: asyncpg.Connection):
-    installments = await db.fetch(
-        """SELECT * FROM installments 
-           WHERE payment_plan_id = $1 
-           ORDER BY installment_number""",
-        payment_plan_id
-    )
+    installments = await db.fetch(INSTALLMENTS_BY_PLAN, payment_plan_id)
     return [dict(i) for i in installments]
 
 async def upload_voucher(installment_id: int, file: UploadFile, student_id: int, db: asyncpg.Connection):
@@ -58,112 +56,117 @@ async def upload_voucher(installment_id: int, file: UploadFile, student_id: int,
     return {"message": "Voucher subido con éxito", "voucherUrl": voucher_url}
 
 async def approve_installment(installment_id: int, db: asyncpg.Connection):
-    """Approve installment - matches Node.js logic exactly"""
-    # Mark installment as paid
-    await db.execute(
-        "UPDATE installments SET status = $1, paid_at = CURRENT_TIMESTAMP WHERE id = $2",
-        "paid", installment_id
-    )
-    
-    # Get payment_plan and enrollment
-    result = await db.fetchrow(
-        """SELECT pp.id as payment_plan_id, pp.enrollment_id 
-           FROM payment_plans pp 
-           JOIN installments i ON i.payment_plan_id = pp.id 
-           WHERE i.id = $1""",
-        installment_id
-    )
-    
-    if not result:
-        return {"error": "Installment no encontrado"}
-    
-    payment_plan_id = result['payment_plan_id']
-    enrollment_id = result['enrollment_id']
-    
-    # Check if all installments are paid
-    pending = await db.fetchrow(
-        "SELECT COUNT(*) as cnt FROM installments WHERE payment_plan_id = $1 AND status != $2",
-        payment_plan_id, "paid"
-    )
-    
-    cycle_start_date = None
-    cycle_end_date = None
-    
-    if pending['cnt'] == 0:
-        # Accept the main enrollment
+    """Approve installment - matches Node.js logic exactly.
+    One transaction: the payment, the enrollment cascade and the queued
+    parent notification (outbox) are written together or not at all."""
+    async with db.transaction():
+        # Get payment_plan and enrollment first: a missing installment writes nothing
+        result = await db.fetchrow(
+            """SELECT pp.id as payment_plan_id, pp.enrollment_id 
+               FROM payment_plans pp 
+               JOIN installments i ON i.payment_plan_id = pp.id 
+               WHERE i.id = $1
+               FOR UPDATE OF i""",
+            installment_id
+        )
+        
+        if not result:
+            return {"error": "Installment no encontrado"}
+        
+        payment_plan_id = result['payment_plan_id']
+        enrollment_id = result['enrollment_id']
+        
+        # Mark installment as paid
         await db.execute(
-            "UPDATE enrollments SET status = $1, accepted_at = CURRENT_TIMESTAMP WHERE id = $2",
-            "aceptado", enrollment_id
+            "UPDATE installments SET status = $1, paid_at = CURRENT_TIMESTAMP WHERE id = $2",
+            "paid", installment_id
         )
         
-        # Get enrollment data for cascade
-        enr = await db.fetchrow(
-            "SELECT enrollment_type, student_id, course_offering_id, package_offering_id FROM enrollments WHERE id = $1",
-            enrollment_id
+        # Check if all installments are paid
+        pending = await db.fetchrow(
+            "SELECT COUNT(*) as cnt FROM installments WHERE payment_plan_id = $1 AND status != $2",
+            payment_plan_id, "paid"
         )
         
-        if enr:
-            # Get cycle dates based on enrollment type
-            if enr['enrollment_type'] == 'course' and enr['course_offering_id']:
-                cy = await db.fetchrow(
-                    """SELECT cyc.start_date, cyc.end_date
-                       FROM course_offerings co
-                       JOIN cycles cyc ON cyc.id = co.cycle_id
-                       WHERE co.id = $1""",
-                    enr['course_offering_id']
-                )
-                if cy:
-                    cycle_start_date = cy['start_date']
-                    cycle_end_date = cy['end_date']
+        cycle_start_date = None
+        cycle_end_date = None
+        
+        if pending['cnt'] == 0:
+            # Accept the main enrollment
+            await db.execute(
+                "UPDATE enrollments SET status = $1, accepted_at = CURRENT_TIMESTAMP WHERE id = $2",
+                "aceptado", enrollment_id
+            )
+            
+            # Get enrollment data for cascade
+            enr = await db.fetchrow(
+                "SELECT enrollment_type, student_id, course_offering_id, package_offering_id FROM enrollments WHERE id = $1",
+                enrollment_id
+            )
+            
+            if enr:
+                # Get cycle dates based on enrollment type
+                if enr['enrollment_type'] == 'course' and enr['course_offering_id']:
+                    cy = await db.fetchrow(
+                        """SELECT cyc.start_date, cyc.end_date
+                           FROM course_offerings co
+                           JOIN cycles cyc ON cyc.id = co.cycle_id
+                           WHERE co.id = $1""",
+                        enr['course_offering_id']
+                    )
+                    if cy:
+                        cycle_start_date = cy['start_date']
+                        cycle_end_date = cy['end_date']
+                        
+                elif enr['enrollment_type'] == 'package' and enr['package_offering_id']:
+                    cy = await db.fetchrow(
+                        """SELECT cyc.start_date, cyc.end_date
+                           FROM package_offerings po
+                           JOIN cycles cyc ON cyc.id = po.cycle_id
+                           WHERE po.id = $1""",
+                        enr['package_offering_id']
+                    )
+                    if cy:
+                        cycle_start_date = cy['start_date']
+                        cycle_end_date = cy['end_date']
                     
-            elif enr['enrollment_type'] == 'package' and enr['package_offering_id']:
-                cy = await db.fetchrow(
-                    """SELECT cyc.start_date, cyc.end_date
-                       FROM package_offerings po
-                       JOIN cycles cyc ON cyc.id = po.cycle_id
-                       WHERE po.id = $1""",
-                    enr['package_offering_id']
-                )
-                if cy:
-                    cycle_start_date = cy['start_date']
-                    cycle_end_date = cy['end_date']
-                
-                # If package, also accept associated course enrollments
-                await db.execute(
-                    """UPDATE enrollments 
-                       SET status = 'aceptado', accepted_at = CURRENT_TIMESTAMP
-                       WHERE student_id = $1 AND enrollment_type = 'course' AND package_offering_id = $2""",
-                    enr['student_id'], enr['package_offering_id']
-                )
-    
-    # Notify parent (try)
-    student = await db.fetchrow(
-        """SELECT s.* FROM enrollments e 
-           JOIN students s ON e.student_id = s.id 
-           WHERE e.id = $1""",
-        enrollment_id
-    )
-    
-    if student:
-        try:
-            from utils.notifications import send_notification_to_parent
+                    # If package, also accept associated course enrollments
+                    await db.execute(
+                        """UPDATE enrollments 
+                           SET status = 'aceptado', accepted_at = CURRENT_TIMESTAMP
+                           WHERE student_id = $1 AND enrollment_type = 'course' AND package_offering_id = $2""",
+                        enr['student_id'], enr['package_offering_id']
+                    )
+        
+        # Notify parent
+        student = await db.fetchrow(
+            """SELECT s.* FROM enrollments e 
+               JOIN students s ON e.student_id = s.id 
+               WHERE e.id = $1""",
+            enrollment_id
+        )
+        
+        if student:
+            # Queued in notifications_log with the approval; the dispatcher sends it after commit
             await send_notification_to_parent(
+                db,
                 student['id'],
                 student['parent_phone'],
                 f"Pago recibido para la matrícula {enrollment_id}",
                 "other"
             )
-        except Exception as err:
-            print(f"Notification error: {err}")
     
+    # The row is visible only now: don't let the dispatcher wait a poll interval
+    dispatcher.wake()
     return {
         "message": "Installment aprobado",
         "cycle_start_date": cycle_start_date,
         "cycle_end_date": cycle_end_date
     }
 
-async def get_all_installments(status: str, db: asyncpg.Connection):
-    """Get all installments with filters - matches Node.js logic"""
+async def get_all_installments(status: str, db: asyncpg.Connection, as_json: bool = False):
+    """Get all installments with filters - matches Node.js logic.
+    With as_json the rows come back as one JSON array built by Postgres."""
     # Auto-mark overdue installments
     try:
         await db.execute(
@@ -172,8 +175,10 @@ async def get_all_installments(status: str, db: asyncpg.Connection):
     except Exception as e:
         print(f"Auto-overdue update failed: {e}")
     
+    # status_ui derived in SQL (like Node.js) so the Records need no post-processing
     sql = """SELECT i.*, pp.enrollment_id, e.student_id, s.first_name, s.last_name, s.dni,
-                    COALESCE(c.name, p.name) as item_name, e.enrollment_type, e.status AS enrollment_status
+                    COALESCE(c.name, p.name) as item_name, e.enrollment_type, e.status AS enrollment_status,
+                    CASE WHEN e.status = 'rechazado' THEN 'rejected' ELSE i.status::text END AS status_ui
              FROM installments i
              JOIN payment_plans pp ON i.payment_plan_id = pp.id
              JOIN enrollments e ON pp.enrollment_id = e.id
@@ -193,16 +198,10 @@ async def get_all_installments(status: str, db: asyncpg.Connection):
     
     sql += " ORDER BY i.id DESC"
     
-    rows = await db.fetch(sql, *params)
-    
-    # Derive status_ui (like Node.js)
-    mapped = []
-    for r in rows:
-        row_dict = dict(r)
-        row_dict['status_ui'] = 'rejected' if row_dict['enrollment_status'] == 'rechazado' else row_dict['status']
-        mapped.append(row_dict)
-    
-    return mapped
+    if as_json:
+        return await db.fetchval(json_array_sql(sql, "id DESC"), *params)
+    # Records go to orjson without jsonable_encoder (see utils.responses.json_response)
+    return await db.fetch(sql, *params)
 
 async def reject_installment(installment_id: int, reason: str, db: asyncpg.Connection):
     """Reject installment - matches Node.js logic"""
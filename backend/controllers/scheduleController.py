@@ -1,41 +1,96 @@
 import asyncpg
-from models.course import ScheduleCreate, ScheduleUpdate
-from datetime import time as py_time
+from models.course import ScheduleCreate, ScheduleUpdate, ScheduleBulkCreate, DAYS_OF_WEEK
+from config.statements import (
+    update_statement, update_args, SCHEDULE_BY_ID, SCHEDULE_CONFLICTS, BULK_SCHEDULE_CHECK,
+    SCHEDULE_INSERT_MANY, CYCLE_BY_ID, ACTIVE_CYCLE,
+    TIMETABLE_BY_STUDENT, TIMETABLE_BY_TEACHER, TIMETABLE_BY_CLASSROOM
+)
+
+UPDATE_SCHEDULE = update_statement("schedules", ScheduleUpdate.model_fields)
+
+MAX_BULK_SCHEDULES = 5000
+
+def _conflict_message(conflicts) -> str:
+    parts = []
+    for c in conflicts:
+        who = f"el aula {c['classroom']}" if c['conflict'] == 'classroom' else "el docente"
+        parts.append(
+            f"{who} ya tiene {c['course_name']} (Grupo {c['group_label']}) el {c['day_of_week']} "
+            f"{c['start_time']:%H:%M}-{c['end_time']:%H:%M}"
+        )
+    return "Cruce de horario: " + "; ".join(parts)
+
+async def _check_slot(db, course_offering_id, day_of_week, t_start, t_end, classroom, schedule_id=0):
+    """None if the slot is free, otherwise an error dict listing the clashes"""
+    if t_end <= t_start:
+        return {"error": "La hora de fin debe ser posterior a la hora de inicio"}
+    conflicts = await db.fetch(
+        SCHEDULE_CONFLICTS, course_offering_id, day_of_week, t_start, t_end, classroom, schedule_id
+    )
+    if conflicts:
+        return {"error": _conflict_message(conflicts), "conflicts": [dict(c) for c in conflicts]}
+    return None
 
 async def create_schedule(data: ScheduleCreate, db: asyncpg.Connection):
-    # Parse time strings to time objects
-    st = data.start_time
-    et = data.end_time
+    clash = await _check_slot(
+        db, data.course_offering_id, data.day_of_week, data.start_time, data.end_time, data.classroom
+    )
+    if clash:
+        return clash
     
-    if hasattr(st, 'strftime'):
-        st = st.strftime("%H:%M:%S")
-    else:
-        st = str(st)
-        # Add seconds if not present (HH:MM -> HH:MM:00)
-        if st.count(':') == 1:
-            st = st + ":00"
-        
-    if hasattr(et, 'strftime'):
-        et = et.strftime("%H:%M:%S")
-    else:
-        et = str(et)
-        # Add seconds if not present (HH:MM -> HH:MM:00)
-        if et.count(':') == 1:
-            et = et + ":00"
+    try:
+        result = await db.fetchrow(
+            """INSERT INTO schedules (course_offering_id, day_of_week, start_time, end_time, classroom)
+               VALUES ($1, $2::day_of_week, $3, $4, $5) RETURNING id""",
+            data.course_offering_id, data.day_of_week, data.start_time, data.end_time, data.classroom
+        )
+    except asyncpg.ExclusionViolationError:
+        # Another request took the slot between the check and the insert
+        return {"error": "Cruce de horario con otra clase del ciclo", "conflicts": []}
+    return {"id": result['id'], "message": "Horario creado exitosamente"}
+
+async def create_schedules_bulk(data: ScheduleBulkCreate, db: asyncpg.Connection):
+    """Insert a whole timetable in one statement and one transaction.
+    Every row is checked first (unknown offerings, clashes with stored
+    schedules and with each other); nothing is inserted if any row fails."""
+    rows = data.schedules
+    columns = (
+        [r.course_offering_id for r in rows],
+        [r.day_of_week for r in rows],
+        [r.start_time for r in rows],
+        [r.end_time for r in rows],
+        [r.classroom for r in rows],
+    )
     
-    # Convert to time objects for asyncpg
-    h, m, s = map(int, st.split(':'))
-    t_start = py_time(h, m, s)
+    problems = await db.fetch(BULK_SCHEDULE_CHECK, list(range(len(rows))), *columns)
+    missing = [p['idx'] for p in problems if p['missing']]
+    if missing:
+        return {"error": "Ofertas de curso inexistentes en las filas: "
+                         + ", ".join(str(i + 1) for i in missing)}
+    if problems:
+        errors = []
+        for p in problems:
+            if p['other_idx'] is not None:
+                who = "misma aula" if p['conflict'] == 'classroom' else "mismo docente"
+                errors.append(f"Fila {p['idx'] + 1}: se cruza con la fila {p['other_idx'] + 1} ({who})")
+            else:
+                who = "el aula" if p['conflict'] == 'classroom' else "el docente"
+                errors.append(
+                    f"Fila {p['idx'] + 1}: {who} ya tiene {p['course_name']} (Grupo {p['group_label']})"
+                )
+        return {"error": "; ".join(errors[:50]), "conflicts": [dict(p) for p in problems]}
     
-    h, m, s = map(int, et.split(':'))
-    t_end = py_time(h, m, s)
+    try:
+        async with db.transaction():
+            created = await db.fetch(SCHEDULE_INSERT_MANY, *columns)
+    except asyncpg.ExclusionViolationError:
+        return {"error": "Cruce de horario con otra clase del ciclo", "conflicts": []}
     
-    result = await db.fetchrow(
-        """INSERT INTO schedules (course_offering_id, day_of_week, start_time, end_time, classroom)
-           VALUES ($1, $2::day_of_week, $3, $4, $5) RETURNING id""",
-        data.course_offering_id, data.day_of_week, t_start, t_end, data.classroom
-    )
-    return {"id": result['id'], "message": "Horario creado exitosamente"}
+    return {
+        "message": f"{len(created)} horarios creados exitosamente",
+        "created": len(created),
+        "ids": [r['id'] for r in created]
+    }
 
 async def get_schedules_by_offering(offering_id: int, db: asyncpg.Connection):
     schedules = await db.fetch(
@@ -91,21 +146,27 @@ async def get_schedules_by_package(package_id: int, db: asyncpg.Connection):
     return [dict(s) for s in rows]
 
 async def update_schedule(schedule_id: int, data: ScheduleUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
+    update_data = data.dict(exclude_unset=True)
+    if not update_data:
+        return {"message": "No hay campos para actualizar"}
     
-    for field, value in data.dict(exclude_unset=True).items():
-        fields.append(f"{field} = ${idx}")
-        values.append(value)
-        idx += 1
+    current = await db.fetchrow(SCHEDULE_BY_ID, schedule_id)
+    if not current:
+        return None
     
-    if not fields:
-        return {"message": "No hay campos para actualizar"}
+    merged = {**dict(current), **update_data}
     
-    values.append(schedule_id)
-    query = f"UPDATE schedules SET {', '.join(fields)} WHERE id = ${idx}"
-    await db.execute(query, *values)
+    clash = await _check_slot(
+        db, current['course_offering_id'], merged['day_of_week'],
+        merged['start_time'], merged['end_time'], merged['classroom'], schedule_id
+    )
+    if clash:
+        return clash
+    
+    try:
+        await db.execute(UPDATE_SCHEDULE, *update_args(UPDATE_SCHEDULE, update_data, schedule_id))
+    except asyncpg.ExclusionViolationError:
+        return {"error": "Cruce de horario con otra clase del ciclo", "conflicts": []}
     return {"message": "Horario actualizado correctamente"}
 
 async def delete_schedule(schedule_id: int, db: asyncpg.Connection):
@@ -123,3 +184,34 @@ async def get_all_schedules(db: asyncpg.Connection):
            ORDER BY co.course_id, s.day_of_week, s.start_time"""
     )
     return [dict(s) for s in schedules]
+
+async def get_timetable(cycle_id: int, student_id: int, teacher_id: int, classroom: str,
+                        db: asyncpg.Connection):
+    """Weekly timetable of a student, teacher or classroom for a cycle
+    (the open cycle by default), grouped by day"""
+    if cycle_id:
+        cycle = await db.fetchrow(CYCLE_BY_ID, cycle_id)
+    else:
+        cycle = await db.fetchrow(ACTIVE_CYCLE)
+    if not cycle:
+        return {"error": "Ciclo no encontrado"}
+    
+    if student_id is not None:
+        rows = await db.fetch(TIMETABLE_BY_STUDENT, student_id, cycle['id'])
+    elif teacher_id is not None:
+        rows = await db.fetch(TIMETABLE_BY_TEACHER, teacher_id, cycle['id'])
+    else:
+        rows = await db.fetch(TIMETABLE_BY_CLASSROOM, classroom, cycle['id'])
+    
+    days = {day: [] for day in DAYS_OF_WEEK}
+    for row in rows:
+        days[row['day_of_week']].append(dict(row))
+    for entries in days.values():
+        entries.sort(key=lambda r: r['start_time'])
+    
+    return {
+        "cycle_id": cycle['id'],
+        "cycle_name": cycle['name'],
+        "total": len(rows),
+        "days": days
+    }
@@ -1,20 +1,63 @@
 import asyncpg
+import csv
+import io
+from fastapi import UploadFile
 from models.student import StudentCreate, StudentUpdate
+from config.statements import update_statement, update_args, STUDENT_BY_ID
+
+UPDATE_STUDENT = update_statement("students", [*StudentUpdate.model_fields, "password_hash"])
+
+MAX_IMPORT_ROWS = 2000
+IMPORT_COLUMNS = ["dni", "first_name", "last_name", "phone", "parent_name", "parent_phone", "password"]
+IMPORT_REQUIRED = ["dni", "first_name", "last_name", "password"]
+# Column sizes in the students table; a longer value would abort the whole COPY
+IMPORT_MAX_LENGTHS = {
+    "dni": 15, "first_name": 50, "last_name": 50,
+    "phone": 15, "parent_name": 100, "parent_phone": 15
+}
+STAGING_COLUMNS = ["line", *IMPORT_COLUMNS[:-1], "password_hash"]
+
+IMPORT_STAGING_SQL = """
+    CREATE TEMP TABLE student_import (
+        line INT NOT NULL,
+        dni VARCHAR(15) NOT NULL,
+        first_name VARCHAR(50) NOT NULL,
+        last_name VARCHAR(50) NOT NULL,
+        phone VARCHAR(15),
+        parent_name VARCHAR(100),
+        parent_phone VARCHAR(15),
+        password_hash VARCHAR(255) NOT NULL
+    ) ON COMMIT DROP"""
+
+# Rows whose DNI was taken meanwhile come back with a NULL id
+IMPORT_MERGE_SQL = """
+    WITH inserted AS (
+        INSERT INTO students (dni, first_name, last_name, phone, parent_name, parent_phone, password_hash)
+        SELECT dni, first_name, last_name, phone, parent_name, parent_phone, password_hash
+        FROM student_import
+        ORDER BY line
+        ON CONFLICT (dni) DO NOTHING
+        RETURNING id, dni
+    )
+    SELECT si.line, si.dni, inserted.id
+    FROM student_import si
+    LEFT JOIN inserted ON inserted.dni = si.dni
+    ORDER BY si.line"""
 
 async def get_all_students(db: asyncpg.Connection):
     students = await db.fetch("SELECT * FROM students ORDER BY last_name, first_name")
     return [dict(s) for s in students]
 
 async def get_student_by_id(student_id: int, db: asyncpg.Connection):
-    student = await db.fetchrow("SELECT * FROM students WHERE id = $1", student_id)
+    student = await db.fetchrow(STUDENT_BY_ID, student_id)
     if not student:
         return None
     return dict(student)
 
 async def create_student(data: StudentCreate, db: asyncpg.Connection):
-    from utils.security import get_password_hash
+    from utils.security import hash_password
     
-    password_hash = get_password_hash(data.password)
+    password_hash = await hash_password(data.password)
     result = await db.fetchrow(
         """INSERT INTO students (dni, first_name, last_name, phone, parent_name, parent_phone, password_hash)
            VALUES ($1, $2, $3, $4, $5, $6, $7) RETURNING id""",
@@ -24,28 +67,97 @@ async def create_student(data: StudentCreate, db: asyncpg.Connection):
     return {"id": result['id'], "message": "Estudiante creado exitosamente"}
 
 async def update_student(student_id: int, data: StudentUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
-    
-    for field, value in data.dict(exclude_unset=True).items():
-        if field == "password" and value:
-            from utils.security import get_password_hash
-            fields.append(f"password_hash = ${idx}")
-            values.append(get_password_hash(value))
-        else:
-            fields.append(f"{field} = ${idx}")
-            values.append(value)
-        idx += 1
+    update_data = data.dict(exclude_unset=True)
+    if update_data.get("password"):
+        from utils.security import hash_password
+        update_data["password_hash"] = await hash_password(update_data.pop("password"))
     
-    if not fields:
+    if not update_data:
         return {"message": "No hay campos para actualizar"}
     
-    values.append(student_id)
-    query = f"UPDATE students SET {', '.join(fields)} WHERE id = ${idx}"
-    await db.execute(query, *values)
+    await db.execute(UPDATE_STUDENT, *update_args(UPDATE_STUDENT, update_data, student_id))
     return {"message": "Estudiante actualizado correctamente"}
 
 async def delete_student(student_id: int, db: asyncpg.Connection):
     await db.execute("DELETE FROM students WHERE id = $1", student_id)
     return {"message": "Estudiante eliminado correctamente"}
+
+def _import_row(row: dict):
+    """Clean values of one CSV row (blank optional fields become NULL), or an error"""
+    values = {k: (row.get(k) or "").strip() for k in IMPORT_COLUMNS}
+    missing = [k for k in IMPORT_REQUIRED if not values[k]]
+    if missing:
+        return None, "Campos obligatorios vacíos: " + ", ".join(missing)
+    too_long = [k for k, limit in IMPORT_MAX_LENGTHS.items() if len(values[k]) > limit]
+    if too_long:
+        return None, "Campos demasiado largos: " + ", ".join(too_long)
+    return [values[k] or None for k in IMPORT_COLUMNS], None
+
+async def import_students(file: UploadFile, db: asyncpg.Connection):
+    """Bulk import from a CSV with IMPORT_COLUMNS as header.
+
+    Rows are validated while the upload is read, DNIs already registered
+    are reported without paying for their hash, the remaining passwords
+    are hashed at the import cost on their own pool (see
+    hash_import_passwords) and everything is loaded with one COPY into a
+    staging table and merged with a single INSERT ... ON CONFLICT."""
+    from utils.security import hash_import_passwords
+    
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    rows, errors, seen = [], [], {}
+    try:
+        missing = [c for c in IMPORT_REQUIRED if c not in (reader.fieldnames or [])]
+        if missing:
+            return {"error": "Faltan columnas en el CSV: " + ", ".join(missing)}
+        
+        for row in reader:
+            if len(rows) + len(errors) >= MAX_IMPORT_ROWS:
+                return {"error": f"Máximo {MAX_IMPORT_ROWS} estudiantes por importación"}
+            line = reader.line_num
+            values, error = _import_row(row)
+            if error is None and values[0] in seen:
+                error = f"DNI repetido en el archivo (línea {seen[values[0]]})"
+            if error:
+                errors.append({"line": line, "dni": row.get("dni"), "error": error})
+                continue
+            seen[values[0]] = line
+            rows.append([line, *values])
+    except UnicodeDecodeError:
+        return {"error": "El archivo debe estar codificado en UTF-8"}
+    except csv.Error as e:
+        return {"error": f"CSV inválido en la línea {reader.line_num}: {e}"}
+    finally:
+        text.detach()  # the upload itself is closed by Starlette
+    
+    existing = {
+        r['dni'] for r in await db.fetch(
+            "SELECT dni FROM students WHERE dni = ANY($1::varchar[])", list(seen)
+        )
+    }
+    conflicts = [
+        {"line": r[0], "dni": r[1], "error": "DNI ya registrado"}
+        for r in rows if r[1] in existing
+    ]
+    rows = [r for r in rows if r[1] not in existing]
+    
+    created = []
+    if rows:
+        hashes = await hash_import_passwords([r[-1] for r in rows])
+        records = [(*r[:-1], h) for r, h in zip(rows, hashes)]
+        async with db.transaction():
+            await db.execute(IMPORT_STAGING_SQL)
+            await db.copy_records_to_table("student_import", records=records, columns=STAGING_COLUMNS)
+            for r in await db.fetch(IMPORT_MERGE_SQL):
+                if r['id'] is None:
+                    conflicts.append({"line": r['line'], "dni": r['dni'], "error": "DNI ya registrado"})
+                else:
+                    created.append(dict(r))
+    
+    return {
+        "message": f"{len(created)} estudiantes importados",
+        "imported": len(created),
+        "created": created,
+        "conflicts": sorted(conflicts, key=lambda c: c["line"]),
+        "errors": errors
+    }
@@ -1,5 +1,19 @@
 import asyncpg
-from models.teacher import TeacherCreate, TeacherUpdate, AttendanceCreate
+from models.teacher import TeacherCreate, TeacherUpdate, AttendanceCreate, AttendanceRoster
+from config.statements import (
+    update_statement, update_args, TEACHER_BY_ID, SCHEDULE_OWNER, ACCEPTED_ENROLLMENT_FOR_SCHEDULE,
+    ATTENDANCE_UPSERT, ACCEPTED_STUDENTS_FOR_SCHEDULE, ATTENDANCE_UPSERT_ROSTER, ABSENCE_THRESHOLDS
+)
+from utils.notifications import send_notification_to_parent, send_notifications_to_parents
+
+UPDATE_TEACHER = update_statement("teachers", TeacherUpdate.model_fields)
+
+ATTENDANCE_STATUSES = ("presente", "ausente")
+ABSENCE_NOTIFY_THRESHOLD = 3
+
+def absence_message(student) -> str:
+    return (f"Su hijo/a {student['first_name']} {student['last_name']} ha acumulado "
+            f"{student['count']} faltas en este horario")
 
 async def get_all_teachers(db: asyncpg.Connection):
     teachers = await db.fetch("SELECT * FROM teachers ORDER BY last_name, first_name")
@@ -12,19 +26,19 @@ async def get_all_teachers(db: asyncpg.Connection):
     return result
 
 async def get_teacher_by_id(teacher_id: int, db: asyncpg.Connection):
-    teacher = await db.fetchrow("SELECT * FROM teachers WHERE id = $1", teacher_id)
+    teacher = await db.fetchrow(TEACHER_BY_ID, teacher_id)
     if not teacher:
         return None
     return dict(teacher)
 
 async def create_teacher(data: TeacherCreate, db: asyncpg.Connection):
-    from utils.security import get_password_hash
+    from utils.security import hash_password
     
     # Create user for teacher
     user_result = await db.fetchrow(
         """INSERT INTO users (username, password_hash, role, related_id)
            VALUES ($1, $2, 'teacher', NULL) RETURNING id""",
-        data.dni, get_password_hash(data.dni)
+        data.dni, await hash_password(data.dni)
     )
     user_id = user_result['id']
     
@@ -42,21 +56,11 @@ async def create_teacher(data: TeacherCreate, db: asyncpg.Connection):
     return {"id": teacher_id, "message": "Docente creado exitosamente"}
 
 async def update_teacher(teacher_id: int, data: TeacherUpdate, db: asyncpg.Connection):
-    fields = []
-    values = []
-    idx = 1
-    
-    for field, value in data.dict(exclude_unset=True).items():
-        fields.append(f"{field} = ${idx}")
-        values.append(value)
-        idx += 1
-    
-    if not fields:
+    update_data = data.dict(exclude_unset=True)
+    if not update_data:
         return {"message": "No hay campos para actualizar"}
     
-    values.append(teacher_id)
-    query = f"UPDATE teachers SET {', '.join(fields)} WHERE id = ${idx}"
-    await db.execute(query, *values)
+    await db.execute(UPDATE_TEACHER, *update_args(UPDATE_TEACHER, update_data, teacher_id))
     return {"message": "Docente actualizado correctamente"}
 
 async def delete_teacher(teacher_id: int, db: asyncpg.Connection):
@@ -65,7 +69,7 @@ async def delete_teacher(teacher_id: int, db: asyncpg.Connection):
     return {"message": "Profesor eliminado correctamente"}
 
 async def reset_teacher_password(teacher_id: int, db: asyncpg.Connection):
-    from utils.security import get_password_hash
+    from utils.security import hash_password
     
     teacher = await db.fetchrow("SELECT dni FROM teachers WHERE id = $1", teacher_id)
     if not teacher:
@@ -73,7 +77,7 @@ async def reset_teacher_password(teacher_id: int, db: asyncpg.Connection):
     
     await db.execute(
         "UPDATE users SET password_hash = $1 WHERE username = $2",
-        get_password_hash(teacher['dni']), teacher['dni']
+        await hash_password(teacher['dni']), teacher['dni']
     )
     return {"message": "Contraseña reseteada al DNI del docente"}
 
@@ -94,75 +98,89 @@ async def mark_attendance(teacher_id: int, data: AttendanceCreate, db: asyncpg.C
     from datetime import date
     
     # Verify teacher owns this schedule
-    schedule = await db.fetchrow(
-        """SELECT co.teacher_id FROM schedules s
-           JOIN course_offerings co ON s.course_offering_id = co.id
-           WHERE s.id = $1""",
-        data.schedule_id
-    )
+    schedule = await db.fetchrow(SCHEDULE_OWNER, data.schedule_id)
     
     if not schedule or schedule['teacher_id'] != teacher_id:
         return {"error": "No tienes permiso para marcar asistencia en este curso"}
     
     # Verify student has accepted enrollment in this course (like Node.js)
     enrollment_check = await db.fetchrow(
-        """SELECT e.id
-           FROM enrollments e
-           JOIN schedules s ON s.course_offering_id = e.course_offering_id
-           WHERE s.id = $1
-             AND e.student_id = $2
-             AND e.enrollment_type = 'course'
-             AND e.status = 'aceptado'
-           LIMIT 1""",
-        data.schedule_id, data.student_id
+        ACCEPTED_ENROLLMENT_FOR_SCHEDULE, data.schedule_id, data.student_id
     )
     
     if not enrollment_check:
         return {"error": "El estudiante no tiene una matrícula aceptada en este curso"}
     
-    # Check if attendance already exists
-    existing = await db.fetchrow(
-        """SELECT id FROM attendance 
-           WHERE student_id = $1 AND schedule_id = $2 AND date = $3""",
-        data.student_id, data.schedule_id, date.today()
-    )
-    
-    if existing:
-        await db.execute(
-            "UPDATE attendance SET status = $1 WHERE id = $2",
-            data.status, existing['id']
-        )
-    else:
+    async with db.transaction():
+        # One round trip, safe against double-taps: the unique
+        # (student_id, schedule_id, date) key turns a repeat into an update
         await db.execute(
-            """INSERT INTO attendance (student_id, schedule_id, date, status)
-               VALUES ($1, $2, $3, $4)""",
-            data.student_id, data.schedule_id, date.today(), data.status
-        )
-    
-    # If absent, check total absences and notify parent if >= 3 (like Node.js)
-    if data.status == "ausente":
-        absences = await db.fetchrow(
-            """SELECT COUNT(*) as count FROM attendance 
-               WHERE student_id = $1 AND status = 'ausente' AND schedule_id = $2""",
-            data.student_id, data.schedule_id
+            ATTENDANCE_UPSERT, data.student_id, data.schedule_id, date.today(), data.status
         )
         
-        if absences and absences['count'] >= 3:
+        # If absent, check total absences and notify parent if >= 3 (like Node.js)
+        if data.status == "ausente":
+            # Absence count and parent contact in one query; no row below the threshold
             student = await db.fetchrow(
-                "SELECT * FROM students WHERE id = $1",
-                data.student_id
+                ABSENCE_THRESHOLDS, data.schedule_id, [data.student_id], ABSENCE_NOTIFY_THRESHOLD
             )
             
             if student and student['parent_phone']:
-                try:
-                    from utils.notifications import send_notification_to_parent
-                    await send_notification_to_parent(
-                        data.student_id,
-                        student['parent_phone'],
-                        f"Su hijo/a {student['first_name']} {student['last_name']} ha acumulado {absences['count']} faltas en este horario",
-                        "absences_3"
-                    )
-                except Exception as notif_err:
-                    print(f"Error enviando notificación: {notif_err}")
+                # Outbox row commits with the attendance mark
+                await send_notification_to_parent(
+                    db,
+                    data.student_id,
+                    student['parent_phone'],
+                    absence_message(student),
+                    "absences_3"
+                )
     
     return {"message": "Asistencia marcada correctamente"}
+
+async def mark_roster_attendance(teacher_id: int, data: AttendanceRoster, db: asyncpg.Connection):
+    """Mark a whole class in one call: ownership checked once, enrollments
+    validated set-based, one upsert for every row and one grouped absence query"""
+    from datetime import date
+    
+    # Last entry wins if a student appears twice in the roster
+    statuses = {record.student_id: record.status for record in data.records}
+    
+    schedule = await db.fetchrow(SCHEDULE_OWNER, data.schedule_id)
+    if not schedule or schedule['teacher_id'] != teacher_id:
+        return {"error": "No tienes permiso para marcar asistencia en este curso"}
+    
+    student_ids = list(statuses)
+    accepted = await db.fetch(ACCEPTED_STUDENTS_FOR_SCHEDULE, data.schedule_id, student_ids)
+    not_enrolled = sorted(set(student_ids) - {r['student_id'] for r in accepted})
+    if not_enrolled:
+        return {
+            "error": "Estudiantes sin matrícula aceptada en este curso: "
+                     + ", ".join(str(s) for s in not_enrolled),
+            "not_enrolled": not_enrolled
+        }
+    
+    attendance_date = data.date or date.today()
+    absent_ids = [s for s, st in statuses.items() if st == "ausente"]
+    
+    async with db.transaction():
+        await db.execute(
+            ATTENDANCE_UPSERT_ROSTER, data.schedule_id, attendance_date,
+            student_ids, [statuses[s] for s in student_ids]
+        )
+        over_threshold = []
+        if absent_ids:
+            over_threshold = await db.fetch(
+                ABSENCE_THRESHOLDS, data.schedule_id, absent_ids, ABSENCE_NOTIFY_THRESHOLD
+            )
+        
+        # Every alert for the class queued in one insert, inside the transaction
+        await send_notifications_to_parents(db, [
+            (s['student_id'], s['parent_phone'], absence_message(s), "absences_3")
+            for s in over_threshold if s['parent_phone']
+        ])
+    
+    return {
+        "message": "Asistencia registrada correctamente",
+        "marked": len(student_ids),
+        "absence_alerts": [s['student_id'] for s in over_threshold if s['parent_phone']]
+    }
@@ -0,0 +1,45 @@
+# ===========================================================
+# Production entry point: gunicorn -c gunicorn.conf.py main:app
+# One Uvicorn worker (uvloop + httptools) per core. The Postgres
+# connection budget is split across workers (see config.database).
+# ===========================================================
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '4000')}"
+
+# WEB_CONCURRENCY overrides the CPU-based default
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "config.workers.AcademiaUvicornWorker"
+
+# Every worker pool needs at least 2 connections: never run more workers
+# than the Postgres budget can hold
+max_workers = max(1, int(os.getenv("DB_POOL_BUDGET", "20")) // 2)
+if workers > max_workers:
+    print(f"⚠ {workers} workers exceden DB_POOL_BUDGET; se usan {max_workers}")
+    workers = max_workers
+
+# Workers read this to size their own pool
+os.environ["APP_WORKERS"] = str(workers)
+
+# Client IPs (login throttling per IP) come from X-Forwarded-For, trusted
+# only from these proxy addresses. Behind a load balancer (Railway, nginx)
+# set its address or CIDR; "*" only if the app is reachable solely through it.
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1,::1")
+
+# Import the app once in the master; workers fork with it loaded.
+# Pools and background jobs are created per worker at startup.
+preload_app = True
+
+# SIGTERM: stop accepting, let in-flight requests and the shutdown hook
+# (dispatcher, jobs, pool) finish within graceful_timeout
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+# Recycle workers now and then (jitter avoids restarting all at once)
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("ACCESS_LOG") or None
+errorlog = "-"
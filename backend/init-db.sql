@@ -2,6 +2,21 @@
 -- POSTGRESQL SCHEMA FOR ACADEMIA
 -- ===========================================================
 
+-- ===========================================================
+-- EXTENSIONES
+-- ===========================================================
+-- btree_gist: restricciones de exclusión que combinan igualdad (=) y rangos (&&)
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+-- pg_trgm + unaccent: búsqueda por nombre, DNI o teléfono sin importar tildes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- Texto de búsqueda normalizado (minúsculas, sin tildes), usado por los índices GIN
+CREATE OR REPLACE FUNCTION search_norm(VARIADIC parts TEXT[])
+RETURNS TEXT AS $$
+  SELECT lower(public.unaccent('public.unaccent'::regdictionary, array_to_string(parts, ' ')))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
 -- ===========================================================
 -- CREAR TIPOS ENUM
 -- ===========================================================
@@ -132,7 +147,17 @@ CREATE TABLE schedules (
   start_time TIME NOT NULL,
   end_time TIME NOT NULL,
   classroom VARCHAR(50),
-  FOREIGN KEY (course_offering_id) REFERENCES course_offerings(id) ON DELETE CASCADE
+  -- Copiados de course_offerings y calculados por trg_fill_schedule_slot
+  cycle_id INT,
+  teacher_id INT,
+  week_slot int4range,
+  FOREIGN KEY (course_offering_id) REFERENCES course_offerings(id) ON DELETE CASCADE,
+  CONSTRAINT chk_schedules_time_order CHECK (end_time > start_time),
+  -- Un aula y un docente no pueden tener dos clases a la vez en el mismo ciclo
+  CONSTRAINT ex_schedules_classroom EXCLUDE USING gist
+    (cycle_id WITH =, classroom WITH =, week_slot WITH &&) WHERE (classroom IS NOT NULL),
+  CONSTRAINT ex_schedules_teacher EXCLUDE USING gist
+    (cycle_id WITH =, teacher_id WITH =, week_slot WITH &&) WHERE (teacher_id IS NOT NULL)
 );
 
 -- ===========================================================
@@ -192,6 +217,30 @@ CREATE TABLE attendance (
   FOREIGN KEY (schedule_id) REFERENCES schedules(id) ON DELETE CASCADE
 );
 
+-- ===========================================================
+-- SESIONES (REFRESH TOKENS)
+-- ===========================================================
+-- Solo el SHA-256 del token; subject_id es students.id o users.id según role
+CREATE TABLE refresh_tokens (
+  id BIGSERIAL PRIMARY KEY,
+  token_hash CHAR(64) NOT NULL UNIQUE,
+  session_id UUID NOT NULL,
+  subject_id INT NOT NULL,
+  role user_role NOT NULL,
+  expires_at TIMESTAMP NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  rotated_at TIMESTAMP NULL,
+  revoked_at TIMESTAMP NULL
+);
+
+-- Límite de intentos de login entre réplicas (LOGIN_RATE_STORE=postgres)
+CREATE UNLOGGED TABLE rate_limit_buckets (
+  key VARCHAR(120) PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  allowed BOOLEAN NOT NULL DEFAULT true,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- ===========================================================
 -- NOTIFICACIONES
 -- ===========================================================
@@ -203,6 +252,9 @@ CREATE TABLE notifications_log (
   message TEXT NOT NULL,
   sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   status notification_status DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  last_error TEXT,
   FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
 );
 
@@ -236,8 +288,29 @@ CREATE INDEX idx_enroll_student ON enrollments(student_id);
 CREATE INDEX idx_offering_cycle ON course_offerings(cycle_id);
 CREATE INDEX idx_installment_due ON installments(due_date);
 CREATE INDEX idx_attendance_student_date ON attendance(student_id, date);
+-- Una marca por alumno, horario y fecha (clave para INSERT ... ON CONFLICT)
+CREATE UNIQUE INDEX ux_attendance_student_schedule_date ON attendance(student_id, schedule_id, date);
 CREATE INDEX idx_poc_package_offering ON package_offering_courses(package_offering_id);
 CREATE INDEX idx_poc_course_offering ON package_offering_courses(course_offering_id);
+CREATE INDEX idx_schedules_offering ON schedules(course_offering_id);
+-- Cola de salida de notificaciones: solo las pendientes, por próximo intento
+CREATE INDEX idx_notifications_pending ON notifications_log(next_attempt_at) WHERE status = 'pending';
+-- Recordatorios de pago: cuotas impagas por vencimiento y deduplicación por alumno
+CREATE INDEX idx_installments_unpaid_due ON installments(due_date) WHERE status IN ('pending', 'overdue');
+CREATE INDEX idx_notifications_student_type_sent ON notifications_log(student_id, type, sent_at);
+-- Sesiones: rotación por sesión, revocadas recientes (sincronización) y purga
+CREATE INDEX idx_refresh_tokens_session ON refresh_tokens(session_id);
+CREATE INDEX idx_refresh_tokens_revoked ON refresh_tokens(revoked_at) WHERE revoked_at IS NOT NULL;
+CREATE INDEX idx_refresh_tokens_expires ON refresh_tokens(expires_at);
+-- Búsqueda: trigramas (subcadena/difusa) y tsvector (prefijos), misma expresión que en las consultas
+CREATE INDEX idx_students_search_trgm ON students
+  USING gin (search_norm(dni, first_name, last_name, parent_name, phone, parent_phone) gin_trgm_ops);
+CREATE INDEX idx_students_search_fts ON students
+  USING gin (to_tsvector('simple', search_norm(dni, first_name, last_name, parent_name, phone, parent_phone)));
+CREATE INDEX idx_teachers_search_trgm ON teachers
+  USING gin (search_norm(dni, first_name, last_name, email, phone, specialization) gin_trgm_ops);
+CREATE INDEX idx_teachers_search_fts ON teachers
+  USING gin (to_tsvector('simple', search_norm(dni, first_name, last_name, email, phone, specialization)));
 
 -- ===========================================================
 -- VISTA ADMINISTRATIVA EXTENDIDA
@@ -357,6 +430,7 @@ FOR EACH ROW
 EXECUTE FUNCTION update_analytics_timestamp();
 
 -- Trigger para actualizar attendance summary
+-- Se dispara al insertar y también al corregir el estado (UPDATE / ON CONFLICT DO UPDATE)
 CREATE OR REPLACE FUNCTION update_attendance_summary()
 RETURNS TRIGGER AS $$
 DECLARE
@@ -371,18 +445,13 @@ BEGIN
   WHERE s.id = NEW.schedule_id
   LIMIT 1;
 
-  SELECT COUNT(*) INTO total_classes
+  SELECT COUNT(*), COUNT(*) FILTER (WHERE a.status = 'presente')
+  INTO total_classes, attended_classes
   FROM attendance a
   JOIN schedules s2 ON s2.id = a.schedule_id
   JOIN course_offerings co2 ON co2.id = s2.course_offering_id
   WHERE a.student_id = NEW.student_id AND co2.cycle_id = v_cycle;
 
-  SELECT COUNT(*) INTO attended_classes
-  FROM attendance a
-  JOIN schedules s3 ON s3.id = a.schedule_id
-  JOIN course_offerings co3 ON co3.id = s3.course_offering_id
-  WHERE a.student_id = NEW.student_id AND co3.cycle_id = v_cycle AND a.status = 'presente';
-
   attendance_rate := (attended_classes::DECIMAL / total_classes::DECIMAL) * 100;
 
   INSERT INTO analytics_summary (student_id, cycle_id, attendance_pct, total_paid)
@@ -399,6 +468,64 @@ AFTER INSERT ON attendance
 FOR EACH ROW
 EXECUTE FUNCTION update_attendance_summary();
 
+CREATE TRIGGER trg_update_attendance_summary_on_update
+AFTER UPDATE OF status ON attendance
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION update_attendance_summary();
+
+-- Horarios: franja semanal en minutos desde el lunes 00:00, intervalo [inicio, fin)
+CREATE OR REPLACE FUNCTION schedule_week_slot(d day_of_week, t_start TIME, t_end TIME)
+RETURNS int4range AS $$
+  SELECT int4range(
+    (array_position(enum_range(NULL::day_of_week), d) - 1) * 1440
+      + (EXTRACT(EPOCH FROM t_start) / 60)::int,
+    (array_position(enum_range(NULL::day_of_week), d) - 1) * 1440
+      + (EXTRACT(EPOCH FROM t_end) / 60)::int
+  )
+$$ LANGUAGE sql STABLE;
+
+-- Copia ciclo y docente de la oferta y calcula la franja (usados por las restricciones de exclusión)
+CREATE OR REPLACE FUNCTION fill_schedule_slot()
+RETURNS TRIGGER AS $$
+BEGIN
+  SELECT co.cycle_id, co.teacher_id
+  INTO NEW.cycle_id, NEW.teacher_id
+  FROM course_offerings co
+  WHERE co.id = NEW.course_offering_id;
+
+  IF NEW.end_time > NEW.start_time THEN
+    NEW.week_slot := schedule_week_slot(NEW.day_of_week, NEW.start_time, NEW.end_time);
+  ELSE
+    NEW.week_slot := NULL;  -- chk_schedules_time_order rechaza la fila
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_fill_schedule_slot
+BEFORE INSERT OR UPDATE OF course_offering_id, day_of_week, start_time, end_time ON schedules
+FOR EACH ROW
+EXECUTE FUNCTION fill_schedule_slot();
+
+-- Si la oferta cambia de docente o ciclo, sus horarios se actualizan (y se revalidan)
+CREATE OR REPLACE FUNCTION sync_schedule_offering()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE schedules
+  SET cycle_id = NEW.cycle_id, teacher_id = NEW.teacher_id
+  WHERE course_offering_id = NEW.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_sync_schedule_offering
+AFTER UPDATE OF cycle_id, teacher_id ON course_offerings
+FOR EACH ROW
+WHEN (OLD.cycle_id IS DISTINCT FROM NEW.cycle_id OR OLD.teacher_id IS DISTINCT FROM NEW.teacher_id)
+EXECUTE FUNCTION sync_schedule_offering();
+
 -- Trigger para actualizar payment summary
 CREATE OR REPLACE FUNCTION update_payment_summary()
 RETURNS TRIGGER AS $$
@@ -1,7 +1,16 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from config.database import get_db_pool, close_db_pool
+from config.warmup import warm_up, readiness
+from middleware.timing import TimingMiddleware
+from utils.responses import AcademiaJSONResponse
+from utils.notifications import dispatcher, NOTIFICATION_DISPATCHER
+from utils.reminders import reminder_job, PAYMENT_REMINDERS
+from utils.revocation import revocation_sync
+import asyncio
+import asyncpg
 import os
 
 # Import routers
@@ -18,20 +27,56 @@ from routes import (
     admin
 )
 
-app = FastAPI(title="Academia API", version="2.0.0")
+# Health check budget: a probe must answer fast even when the DB does not
+HEALTH_TIMEOUT_S = float(os.getenv("HEALTH_TIMEOUT_S", "2"))
 
 # CORS - Configuración mejorada para desarrollo y producción
 # Obtener orígenes permitidos desde variable de entorno o usar defaults
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:3000,http://127.0.0.1:5173").split(",")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = await get_db_pool()
+    print("✓ Database pool created")
+    print(f"✓ CORS enabled for origins: {ALLOWED_ORIGINS}")
+    # Catalog reads on every pooled connection before taking traffic
+    await warm_up(pool)
+    # Drains the notifications_log outbox (set NOTIFICATION_DISPATCHER=0 to disable)
+    if NOTIFICATION_DISPATCHER:
+        await dispatcher.start(pool)
+    # Periodic payment-due reminders (PAYMENT_REMINDERS=0 to disable, e.g. when run from cron)
+    if PAYMENT_REMINDERS:
+        await reminder_job.start(pool)
+    # Revoked sessions, re-read from refresh_tokens by every worker
+    await revocation_sync.start(pool)
+    readiness["ready"] = True
+
+    yield
+
+    # Leave the load balancer rotation before tearing anything down
+    readiness["ready"] = False
+    await revocation_sync.stop()
+    await reminder_job.stop()
+    await dispatcher.stop()
+    await close_db_pool()
+    print("✓ Database pool closed")
+
+# orjson for every response (Decimal/date/datetime handled natively)
+app = FastAPI(title="Academia API", version="2.0.0", default_response_class=AcademiaJSONResponse,
+              lifespan=lifespan)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,  # Lista específica de orígenes permitidos
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-request wall/DB time, query count and pool wait (Server-Timing + /api/admin/metrics)
+app.add_middleware(TimingMiddleware)
+
 # Static files for uploads
 if os.path.exists("uploads"):
     app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
@@ -48,24 +93,27 @@ app.include_router(payments.router, prefix="/api")
 app.include_router(packages.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
 
-@app.on_event("startup")
-async def startup():
-    await get_db_pool()
-    print("✓ Database pool created")
-    print(f"✓ CORS enabled for origins: {ALLOWED_ORIGINS}")
-
-@app.on_event("shutdown")
-async def shutdown():
-    await close_db_pool()
-    print("✓ Database pool closed")
-
 @app.get("/")
 async def root():
     return {"message": "Academia API v2.0 - FastAPI", "status": "running"}
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    """Liveness: the process answers and the database is reachable"""
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire(timeout=HEALTH_TIMEOUT_S) as connection:
+            await connection.fetchval("SELECT 1", timeout=HEALTH_TIMEOUT_S)
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+        return AcademiaJSONResponse({"status": "unhealthy", "database": str(e)}, status_code=503)
+    return {"status": "healthy", "database": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: startup warm-up finished and not shutting down"""
+    if not readiness["ready"]:
+        return AcademiaJSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready", "warmup_ms": readiness["warmup_ms"]}
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,15 +1,60 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from utils.security import decode_token
-from config.database import get_db
+from utils.revocation import revocations
+from utils.metrics import InstrumentedConnection
+from config.database import get_db_pool
+from config.statements import STUDENT_PRINCIPAL, USER_PRINCIPAL
 import asyncpg
+import os
+import time
+
+# Every route whose require_role is strict re-checks the principal against
+# the database (through a short cache); AUTH_STRICT=1 makes all of them strict
+AUTH_STRICT = os.getenv("AUTH_STRICT", "0") == "1"
+PRINCIPAL_CACHE_TTL_S = float(os.getenv("PRINCIPAL_CACHE_TTL_S", "30"))
+PRINCIPAL_CACHE_SIZE = 10000
 
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: asyncpg.Connection = Depends(get_db)
-):
+async def load_principal(db: asyncpg.Connection, user_id: int, role: str):
+    """Current id/username/role/related_id of a token subject, or None"""
+    # If student, they might not be in users table
+    if role == "student":
+        student = await db.fetchrow(STUDENT_PRINCIPAL, user_id)
+        if student:
+            return {
+                "id": student['id'],
+                "username": student['dni'],
+                "role": "student",
+                "related_id": None
+            }
+    
+    # Otherwise check users table
+    user = await db.fetchrow(USER_PRINCIPAL, user_id)
+    return dict(user) if user else None
+
+_principal_cache = {}
+
+async def cached_principal(user_id: int, role: str):
+    """load_principal on its own pooled connection, cached for
+    PRINCIPAL_CACHE_TTL_S (a deleted user or changed role shows up then)"""
+    key = (user_id, role)
+    cached = _principal_cache.get(key)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        principal = await load_principal(InstrumentedConnection(conn), user_id, role)
+    if len(_principal_cache) >= PRINCIPAL_CACHE_SIZE:
+        _principal_cache.clear()
+    _principal_cache[key] = (principal, time.monotonic() + PRINCIPAL_CACHE_TTL_S)
+    return principal
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Principal from the token claims. No database connection is taken
+    here, so routes that do not need one never touch the pool."""
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -28,25 +73,23 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
-    # If student, they might not be in users table
-    if role == "student":
-        student = await db.fetchrow(
-            "SELECT id, dni FROM students WHERE id = $1",
-            user_id
-        )
-        if student:
-            return {
-                "id": student['id'],
-                "username": student['dni'],
-                "role": "student",
-                "related_id": None
-            }
+    # Session tokens carry the principal: no DB lookup, only the revocation list
+    sid = payload.get("sid")
+    if sid is not None:
+        if revocations.is_revoked(sid):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Session revoked"
+            )
+        return {
+            "id": user_id,
+            "username": payload.get("username"),
+            "role": role,
+            "related_id": payload.get("related_id")
+        }
     
-    # Otherwise check users table
-    user = await db.fetchrow(
-        "SELECT id, username, role, related_id FROM users WHERE id = $1",
-        user_id
-    )
+    # Older tokens without claims
+    user = await cached_principal(user_id, role)
     
     if user is None:
         raise HTTPException(
@@ -54,10 +97,20 @@ async def get_current_user(
             detail="User not found"
         )
     
-    return dict(user)
+    return user
 
-def require_role(allowed_roles: list):
-    def role_checker(current_user: dict = Depends(get_current_user)):
+def require_role(allowed_roles: list, strict: bool = False):
+    """Authorizes from the token claims. strict=True (sensitive admin
+    routes) also checks that the user still exists with the same role."""
+    async def role_checker(current_user: dict = Depends(get_current_user)):
+        if strict or AUTH_STRICT:
+            principal = await cached_principal(current_user["id"], current_user["role"])
+            if principal is None or principal["role"] != current_user["role"]:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+            current_user = principal
         if current_user["role"] not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
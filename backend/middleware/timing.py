@@ -0,0 +1,52 @@
+from utils.metrics import start_request, histogram, SLOW_REQUEST_MS, SLOW_REQUEST_QUERIES
+
+
+class TimingMiddleware:
+    """ASGI middleware that measures wall time, DB time, query count and
+    pool-acquire wait per request.
+
+    The numbers are sent back as a Server-Timing header, aggregated in the
+    rolling histogram exposed at /api/admin/metrics and printed when the
+    request goes over budget.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                server_timing = (
+                    f"app;dur={stats.wall_time * 1000:.1f}, "
+                    f"db;dur={stats.db_time * 1000:.1f};desc=\"{stats.query_count} queries\", "
+                    f"pool;dur={stats.acquire_wait * 1000:.1f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            wall_ms = stats.wall_time * 1000
+            route = scope.get("route")
+            endpoint = f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+            histogram.add(endpoint, wall_ms, stats.db_time * 1000, stats.query_count,
+                          stats.acquire_wait * 1000, status_code)
+
+            if wall_ms > SLOW_REQUEST_MS or stats.query_count > SLOW_REQUEST_QUERIES:
+                print(
+                    f"⚠ Slow request: {scope['method']} {scope['path']} -> {status_code} "
+                    f"wall={wall_ms:.1f}ms db={stats.db_time * 1000:.1f}ms "
+                    f"queries={stats.query_count} pool_wait={stats.acquire_wait * 1000:.1f}ms"
+                )
@@ -0,0 +1,16 @@
+-- ===========================================================
+-- 001: Clave única de asistencia (student_id, schedule_id, date)
+-- Necesaria para el registro masivo con INSERT ... ON CONFLICT.
+-- Antes de crear el índice se eliminan las marcas duplicadas,
+-- conservando la más reciente (id mayor) de cada grupo.
+-- ===========================================================
+
+DELETE FROM attendance a
+USING attendance b
+WHERE a.student_id = b.student_id
+  AND a.schedule_id = b.schedule_id
+  AND a.date = b.date
+  AND a.id < b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_student_schedule_date
+  ON attendance(student_id, schedule_id, date);
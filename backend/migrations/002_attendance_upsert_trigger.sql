@@ -0,0 +1,59 @@
+-- ===========================================================
+-- 002: Asistencia con upsert nativo
+-- Las marcas duplicadas se eliminan en 001 (clave única). Aquí:
+--  * el trigger de resumen también se dispara al corregir el estado,
+--    para que INSERT ... ON CONFLICT DO UPDATE se refleje en analytics;
+--  * se recalcula attendance_pct, que estaba inflado por los duplicados.
+-- ===========================================================
+
+CREATE OR REPLACE FUNCTION update_attendance_summary()
+RETURNS TRIGGER AS $$
+DECLARE
+  total_classes INT;
+  attended_classes INT;
+  attendance_rate DECIMAL(5,2);
+  v_cycle INT;
+BEGIN
+  SELECT co.cycle_id INTO v_cycle
+  FROM schedules s
+  JOIN course_offerings co ON co.id = s.course_offering_id
+  WHERE s.id = NEW.schedule_id
+  LIMIT 1;
+
+  SELECT COUNT(*), COUNT(*) FILTER (WHERE a.status = 'presente')
+  INTO total_classes, attended_classes
+  FROM attendance a
+  JOIN schedules s2 ON s2.id = a.schedule_id
+  JOIN course_offerings co2 ON co2.id = s2.course_offering_id
+  WHERE a.student_id = NEW.student_id AND co2.cycle_id = v_cycle;
+
+  attendance_rate := (attended_classes::DECIMAL / total_classes::DECIMAL) * 100;
+
+  INSERT INTO analytics_summary (student_id, cycle_id, attendance_pct, total_paid)
+  VALUES (NEW.student_id, v_cycle, attendance_rate, 0)
+  ON CONFLICT (student_id, cycle_id)
+  DO UPDATE SET attendance_pct = attendance_rate, updated_at = CURRENT_TIMESTAMP;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_update_attendance_summary_on_update ON attendance;
+
+CREATE TRIGGER trg_update_attendance_summary_on_update
+AFTER UPDATE OF status ON attendance
+FOR EACH ROW
+WHEN (OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION update_attendance_summary();
+
+UPDATE analytics_summary a
+SET attendance_pct = r.pct
+FROM (
+  SELECT at.student_id, co.cycle_id,
+         ROUND(100.0 * COUNT(*) FILTER (WHERE at.status = 'presente') / COUNT(*), 2) AS pct
+  FROM attendance at
+  JOIN schedules s ON s.id = at.schedule_id
+  JOIN course_offerings co ON co.id = s.course_offering_id
+  GROUP BY at.student_id, co.cycle_id
+) r
+WHERE a.student_id = r.student_id AND a.cycle_id = r.cycle_id;
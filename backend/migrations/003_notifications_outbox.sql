@@ -0,0 +1,15 @@
+-- ===========================================================
+-- 003: notifications_log como cola de salida (outbox)
+-- Las notificaciones se insertan como 'pending' dentro de la transacción
+-- de la petición y un despachador en segundo plano las envía con
+-- reintentos y espera exponencial.
+-- ===========================================================
+
+ALTER TABLE notifications_log ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0;
+ALTER TABLE notifications_log ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE notifications_log ADD COLUMN IF NOT EXISTS last_error TEXT;
+
+UPDATE notifications_log SET next_attempt_at = sent_at WHERE next_attempt_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_notifications_pending
+  ON notifications_log(next_attempt_at) WHERE status = 'pending';
@@ -0,0 +1,11 @@
+-- ===========================================================
+-- 004: Índices para el job de recordatorios de pago
+--  * cuotas impagas ordenadas por vencimiento (índice parcial);
+--  * notificaciones por alumno y tipo, para no repetir avisos recientes.
+-- ===========================================================
+
+CREATE INDEX IF NOT EXISTS idx_installments_unpaid_due
+  ON installments(due_date) WHERE status IN ('pending', 'overdue');
+
+CREATE INDEX IF NOT EXISTS idx_notifications_student_type_sent
+  ON notifications_log(student_id, type, sent_at);
@@ -0,0 +1,89 @@
+-- ===========================================================
+-- 005: Conflictos de horario con restricciones de exclusión
+-- Cada horario guarda su ciclo, su docente y su franja semanal
+-- (int4range en minutos desde el lunes). Con btree_gist, Postgres rechaza
+-- dos clases que se cruzan en la misma aula o con el mismo docente.
+--
+-- Si la base ya tiene cruces, la migración falla al crear la restricción.
+-- Para listarlos (después de ejecutar hasta el backfill):
+--   SELECT a.id, b.id FROM schedules a JOIN schedules b
+--     ON a.id < b.id AND a.cycle_id = b.cycle_id AND a.week_slot && b.week_slot
+--    AND (a.classroom = b.classroom OR a.teacher_id = b.teacher_id);
+-- ===========================================================
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS cycle_id INT;
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS teacher_id INT;
+ALTER TABLE schedules ADD COLUMN IF NOT EXISTS week_slot int4range;
+
+CREATE OR REPLACE FUNCTION schedule_week_slot(d day_of_week, t_start TIME, t_end TIME)
+RETURNS int4range AS $$
+  SELECT int4range(
+    (array_position(enum_range(NULL::day_of_week), d) - 1) * 1440
+      + (EXTRACT(EPOCH FROM t_start) / 60)::int,
+    (array_position(enum_range(NULL::day_of_week), d) - 1) * 1440
+      + (EXTRACT(EPOCH FROM t_end) / 60)::int
+  )
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION fill_schedule_slot()
+RETURNS TRIGGER AS $$
+BEGIN
+  SELECT co.cycle_id, co.teacher_id
+  INTO NEW.cycle_id, NEW.teacher_id
+  FROM course_offerings co
+  WHERE co.id = NEW.course_offering_id;
+
+  IF NEW.end_time > NEW.start_time THEN
+    NEW.week_slot := schedule_week_slot(NEW.day_of_week, NEW.start_time, NEW.end_time);
+  ELSE
+    NEW.week_slot := NULL;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fill_schedule_slot ON schedules;
+CREATE TRIGGER trg_fill_schedule_slot
+BEFORE INSERT OR UPDATE OF course_offering_id, day_of_week, start_time, end_time ON schedules
+FOR EACH ROW
+EXECUTE FUNCTION fill_schedule_slot();
+
+CREATE OR REPLACE FUNCTION sync_schedule_offering()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE schedules
+  SET cycle_id = NEW.cycle_id, teacher_id = NEW.teacher_id
+  WHERE course_offering_id = NEW.id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sync_schedule_offering ON course_offerings;
+CREATE TRIGGER trg_sync_schedule_offering
+AFTER UPDATE OF cycle_id, teacher_id ON course_offerings
+FOR EACH ROW
+WHEN (OLD.cycle_id IS DISTINCT FROM NEW.cycle_id OR OLD.teacher_id IS DISTINCT FROM NEW.teacher_id)
+EXECUTE FUNCTION sync_schedule_offering();
+
+-- Backfill: tocar start_time dispara trg_fill_schedule_slot en cada fila
+UPDATE schedules SET start_time = start_time;
+
+CREATE INDEX IF NOT EXISTS idx_schedules_offering ON schedules(course_offering_id);
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'chk_schedules_time_order') THEN
+    ALTER TABLE schedules ADD CONSTRAINT chk_schedules_time_order CHECK (end_time > start_time);
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ex_schedules_classroom') THEN
+    ALTER TABLE schedules ADD CONSTRAINT ex_schedules_classroom EXCLUDE USING gist
+      (cycle_id WITH =, classroom WITH =, week_slot WITH &&) WHERE (classroom IS NOT NULL);
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'ex_schedules_teacher') THEN
+    ALTER TABLE schedules ADD CONSTRAINT ex_schedules_teacher EXCLUDE USING gist
+      (cycle_id WITH =, teacher_id WITH =, week_slot WITH &&) WHERE (teacher_id IS NOT NULL);
+  END IF;
+END $$;
@@ -0,0 +1,27 @@
+-- ===========================================================
+-- 006: Búsqueda de estudiantes, docentes y matrículas
+-- search_norm() une los campos y los pasa a minúsculas sin tildes
+-- ("Pérez" = "perez"). Sobre esa expresión hay dos índices GIN:
+-- trigramas (subcadenas y búsqueda difusa) y tsvector (prefijos por
+-- palabra, en cualquier orden). Las consultas deben usar exactamente
+-- la misma expresión para que Postgres use los índices.
+-- ===========================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() es STABLE; con el diccionario explícito se puede declarar IMMUTABLE
+CREATE OR REPLACE FUNCTION search_norm(VARIADIC parts TEXT[])
+RETURNS TEXT AS $$
+  SELECT lower(public.unaccent('public.unaccent'::regdictionary, array_to_string(parts, ' ')))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_students_search_trgm ON students
+  USING gin (search_norm(dni, first_name, last_name, parent_name, phone, parent_phone) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_students_search_fts ON students
+  USING gin (to_tsvector('simple', search_norm(dni, first_name, last_name, parent_name, phone, parent_phone)));
+
+CREATE INDEX IF NOT EXISTS idx_teachers_search_trgm ON teachers
+  USING gin (search_norm(dni, first_name, last_name, email, phone, specialization) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_teachers_search_fts ON teachers
+  USING gin (to_tsvector('simple', search_norm(dni, first_name, last_name, email, phone, specialization)));
@@ -0,0 +1,23 @@
+-- ===========================================================
+-- 007: Refresh tokens rotativos
+-- Solo se guarda el SHA-256 del token. Cada uso lo marca como rotado y
+-- emite otro de la misma sesión; si un token rotado se vuelve a usar,
+-- se revoca la sesión completa (sus access tokens dejan de valer).
+-- ===========================================================
+
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+  id BIGSERIAL PRIMARY KEY,
+  token_hash CHAR(64) NOT NULL UNIQUE,
+  session_id UUID NOT NULL,
+  subject_id INT NOT NULL,
+  role user_role NOT NULL,
+  expires_at TIMESTAMP NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  rotated_at TIMESTAMP NULL,
+  revoked_at TIMESTAMP NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_session ON refresh_tokens(session_id);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_revoked
+  ON refresh_tokens(revoked_at) WHERE revoked_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens(expires_at);
@@ -0,0 +1,12 @@
+-- ===========================================================
+-- 008: Límite de intentos de login compartido entre réplicas
+-- Solo se usa con LOGIN_RATE_STORE=postgres. UNLOGGED: si se pierde
+-- tras una caída, los buckets simplemente empiezan llenos.
+-- ===========================================================
+
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+  key VARCHAR(120) PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  allowed BOOLEAN NOT NULL DEFAULT true,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -1,6 +1,28 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import date
+import re
+from pydantic import BaseModel, BeforeValidator, AfterValidator, model_validator
+from typing import Optional, List, Annotated
+from datetime import date, time
+
+DAYS_OF_WEEK = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*$")
+
+def _parse_time(value):
+    """H:MM, HH:MM and HH:MM:SS strings; anything else is left to pydantic"""
+    if isinstance(value, str):
+        match = _TIME_RE.match(value)
+        if match:
+            h, m, s = match.groups()
+            return time(int(h), int(m), int(s or 0))
+    return value
+
+def _check_day(value: str) -> str:
+    if value not in DAYS_OF_WEEK:
+        raise ValueError(f"day_of_week debe ser uno de: {', '.join(DAYS_OF_WEEK)}")
+    return value
+
+ScheduleTime = Annotated[time, BeforeValidator(_parse_time)]
+DayOfWeek = Annotated[str, AfterValidator(_check_day)]
 
 class CourseCreate(BaseModel):
     name: str
@@ -28,13 +50,29 @@ class CourseOfferingUpdate(BaseModel):
 
 class ScheduleCreate(BaseModel):
     course_offering_id: int
-    day_of_week: str
-    start_time: str
-    end_time: str
+    day_of_week: DayOfWeek
+    start_time: ScheduleTime
+    end_time: ScheduleTime
     classroom: Optional[str] = None
 
+    @model_validator(mode="after")
+    def check_time_order(self):
+        if self.end_time <= self.start_time:
+            raise ValueError("La hora de fin debe ser posterior a la hora de inicio")
+        return self
+
 class ScheduleUpdate(BaseModel):
-    day_of_week: Optional[str] = None
-    start_time: Optional[str] = None
-    end_time: Optional[str] = None
+    day_of_week: Optional[DayOfWeek] = None
+    start_time: Optional[ScheduleTime] = None
+    end_time: Optional[ScheduleTime] = None
     classroom: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_time_order(self):
+        # With only one bound sent, the controller checks it against the stored one
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValueError("La hora de fin debe ser posterior a la hora de inicio")
+        return self
+
+class ScheduleBulkCreate(BaseModel):
+    schedules: List[ScheduleCreate]
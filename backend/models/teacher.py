@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+import datetime
 
 class TeacherCreate(BaseModel):
     first_name: str
@@ -30,3 +31,12 @@ class AttendanceCreate(BaseModel):
     schedule_id: int
     student_id: int
     status: str
+
+class RosterEntry(BaseModel):
+    student_id: int
+    status: str
+
+class AttendanceRoster(BaseModel):
+    schedule_id: int
+    date: Optional[datetime.date] = None  # defaults to today
+    records: List[RosterEntry]
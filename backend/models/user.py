@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import date
 
@@ -11,9 +11,13 @@ class UserCreate(UserBase):
     related_id: Optional[int] = None
 
 class UserLogin(BaseModel):
-    dni: str
+    # DNI or username (users.username is VARCHAR(50))
+    dni: str = Field(max_length=50)
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class UserResponse(BaseModel):
     id: int
     username: str
@@ -22,4 +26,5 @@ class UserResponse(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
+    refresh_token: str
     user: UserResponse
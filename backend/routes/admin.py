@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import date
 from middleware.auth import require_role
 from config.database import get_db
 import asyncpg
 import controllers.adminController as adminController
+import controllers.exportController as exportController
+from utils.metrics import get_metrics_snapshot, histogram
+from utils.query_log import query_log
+from utils.responses import json_response, list_response, PG_JSON_LISTS
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/dashboard", dependencies=[Depends(require_role(["admin"]))])
 async def get_dashboard(db: asyncpg.Connection = Depends(get_db)):
-    return await adminController.get_dashboard_data(db)
+    return list_response(await adminController.get_dashboard_data(db, as_json=PG_JSON_LISTS))
 
 @router.get("/analytics", dependencies=[Depends(require_role(["admin"]))])
 async def get_analytics(
@@ -16,7 +22,7 @@ async def get_analytics(
     student_id: int = None,
     db: asyncpg.Connection = Depends(get_db)
 ):
-    return await adminController.get_analytics(cycle_id, student_id, db)
+    return json_response(await adminController.get_analytics(cycle_id, student_id, db))
 
 @router.get("/notifications", dependencies=[Depends(require_role(["admin"]))])
 async def get_notifications(
@@ -27,6 +33,54 @@ async def get_notifications(
 ):
     return await adminController.get_notifications(student_id, type, limit, db)
 
+@router.get("/search", dependencies=[Depends(require_role(["admin"]))])
+async def search(q: str, scope: str = "students", limit: int = 20, db: asyncpg.Connection = Depends(get_db)):
+    result = await adminController.search(q, scope, limit, db)
+    if isinstance(result, dict) and "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return json_response(result)
+
+@router.get("/export/{dataset}", dependencies=[Depends(require_role(["admin"], strict=True))])
+async def export_dataset(dataset: str, format: str = "csv", cycle_id: int = None):
+    """Streams enrollments, installments or attendance as CSV or XLSX"""
+    if dataset not in exportController.EXPORTS:
+        raise HTTPException(status_code=404, detail="Exportación no encontrada")
+    if format == "csv":
+        body = exportController.stream_csv(dataset, cycle_id)
+        media_type = "text/csv; charset=utf-8"
+    elif format == "xlsx":
+        body = exportController.stream_xlsx(dataset, cycle_id)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        raise HTTPException(status_code=400, detail="format debe ser csv o xlsx")
+    
+    suffix = f"_ciclo{cycle_id}" if cycle_id else ""
+    filename = f"{dataset}{suffix}_{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/stats", dependencies=[Depends(require_role(["admin"]))])
 async def get_stats(db: asyncpg.Connection = Depends(get_db)):
     return await adminController.get_general_stats(db)
+
+@router.get("/metrics", dependencies=[Depends(require_role(["admin"]))])
+async def get_metrics():
+    return get_metrics_snapshot()
+
+@router.delete("/metrics", dependencies=[Depends(require_role(["admin"]))])
+async def reset_metrics():
+    histogram.reset()
+    return {"message": "Métricas reiniciadas"}
+
+@router.get("/query-log", dependencies=[Depends(require_role(["admin"]))])
+async def get_query_log(order_by: str = "total_ms", limit: int = 100):
+    if order_by not in ("total_ms", "max_ms", "count", "slow_count"):
+        raise HTTPException(status_code=400, detail="order_by inválido")
+    return query_log.snapshot(order_by, limit)
+
+@router.delete("/query-log", dependencies=[Depends(require_role(["admin"]))])
+async def reset_query_log():
+    query_log.reset()
+    return {"message": "Registro de consultas reiniciado"}
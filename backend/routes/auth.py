@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from models.student import StudentCreate
-from models.user import UserLogin
+from models.user import UserLogin, RefreshRequest
 from config.database import get_db
 import asyncpg
+import math
 import controllers.authController as authController
+from utils.rate_limit import login_limiter
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -15,8 +17,33 @@ async def register(user: StudentCreate, db: asyncpg.Connection = Depends(get_db)
     return result
 
 @router.post("/login")
-async def login(credentials: UserLogin, db: asyncpg.Connection = Depends(get_db)):
+async def login(credentials: UserLogin, request: Request, db: asyncpg.Connection = Depends(get_db)):
+    # Throttled per IP and per DNI before any password hashing. Behind a proxy
+    # the client IP comes from X-Forwarded-For (FORWARDED_ALLOW_IPS in gunicorn.conf.py)
+    ip = request.client.host if request.client else "unknown"
+    wait = await login_limiter.check(credentials.dni, ip, db)
+    if wait is not None:
+        retry_after = max(1, math.ceil(wait))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Demasiados intentos de inicio de sesión. Intenta de nuevo en {retry_after} s",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
     result = await authController.login_user(credentials, db)
     if "error" in result:
         raise HTTPException(status_code=401, detail=result["error"])
     return result
+
+@router.post("/refresh")
+async def refresh(data: RefreshRequest, db: asyncpg.Connection = Depends(get_db)):
+    """New access token + rotated refresh token"""
+    result = await authController.refresh_session(data.refresh_token, db)
+    if "error" in result:
+        raise HTTPException(status_code=401, detail=result["error"])
+    return result
+
+@router.post("/logout")
+async def logout(data: RefreshRequest, db: asyncpg.Connection = Depends(get_db)):
+    """Revokes the session: its refresh token and every access token issued for it"""
+    return await authController.logout(data.refresh_token, db)
@@ -33,7 +33,10 @@ async def create_offering(offering: CourseOfferingCreate, db: asyncpg.Connection
 
 @router.put("/offerings/{offering_id}", dependencies=[Depends(require_role(["admin"]))])
 async def update_offering(offering_id: int, offering: CourseOfferingUpdate, db: asyncpg.Connection = Depends(get_db)):
-    return await courseController.update_course_offering(offering_id, offering, db)
+    result = await courseController.update_course_offering(offering_id, offering, db)
+    if "error" in result:
+        raise HTTPException(status_code=409, detail=result["error"])
+    return result
 
 @router.delete("/offerings/{offering_id}", dependencies=[Depends(require_role(["admin"]))])
 async def delete_offering(offering_id: int, db: asyncpg.Connection = Depends(get_db)):
@@ -4,6 +4,7 @@ from middleware.auth import get_current_user, require_role
 from config.database import get_db
 import asyncpg
 import controllers.enrollmentController as enrollmentController
+from utils.responses import list_response, PG_JSON_LISTS
 
 router = APIRouter(prefix="/enrollments", tags=["enrollments"])
 
@@ -49,7 +50,7 @@ async def create_enrollment(
     
     result = await enrollmentController.create_enrollment(student_id, enrollment, db)
     if "error" in result:
-        raise HTTPException(status_code=400, detail=result["error"])
+        raise HTTPException(status_code=409 if "conflicts" in result else 400, detail=result["error"])
     return result
 
 @router.put("/status", dependencies=[Depends(require_role(["admin"]))])
@@ -81,7 +82,7 @@ async def cancel_enrollment(
 
 @router.get("/admin", dependencies=[Depends(require_role(["admin"]))])
 async def get_admin_enrollments(db: asyncpg.Connection = Depends(get_db)):
-    return await enrollmentController.get_admin_enrollments(db)
+    return list_response(await enrollmentController.get_admin_enrollments(db, as_json=PG_JSON_LISTS))
 
 @router.delete("/{enrollment_id}", dependencies=[Depends(require_role(["admin"]))])
 async def delete_enrollment(enrollment_id: int, db: asyncpg.Connection = Depends(get_db)):
@@ -3,13 +3,14 @@ from middleware.auth import require_role, get_current_user
 from config.database import get_db
 import asyncpg
 import controllers.paymentController as paymentController
+from utils.responses import list_response, PG_JSON_LISTS
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
 # Get all installments with optional status filter (like Node.js)
 @router.get("", dependencies=[Depends(require_role(["admin"]))])
 async def get_payments(status: str = None, db: asyncpg.Connection = Depends(get_db)):
-    return await paymentController.get_all_installments(status, db)
+    return list_response(await paymentController.get_all_installments(status, db, as_json=PG_JSON_LISTS))
 
 @router.get("/pending", dependencies=[Depends(require_role(["admin"]))])
 async def get_pending(db: asyncpg.Connection = Depends(get_db)):
@@ -56,7 +57,7 @@ async def upload_voucher_alt(
     return result
 
 # Approve installment (like Node.js)
-@router.post("/approve", dependencies=[Depends(require_role(["admin"]))])
+@router.post("/approve", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def approve_post(data: dict, db: asyncpg.Connection = Depends(get_db)):
     installment_id = data.get("installment_id")
     if not installment_id:
@@ -67,7 +68,7 @@ async def approve_post(data: dict, db: asyncpg.Connection = Depends(get_db)):
     return result
 
 # Reject installment (like Node.js)
-@router.post("/reject", dependencies=[Depends(require_role(["admin"]))])
+@router.post("/reject", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def reject_post(data: dict, db: asyncpg.Connection = Depends(get_db)):
     installment_id = data.get("installment_id")
     reason = data.get("reason")
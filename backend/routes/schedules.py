@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from models.course import ScheduleCreate, ScheduleUpdate
-from middleware.auth import require_role
+from models.course import ScheduleCreate, ScheduleUpdate, ScheduleBulkCreate
+from middleware.auth import get_current_user, require_role
 from config.database import get_db
 import asyncpg
 import controllers.scheduleController as scheduleController
@@ -11,7 +11,52 @@ router = APIRouter(prefix="/schedules", tags=["schedules"])
 async def create_schedule(schedule: ScheduleCreate, db: asyncpg.Connection = Depends(get_db)):
     if not schedule.course_offering_id:
         raise HTTPException(status_code=400, detail="course_offering_id es requerido")
-    return await scheduleController.create_schedule(schedule, db)
+    result = await scheduleController.create_schedule(schedule, db)
+    if "error" in result:
+        raise HTTPException(status_code=409 if "conflicts" in result else 400, detail=result["error"])
+    return result
+
+@router.post("/bulk", dependencies=[Depends(require_role(["admin"]))], status_code=status.HTTP_201_CREATED)
+async def create_schedules_bulk(data: ScheduleBulkCreate, db: asyncpg.Connection = Depends(get_db)):
+    """Create a cycle's whole timetable in one call (all or nothing)"""
+    if not data.schedules:
+        raise HTTPException(status_code=400, detail="No se enviaron horarios")
+    if len(data.schedules) > scheduleController.MAX_BULK_SCHEDULES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {scheduleController.MAX_BULK_SCHEDULES} horarios por solicitud"
+        )
+    result = await scheduleController.create_schedules_bulk(data, db)
+    if "error" in result:
+        raise HTTPException(status_code=409 if "conflicts" in result else 400, detail=result["error"])
+    return result
+
+@router.get("/timetable")
+async def get_timetable(
+    cycle_id: int = None,
+    student_id: int = None,
+    teacher_id: int = None,
+    classroom: str = None,
+    current_user: dict = Depends(get_current_user),
+    db: asyncpg.Connection = Depends(get_db)
+):
+    """Weekly timetable for one student, teacher or classroom"""
+    if current_user["role"] == "student":
+        # Students only see their own timetable
+        student_id, teacher_id, classroom = current_user["id"], None, None
+    elif current_user["role"] == "teacher":
+        if student_id is not None:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        if teacher_id is None and classroom is None:
+            teacher_id = current_user.get("related_id")
+    
+    if sum(x is not None for x in (student_id, teacher_id, classroom)) != 1:
+        raise HTTPException(status_code=400, detail="Indique solo uno: student_id, teacher_id o classroom")
+    
+    result = await scheduleController.get_timetable(cycle_id, student_id, teacher_id, classroom, db)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
 
 # Support both naming conventions
 @router.get("/course-offering/{course_offering_id}")
@@ -29,7 +74,12 @@ async def get_schedules_by_package(package_offering_id: int, db: asyncpg.Connect
 
 @router.put("/{schedule_id}", dependencies=[Depends(require_role(["admin"]))])
 async def update_schedule(schedule_id: int, schedule: ScheduleUpdate, db: asyncpg.Connection = Depends(get_db)):
-    return await scheduleController.update_schedule(schedule_id, schedule, db)
+    result = await scheduleController.update_schedule(schedule_id, schedule, db)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Horario no encontrado")
+    if "error" in result:
+        raise HTTPException(status_code=409 if "conflicts" in result else 400, detail=result["error"])
+    return result
 
 @router.delete("/{schedule_id}", dependencies=[Depends(require_role(["admin"]))])
 async def delete_schedule(schedule_id: int, db: asyncpg.Connection = Depends(get_db)):
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from models.student import StudentCreate, StudentUpdate
 from middleware.auth import require_role
 from config.database import get_db
@@ -9,13 +9,13 @@ router = APIRouter(prefix="/students", tags=["students"])
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_student(student: StudentCreate, db: asyncpg.Connection = Depends(get_db)):
-    from utils.security import create_access_token
+    from controllers.authController import issue_session
     
     result = await studentController.create_student(student, db)
-    token = create_access_token({"id": result['id'], "role": "student"})
+    session = await issue_session({"id": result['id'], "username": student.dni, "role": "student"}, db)
     
     return {
-        "token": token,
+        **session,
         "user": {
             "id": result['id'],
             "role": "student",
@@ -24,6 +24,14 @@ async def register_student(student: StudentCreate, db: asyncpg.Connection = Depe
         }
     }
 
+@router.post("/import", dependencies=[Depends(require_role(["admin"], strict=True))])
+async def import_students(file: UploadFile = File(...), db: asyncpg.Connection = Depends(get_db)):
+    """CSV with header dni,first_name,last_name,phone,parent_name,parent_phone,password"""
+    result = await studentController.import_students(file, db)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
 @router.get("", dependencies=[Depends(require_role(["admin"]))])
 async def get_students(db: asyncpg.Connection = Depends(get_db)):
     return await studentController.get_all_students(db)
@@ -35,10 +43,10 @@ async def get_student(student_id: int, db: asyncpg.Connection = Depends(get_db))
         raise HTTPException(status_code=404, detail="Estudiante no encontrado")
     return student
 
-@router.put("/{student_id}", dependencies=[Depends(require_role(["admin"]))])
+@router.put("/{student_id}", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def update_student(student_id: int, student: StudentUpdate, db: asyncpg.Connection = Depends(get_db)):
     return await studentController.update_student(student_id, student, db)
 
-@router.delete("/{student_id}", dependencies=[Depends(require_role(["admin"]))])
+@router.delete("/{student_id}", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def delete_student(student_id: int, db: asyncpg.Connection = Depends(get_db)):
     return await studentController.delete_student(student_id, db)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from models.teacher import TeacherCreate, TeacherUpdate, AttendanceCreate
+from models.teacher import TeacherCreate, TeacherUpdate, AttendanceCreate, AttendanceRoster
 from middleware.auth import require_role, get_current_user
 from config.database import get_db
 import asyncpg
@@ -18,19 +18,19 @@ async def get_teacher(teacher_id: int, db: asyncpg.Connection = Depends(get_db))
         raise HTTPException(status_code=404, detail="Docente no encontrado")
     return teacher
 
-@router.post("", dependencies=[Depends(require_role(["admin"]))], status_code=status.HTTP_201_CREATED)
+@router.post("", dependencies=[Depends(require_role(["admin"], strict=True))], status_code=status.HTTP_201_CREATED)
 async def create_teacher(teacher: TeacherCreate, db: asyncpg.Connection = Depends(get_db)):
     return await teacherController.create_teacher(teacher, db)
 
-@router.put("/{teacher_id}", dependencies=[Depends(require_role(["admin"]))])
+@router.put("/{teacher_id}", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def update_teacher(teacher_id: int, teacher: TeacherUpdate, db: asyncpg.Connection = Depends(get_db)):
     return await teacherController.update_teacher(teacher_id, teacher, db)
 
-@router.delete("/{teacher_id}", dependencies=[Depends(require_role(["admin"]))])
+@router.delete("/{teacher_id}", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def delete_teacher(teacher_id: int, db: asyncpg.Connection = Depends(get_db)):
     return await teacherController.delete_teacher(teacher_id, db)
 
-@router.post("/{teacher_id}/reset-password", dependencies=[Depends(require_role(["admin"]))])
+@router.post("/{teacher_id}/reset-password", dependencies=[Depends(require_role(["admin"], strict=True))])
 async def reset_password(teacher_id: int, db: asyncpg.Connection = Depends(get_db)):
     result = await teacherController.reset_teacher_password(teacher_id, db)
     if not result:
@@ -41,6 +41,11 @@ async def reset_password(teacher_id: int, db: asyncpg.Connection = Depends(get_d
 async def get_teacher_students(teacher_id: int, db: asyncpg.Connection = Depends(get_db)):
     return await teacherController.get_teacher_students(teacher_id, db)
 
+def ensure_own_teacher(teacher_id: int, current_user: dict):
+    """A teacher may only act as themselves: the path id must be their own"""
+    if current_user.get("role") == "teacher" and current_user.get("related_id") != teacher_id:
+        raise HTTPException(status_code=403, detail="No autorizado para este docente")
+
 @router.post("/{teacher_id}/attendance", dependencies=[Depends(require_role(["teacher"]))])
 async def mark_attendance(
     teacher_id: int,
@@ -48,9 +53,33 @@ async def mark_attendance(
     current_user: dict = Depends(get_current_user),
     db: asyncpg.Connection = Depends(get_db)
 ):
+    ensure_own_teacher(teacher_id, current_user)
     result = await teacherController.mark_attendance(teacher_id, attendance, db)
     if result and "error" in result:
         raise HTTPException(status_code=403, detail=result["error"])
     if not result:
         raise HTTPException(status_code=403, detail="No autorizado para este horario")
     return result
+
+@router.post("/{teacher_id}/attendance/roster", dependencies=[Depends(require_role(["teacher"]))])
+async def mark_roster_attendance(
+    teacher_id: int,
+    roster: AttendanceRoster,
+    current_user: dict = Depends(get_current_user),
+    db: asyncpg.Connection = Depends(get_db)
+):
+    """Mark attendance for a whole class in a single call"""
+    ensure_own_teacher(teacher_id, current_user)
+    if not roster.records:
+        raise HTTPException(status_code=400, detail="La lista de asistencia está vacía")
+    
+    invalid = {r.status for r in roster.records} - set(teacherController.ATTENDANCE_STATUSES)
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Estado de asistencia inválido: {', '.join(sorted(invalid))}")
+    
+    result = await teacherController.mark_roster_attendance(teacher_id, roster, db)
+    if "not_enrolled" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    if "error" in result:
+        raise HTTPException(status_code=403, detail=result["error"])
+    return result
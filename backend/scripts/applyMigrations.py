@@ -0,0 +1,53 @@
+import asyncio
+import asyncpg
+import sys
+import os
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / 'migrations'
+
+async def apply_migrations():
+    conn = await asyncpg.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'academia_final'),
+        port=int(os.getenv('DB_PORT', '5432'))
+    )
+    
+    print('🔧 Aplicando migraciones...\n')
+    
+    await conn.execute(
+        """CREATE TABLE IF NOT EXISTS schema_migrations (
+             name VARCHAR(255) PRIMARY KEY,
+             applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+           )"""
+    )
+    applied = {r['name'] for r in await conn.fetch('SELECT name FROM schema_migrations')}
+    
+    pending = [f for f in sorted(MIGRATIONS_DIR.glob('*.sql')) if f.name not in applied]
+    if not pending:
+        print('✅ La base de datos está al día')
+    
+    for migration in pending:
+        sql = migration.read_text(encoding='utf-8')
+        try:
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute('INSERT INTO schema_migrations (name) VALUES ($1)', migration.name)
+            print(f'✅ {migration.name}')
+        except Exception as e:
+            print(f'✗ Error en {migration.name}: {e}')
+            break
+    
+    await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(apply_migrations())
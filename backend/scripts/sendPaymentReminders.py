@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+import asyncpg
+import sys
+import os
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.reminders import run_payment_reminders, REMINDER_DAYS_AHEAD, REMINDER_COOLDOWN_DAYS
+
+async def send_payment_reminders(days_ahead: int, cooldown_days: int):
+    """One reminder pass, for cron. Safe to run alongside the API's own job:
+    the advisory lock lets only one pass run at a time."""
+    conn = await asyncpg.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'academia_final'),
+        port=int(os.getenv('DB_PORT', '5432'))
+    )
+    
+    print(f'🔔 Buscando cuotas que vencen en {days_ahead} días o ya vencidas...')
+    started = time.perf_counter()
+    try:
+        queued = await run_payment_reminders(conn, days_ahead, cooldown_days)
+    finally:
+        await conn.close()
+    
+    if queued is None:
+        print('⚠ Otra instancia está generando recordatorios, se omite esta ejecución')
+    else:
+        print(f'✅ {queued} recordatorios en cola ({time.perf_counter() - started:.2f}s)')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Encola recordatorios de pago en notifications_log')
+    parser.add_argument('--days-ahead', type=int, default=REMINDER_DAYS_AHEAD)
+    parser.add_argument('--cooldown-days', type=int, default=REMINDER_COOLDOWN_DAYS)
+    args = parser.parse_args()
+    asyncio.run(send_payment_reminders(args.days_ahead, args.cooldown_days))
@@ -0,0 +1,126 @@
+"""
+Microbenchmark: serialization of a 10k-row list payload.
+
+Compares the old path (Record -> dict copy -> jsonable_encoder -> json.dumps)
+with orjson as default response class and with json_response (Records
+handed to orjson, one dict per row inside the serializer). Rows mimic get_all_installments. If the database in
+.env is reachable the rows are real asyncpg Records built with
+generate_series (no tables needed); otherwise plain dicts are used.
+
+    python tests/bench_json.py --rows 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import asyncpg
+import random
+import statistics
+import sys
+import os
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from utils.responses import AcademiaJSONResponse
+
+ROWS_SQL = """
+    SELECT g AS id, g / 3 + 1 AS payment_plan_id, (g % 3 + 1)::smallint AS installment_number,
+           (150 + (g % 50) * 10.5)::numeric(10,2) AS amount,
+           CURRENT_DATE + (g % 90) AS due_date,
+           CASE WHEN g % 2 = 0 THEN NOW() - (g % 30) * INTERVAL '1 day' END AS paid_at,
+           CASE WHEN g % 2 = 0 THEN 'paid' ELSE 'pending' END AS status,
+           'uploads/voucher_' || g || '.jpg' AS voucher_url, NULL::varchar AS rejection_reason,
+           NOW() - (g % 120) * INTERVAL '1 day' AS created_at,
+           g * 7 AS enrollment_id, g * 5 AS student_id,
+           'Nombre' || g AS first_name, 'Apellido' || g AS last_name, lpad(g::text, 8, '0') AS dni,
+           'Curso ' || (g % 40) AS item_name, 'course' AS enrollment_type,
+           'aceptado' AS enrollment_status,
+           CASE WHEN g % 2 = 0 THEN 'paid' ELSE 'pending' END AS status_ui
+    FROM generate_series(1, $1) AS g
+"""
+
+def synthetic_rows(n: int):
+    rng = random.Random(1)
+    now = datetime.now()
+    return [{
+        "id": g, "payment_plan_id": g // 3 + 1, "installment_number": g % 3 + 1,
+        "amount": Decimal(150 + (g % 50) * 10.5).quantize(Decimal("0.01")),
+        "due_date": date.today() + timedelta(days=g % 90),
+        "paid_at": now - timedelta(days=rng.randint(0, 30)) if g % 2 == 0 else None,
+        "status": "paid" if g % 2 == 0 else "pending",
+        "voucher_url": f"uploads/voucher_{g}.jpg", "rejection_reason": None,
+        "created_at": now - timedelta(days=g % 120),
+        "enrollment_id": g * 7, "student_id": g * 5,
+        "first_name": f"Nombre{g}", "last_name": f"Apellido{g}", "dni": f"{g:08d}",
+        "item_name": f"Curso {g % 40}", "enrollment_type": "course",
+        "enrollment_status": "aceptado", "status_ui": "paid" if g % 2 == 0 else "pending",
+    } for g in range(1, n + 1)]
+
+async def load_rows(n: int):
+    try:
+        conn = await asyncpg.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'postgres'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME', 'academia_final'),
+            port=int(os.getenv('DB_PORT', '5432')),
+            timeout=3
+        )
+    except Exception as e:
+        print(f'⚠ Sin base de datos ({e.__class__.__name__}), usando dicts sintéticos\n')
+        return synthetic_rows(n), False
+    try:
+        return await conn.fetch(ROWS_SQL, n), True
+    finally:
+        await conn.close()
+
+def old_path(rows):
+    return JSONResponse(jsonable_encoder([dict(r) for r in rows])).body
+
+def orjson_default(rows):
+    return AcademiaJSONResponse(jsonable_encoder([dict(r) for r in rows])).body
+
+def orjson_direct(rows):
+    return AcademiaJSONResponse(rows).body
+
+def bench(fn, rows, repeat: int):
+    fn(rows)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples), len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de serialización JSON')
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows, real = asyncio.run(load_rows(args.rows))
+    print(f'=== Serialización de {len(rows)} filas ({"asyncpg.Record" if real else "dict"}) ===\n')
+
+    results = []
+    for label, fn in [
+        ('dict + jsonable_encoder + json', old_path),
+        ('dict + jsonable_encoder + orjson', orjson_default),
+        ('json_response (orjson directo)', orjson_direct),
+    ]:
+        median, best, size = bench(fn, rows, args.repeat)
+        results.append(median)
+        print(f'{label:36s} mediana {median:8.2f} ms   mín {best:8.2f} ms   {size / 1024:8.0f} KB')
+
+    print(f'\n✅ json_response es {results[0] / results[2]:.1f}x más rápido que el camino anterior')
+
+if __name__ == '__main__':
+    main()
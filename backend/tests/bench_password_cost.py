@@ -0,0 +1,71 @@
+"""
+Benchmark: password hashing cost vs login latency on this machine.
+
+Times one verify (what a login pays) for each bcrypt cost, and for a few
+argon2 settings when argon2-cffi is installed, then recommends the
+strongest setting whose median stays under the target. Existing hashes
+are upgraded to the chosen cost at the next login.
+
+    python tests/bench_password_cost.py --target-ms 250
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from passlib.hash import argon2
+from utils.security import build_pwd_context, HASH_WORKERS
+
+PASSWORD = 'estudiante123'
+
+def verify_ms(context, repeat: int) -> float:
+    stored = context.hash(PASSWORD)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        assert context.verify(PASSWORD, stored)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del costo de hash de contraseñas')
+    parser.add_argument('--target-ms', type=float, default=250)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-rounds', type=int, default=14)
+    args = parser.parse_args()
+
+    print(f'=== Verificación de contraseña (objetivo {args.target_ms:.0f} ms por login) ===\n')
+    best = None
+    for rounds in range(10, args.max_rounds + 1):
+        ms = verify_ms(build_pwd_context('bcrypt', bcrypt_rounds=rounds), args.repeat)
+        ok = ms <= args.target_ms
+        print(f'{"✓" if ok else "✗"} bcrypt rounds={rounds:<2d} {ms:8.1f} ms   ~{HASH_WORKERS * 1000 / ms:6.1f} logins/s')
+        if ok:
+            best = f'PASSWORD_SCHEME=bcrypt BCRYPT_ROUNDS={rounds}'
+        else:
+            break
+
+    if argon2.has_backend():
+        print()
+        for memory_kib, time_cost in [(19456, 2), (65536, 2), (65536, 3), (131072, 3)]:
+            context = build_pwd_context('argon2', argon2_memory_kib=memory_kib, argon2_time_cost=time_cost)
+            ms = verify_ms(context, args.repeat)
+            ok = ms <= args.target_ms
+            print(f'{"✓" if ok else "✗"} argon2 m={memory_kib // 1024}MiB t={time_cost} {ms:8.1f} ms')
+            if ok:
+                best = f'PASSWORD_SCHEME=argon2 ARGON2_MEMORY_KIB={memory_kib} ARGON2_TIME_COST={time_cost}'
+    else:
+        print('\n⚠ argon2-cffi no instalado, se omite argon2')
+
+    print(f'\n✅ Recomendado: {best}' if best else '\n⚠ Ningún costo cumple el objetivo')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: JSON built by Postgres (json_agg) vs Records serialized by orjson.
+
+For 1k/10k/100k rows, measures database round trip plus response body
+rendering for both paths of the big list endpoints (PG_JSON_LISTS=0/1).
+Needs the database in .env. By default rows come from generate_series
+(no data needed); --real uses the admin enrollments query on the loaded
+data (see scripts/generateLoadData.py).
+
+    python tests/bench_pg_json.py --sizes 1000 10000 100000 --repeat 5
+"""
+import argparse
+import asyncio
+import asyncpg
+import statistics
+import sys
+import os
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from bench_json import ROWS_SQL
+from controllers.enrollmentController import ADMIN_ENROLLMENTS_SQL, ADMIN_ENROLLMENTS_ORDER
+from utils.responses import json_array_sql, list_response
+
+async def measure(coro_fn, repeat: int):
+    await coro_fn()  # warm-up
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = await coro_fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), size
+
+async def main(sizes, repeat: int, real: bool):
+    conn = await asyncpg.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'academia_final'),
+        port=int(os.getenv('DB_PORT', '5432'))
+    )
+    source = 'admin enrollments' if real else 'generate_series'
+    print(f'=== Listas grandes: Records + orjson vs json_agg ({source}) ===\n')
+    print(f'{"filas":>8s} {"records+orjson":>16s} {"json_agg":>12s} {"mejora":>8s} {"KB":>10s}')
+
+    try:
+        for n in sizes:
+            if real:
+                sql, args = ADMIN_ENROLLMENTS_SQL + ' LIMIT $1', (n,)
+                order_by = ADMIN_ENROLLMENTS_ORDER
+            else:
+                sql, args, order_by = ROWS_SQL + ' ORDER BY g', (n,), 'id'
+            json_sql = json_array_sql(sql, order_by)
+
+            async def records_path():
+                rows = await conn.fetch(sql, *args)
+                return len(list_response(rows).body)
+
+            async def pg_json_path():
+                text = await conn.fetchval(json_sql, *args)
+                return len(list_response(text).body)
+
+            records_ms, size = await measure(records_path, repeat)
+            pg_ms, _ = await measure(pg_json_path, repeat)
+            print(f'{n:>8d} {records_ms:>13.1f} ms {pg_ms:>9.1f} ms {records_ms / pg_ms:>7.1f}x {size / 1024:>10.0f}')
+    finally:
+        await conn.close()
+
+    print('\nLos tiempos incluyen la consulta y la generación del cuerpo de la respuesta.')
+    print('Activa el modo con PG_JSON_LISTS=1 si json_agg resulta más rápido en tu despliegue.')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark json_agg vs orjson')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--real', action='store_true', help='usar la consulta real de matrículas')
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat, args.real))
@@ -0,0 +1,93 @@
+"""
+Benchmark: student search (pg_trgm + tsvector + unaccent, migration 006).
+
+Picks random students from the database and searches them the way an
+admin would: full name without accents, name prefixes, the middle digits
+of the DNI and a last name with a typo. Prints median/p95 latency per
+kind and whether the plan uses the search indexes. Meant for the loaded
+data (scripts/generateLoadData.py, 100k students).
+
+    python tests/bench_search.py --samples 200
+"""
+import argparse
+import asyncio
+import asyncpg
+import random
+import statistics
+import sys
+import os
+import time
+import unicodedata
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config.statements import STUDENT_SEARCH
+from controllers.adminController import search_terms
+
+def strip_accents(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+
+def typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+QUERIES = {
+    'nombre sin tildes': lambda s, rng: strip_accents(f"{s['first_name']} {s['last_name']}").lower(),
+    'prefijos': lambda s, rng: f"{s['last_name'][:4]} {s['first_name'][:3]}",
+    'DNI parcial': lambda s, rng: s['dni'][2:7],
+    'apellido con error': lambda s, rng: typo(s['last_name'], rng),
+}
+
+async def main(samples: int, limit: int):
+    conn = await asyncpg.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'academia_final'),
+        port=int(os.getenv('DB_PORT', '5432'))
+    )
+    rng = random.Random(1)
+    try:
+        total = await conn.fetchval('SELECT COUNT(*) FROM students')
+        students = await conn.fetch(
+            'SELECT dni, first_name, last_name FROM students ORDER BY random() LIMIT $1', samples
+        )
+        stmt = await conn.prepare(STUDENT_SEARCH)
+        
+        print(f'=== Búsqueda de estudiantes ({total} filas, {len(students)} muestras, límite {limit}) ===\n')
+        text, tsquery = search_terms(QUERIES['prefijos'](students[0], rng))
+        plan = '\n'.join(r[0] for r in await conn.fetch(
+            f'EXPLAIN {STUDENT_SEARCH}', text, tsquery, limit
+        ))
+        uses_index = 'idx_students_search' in plan
+        print(f'{"✓" if uses_index else "⚠"} Plan {"con" if uses_index else "SIN"} índices de búsqueda\n')
+        
+        for label, build in QUERIES.items():
+            samples_ms, found = [], 0
+            for s in students:
+                text, tsquery = search_terms(build(s, rng))
+                start = time.perf_counter()
+                rows = await stmt.fetch(text, tsquery, limit)
+                samples_ms.append((time.perf_counter() - start) * 1000)
+                found += any(r['dni'] == s['dni'] for r in rows)
+            samples_ms.sort()
+            p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+            print(f'{label:20s} mediana {statistics.median(samples_ms):7.2f} ms   p95 {p95:7.2f} ms'
+                  f'   encontrado {found * 100 / len(students):5.1f}%')
+    finally:
+        await conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de búsqueda de estudiantes')
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.samples, args.limit))
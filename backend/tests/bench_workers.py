@@ -0,0 +1,98 @@
+"""
+Benchmark: throughput with 1..N Gunicorn/Uvicorn workers.
+
+Starts the app with gunicorn.conf.py and WEB_CONCURRENCY=1, 2, ... N,
+drives it with concurrent keep-alive clients for a few seconds, and prints
+requests/s and latency percentiles per worker count. The pool budget
+(DB_POOL_BUDGET) is split across workers as in production. Needs the
+database in .env; --token hits authenticated endpoints.
+
+    python tests/bench_workers.py --workers 1 2 4 --path /api/courses --token $TOKEN
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).parent.parent
+
+async def wait_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'el servidor no respondió en {timeout:.0f} s')
+
+async def load(url: str, headers: dict, concurrency: int, seconds: float):
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + seconds
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies, errors
+
+def percentile(samples, pct: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(pct) - 1] if len(samples) > 1 else samples[0]
+
+async def main(args):
+    base = f'http://127.0.0.1:{args.port}'
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    print(f'=== {args.path}: {args.concurrency} clientes, {args.seconds:.0f} s por prueba ({os.cpu_count()} CPU) ===\n')
+    print(f'{"workers":>8s} {"req/s":>10s} {"p50 ms":>8s} {"p99 ms":>8s} {"errores":>8s}')
+
+    baseline = None
+    for workers in args.workers:
+        env = {**os.environ, 'WEB_CONCURRENCY': str(workers), 'PORT': str(args.port)}
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app'],
+            cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            await wait_ready(base + '/ready')
+            await load(base + args.path, headers, args.concurrency, 1)  # warm-up
+            rps, latencies, errors = await load(base + args.path, headers, args.concurrency, args.seconds)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or rps
+        print(f'{workers:>8d} {rps:>10.0f} {percentile(latencies, 50):>8.1f} '
+              f'{percentile(latencies, 99):>8.1f} {errors:>8d}   x{rps / baseline:.2f}')
+
+    print('\nMás workers que núcleos no suele ayudar; ajusta WEB_CONCURRENCY y DB_POOL_BUDGET.')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de throughput por número de workers')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--token', help='JWT para endpoints autenticados')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--port', type=int, default=4100)
+    asyncio.run(main(parser.parse_args()))
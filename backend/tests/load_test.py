@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import httpx
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+BASE_URL = os.getenv('LOAD_BASE_URL', 'http://localhost:4000/api')
+
+
+class Recorder:
+    """Collects latency samples and errors per endpoint template"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.started = None
+        self.finished = None
+
+    def add(self, endpoint: str, elapsed: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append(elapsed)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, meta: dict) -> dict:
+        duration = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        for endpoint in sorted(self.samples):
+            values = sorted(self.samples[endpoint])
+            errors = self.errors.get(endpoint, 0)
+            endpoints[endpoint] = {
+                'count': len(values),
+                'errors': errors,
+                'error_rate': round(errors / len(values), 4),
+                'throughput_rps': round(len(values) / duration, 2),
+                'p50_ms': percentile(values, 50),
+                'p95_ms': percentile(values, 95),
+                'p99_ms': percentile(values, 99),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        total = sum(len(v) for v in self.samples.values())
+        total_errors = sum(self.errors.values())
+        return {
+            'meta': {**meta, 'duration_s': round(duration, 2)},
+            'totals': {
+                'requests': total,
+                'errors': total_errors,
+                'error_rate': round(total_errors / total, 4) if total else 0,
+                'throughput_rps': round(total / duration, 2),
+            },
+            'endpoints': endpoints,
+        }
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    value = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+    return round(value * 1000, 2)
+
+
+async def call(client: httpx.AsyncClient, recorder: Recorder, endpoint: str, method: str,
+               path: str, token: str = None, **kwargs):
+    """Issue one request and record it under the endpoint template name"""
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, f'{BASE_URL}{path}', headers=headers, **kwargs)
+    except httpx.HTTPError:
+        recorder.add(endpoint, time.perf_counter() - start, False)
+        return None
+    recorder.add(endpoint, time.perf_counter() - start, response.is_success)
+    return response
+
+
+async def setup_catalog(client, recorder, n_teachers: int, run_id: str):
+    """Admin creates cycle, courses, teachers, offerings and schedules (PASOS 1-4)"""
+    response = await call(client, recorder, 'POST /auth/login', 'POST', '/auth/login',
+                          json={'dni': 'admin', 'password': 'admin123'})
+    if response is None or not response.is_success:
+        raise RuntimeError('No se pudo autenticar al admin. Ejecuta: python scripts/createAdmin.py')
+    admin_token = response.json()['token']
+
+    response = await call(client, recorder, 'POST /cycles', 'POST', '/cycles', admin_token, json={
+        'name': f'Ciclo carga {run_id}', 'start_date': '2024-01-01', 'end_date': '2024-06-30',
+        'duration_months': 6, 'status': 'open'
+    })
+    cycle_id = response.json()['id']
+
+    teachers = []
+    for i in range(n_teachers):
+        response = await call(client, recorder, 'POST /courses', 'POST', '/courses', admin_token, json={
+            'name': f'Curso carga {run_id}-{i}', 'description': 'Prueba de carga', 'base_price': 500.00
+        })
+        course_id = response.json()['id']
+
+        dni = f'9{run_id[-5:]}{i:02d}'
+        response = await call(client, recorder, 'POST /teachers', 'POST', '/teachers', admin_token, json={
+            'first_name': 'Docente', 'last_name': f'Carga {i}', 'dni': dni, 'phone': '987654321',
+            'email': f'docente.{run_id}.{i}@academia.com', 'specialization': 'Carga'
+        })
+        teacher_id = response.json()['id']
+
+        response = await call(client, recorder, 'POST /courses/offerings', 'POST', '/courses/offerings',
+                              admin_token, json={
+            'course_id': course_id, 'cycle_id': cycle_id, 'group_label': 'Grupo A',
+            'teacher_id': teacher_id, 'price_override': 450.00, 'capacity': 1000
+        })
+        offering_id = response.json()['id']
+
+        response = await call(client, recorder, 'POST /schedules', 'POST', '/schedules', admin_token, json={
+            'course_offering_id': offering_id, 'day_of_week': 'Lunes',
+            'start_time': f'{8 + i % 10:02d}:00:00', 'end_time': f'{9 + i % 10:02d}:00:00',
+            'classroom': f'Aula {100 + i}'
+        })
+        schedule_id = response.json()['id']
+
+        teachers.append({'id': teacher_id, 'dni': dni, 'offering_id': offering_id,
+                         'schedule_id': schedule_id, 'students': []})
+
+    return admin_token, cycle_id, teachers
+
+
+async def virtual_student(client, recorder, admin_token: str, teacher: dict, run_id: str, n: int,
+                          iterations: int):
+    """Register, enroll, get approved and browse (PASOS 5-8)"""
+    dni = f'8{run_id[-5:]}{n:04d}'
+    response = await call(client, recorder, 'POST /students/register', 'POST', '/students/register', json={
+        'dni': dni, 'first_name': 'Alumno', 'last_name': f'Carga {n}', 'phone': '987654322',
+        'parent_name': 'Padre Carga', 'parent_phone': '987654323', 'password': 'student123'
+    })
+    if response is None or not response.is_success:
+        return
+    student_token = response.json()['token']
+    student_id = response.json()['user']['id']
+
+    response = await call(client, recorder, 'POST /enrollments', 'POST', '/enrollments', student_token,
+                          json={'items': [{'type': 'course', 'id': teacher['offering_id']}]})
+    if response is None or not response.is_success:
+        return
+    created = response.json()['created'][0]
+
+    await call(client, recorder, 'GET /enrollments/admin', 'GET', '/enrollments/admin', admin_token)
+    await call(client, recorder, 'POST /payments/approve', 'POST', '/payments/approve', admin_token,
+               json={'installment_id': created['installment_id']})
+    await call(client, recorder, 'PUT /enrollments/status', 'PUT', '/enrollments/status', admin_token,
+               json={'enrollment_id': created['enrollmentId'], 'status': 'aceptado'})
+    teacher['students'].append(student_id)
+
+    response = await call(client, recorder, 'POST /auth/login', 'POST', '/auth/login',
+                          json={'dni': dni, 'password': 'student123'})
+    if response is not None and response.is_success:
+        student_token = response.json()['token']
+
+    for _ in range(iterations):
+        await call(client, recorder, 'GET /enrollments', 'GET', '/enrollments', student_token)
+        await call(client, recorder, 'GET /schedules/course-offering/{id}', 'GET',
+                   f"/schedules/course-offering/{teacher['offering_id']}", student_token)
+
+
+async def virtual_teacher(client, recorder, teacher: dict, iterations: int, students_ready: asyncio.Event):
+    """Login and mark attendance for the enrolled students (PASO 9)"""
+    response = await call(client, recorder, 'POST /auth/login', 'POST', '/auth/login',
+                          json={'dni': teacher['dni'], 'password': teacher['dni']})
+    if response is None or not response.is_success:
+        return
+    token = response.json()['token']
+
+    await students_ready.wait()
+    for _ in range(iterations):
+        await call(client, recorder, 'GET /teachers/{id}/students', 'GET',
+                   f"/teachers/{teacher['id']}/students", token)
+        for student_id in list(teacher['students']):
+            await call(client, recorder, 'POST /teachers/{id}/attendance', 'POST',
+                       f"/teachers/{teacher['id']}/attendance", token, json={
+                'schedule_id': teacher['schedule_id'], 'student_id': student_id,
+                'status': random.choice(['presente', 'presente', 'presente', 'ausente'])
+            })
+
+
+async def virtual_admin(client, recorder, admin_token: str, cycle_id: int, iterations: int):
+    """Dashboard and analytics reads (PASOS 10-11)"""
+    for _ in range(iterations):
+        await call(client, recorder, 'GET /admin/dashboard', 'GET', '/admin/dashboard', admin_token)
+        await call(client, recorder, 'GET /admin/analytics', 'GET', f'/admin/analytics?cycle_id={cycle_id}',
+                   admin_token)
+        await call(client, recorder, 'GET /payments', 'GET', '/payments', admin_token)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=Path(__file__).parent, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    run_id = str(int(time.time()))
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.students + args.teachers + 1)
+
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        admin_token, cycle_id, teachers = await setup_catalog(client, recorder, args.teachers, run_id)
+
+        # Measure only the concurrent phase
+        recorder.samples.clear()
+        recorder.errors.clear()
+        recorder.started = time.perf_counter()
+
+        students_ready = asyncio.Event()
+        student_tasks = [
+            virtual_student(client, recorder, admin_token, teachers[n % len(teachers)], run_id, n,
+                            args.iterations)
+            for n in range(args.students)
+        ]
+        teacher_tasks = [
+            virtual_teacher(client, recorder, teacher, args.iterations, students_ready)
+            for teacher in teachers
+        ]
+
+        async def students_phase():
+            await asyncio.gather(*student_tasks)
+            students_ready.set()
+
+        await asyncio.gather(
+            students_phase(),
+            *teacher_tasks,
+            virtual_admin(client, recorder, admin_token, cycle_id, args.iterations),
+        )
+        recorder.finished = time.perf_counter()
+
+    return recorder.report({
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'base_url': BASE_URL,
+        'students': args.students,
+        'teachers': args.teachers,
+        'iterations': args.iterations,
+        'seed': args.seed,
+    })
+
+
+def compare(old_path: str, new_path: str):
+    """Print p95 and throughput deltas between two result files"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"{'endpoint':45} {'p95 old':>10} {'p95 new':>10} {'Δ%':>8} {'rps old':>9} {'rps new':>9}")
+    for endpoint in sorted(set(old['endpoints']) | set(new['endpoints'])):
+        o = old['endpoints'].get(endpoint)
+        n = new['endpoints'].get(endpoint)
+        if not o or not n:
+            print(f'{endpoint:45} {"-" if not o else o["p95_ms"]:>10} {"-" if not n else n["p95_ms"]:>10}')
+            continue
+        delta = (n['p95_ms'] - o['p95_ms']) / o['p95_ms'] * 100 if o['p95_ms'] else 0
+        print(f"{endpoint:45} {o['p95_ms']:>10} {n['p95_ms']:>10} {delta:>7.1f}% "
+              f"{o['throughput_rps']:>9} {n['throughput_rps']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Prueba de carga HTTP sobre el flujo completo')
+    parser.add_argument('--students', type=int, default=50, help='Estudiantes virtuales concurrentes')
+    parser.add_argument('--teachers', type=int, default=5, help='Docentes virtuales concurrentes')
+    parser.add_argument('--iterations', type=int, default=5, help='Repeticiones de lectura por usuario')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='Compara dos archivos de resultados y sale')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output)
+        print(f"✓ Resultados guardados en {args.output}")
+    print(output)
+    sys.exit(1 if result['totals']['errors'] else 0)
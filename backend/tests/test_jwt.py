@@ -0,0 +1,93 @@
+"""
+Pruebas de utils.security.verify_token / decode_token (HS256 propio).
+
+No necesita base de datos ni servidor: firma tokens con claves de prueba
+y comprueba que solo se aceptan los válidos, incluidos los firmados con
+una clave rotada que sigue en JWT_KEYS.
+
+    python tests/test_jwt.py
+"""
+import base64
+import hashlib
+import hmac
+import orjson
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Two keys: "old" was rotated out as the signing key but is still accepted
+os.environ['JWT_KEYS'] = 'old:old-secret,new:new-secret'
+os.environ['JWT_ACTIVE_KID'] = 'new'
+os.environ['JWT_SECRET'] = 'legacy-secret'
+
+from utils import security
+
+failures = 0
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def sign(header, payload, secret: str) -> str:
+    """Token with an arbitrary (even malformed) header, signed like ours"""
+    signing_input = f'{b64(orjson.dumps(header))}.{b64(orjson.dumps(payload))}'
+    digest = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f'{signing_input}.{b64(digest)}'
+
+def check(name: str, token, valid: bool):
+    global failures
+    try:
+        payload = security.verify_token(token)
+    except Exception as e:  # anything raised here would be a 500 for the client
+        payload, ok = None, False
+        print(f'✗ {name}: lanzó {type(e).__name__}: {e}')
+    else:
+        ok = (payload is not None) == valid
+        print(f"{'✓' if ok else '✗'} {name}: {'aceptado' if payload else 'rechazado'}")
+    failures += not ok
+
+def test_jwt():
+    global failures
+    print('=== Verificación de tokens HS256 ===\n')
+    now = int(time.time())
+    claims = {'id': 1, 'role': 'admin', 'exp': now + 600}
+    token = security.create_access_token({'id': 1, 'role': 'admin'})
+
+    check('Token emitido por create_access_token', token, True)
+    check('Firmado con la clave rotada "old"', sign({'alg': 'HS256', 'kid': 'old'}, claims, 'old-secret'), True)
+    check('Sin kid (clave JWT_SECRET)', sign({'alg': 'HS256'}, claims, 'legacy-secret'), True)
+
+    header, payload, signature = token.split('.')
+    tampered = b64(orjson.dumps({**claims, 'role': 'admin', 'id': 2}))
+    check('Firma incorrecta', f'{header}.{payload}.{signature[::-1]}', False)
+    check('Payload alterado', f'{header}.{tampered}.{signature}', False)
+    check('Firmado con otra clave', sign({'alg': 'HS256', 'kid': 'new'}, claims, 'otra'), False)
+    check('Expirado', sign({'alg': 'HS256', 'kid': 'new'}, {**claims, 'exp': now - 1}, 'new-secret'), False)
+    check('Sin exp', sign({'alg': 'HS256', 'kid': 'new'}, {'id': 1}, 'new-secret'), False)
+    check('kid desconocido', sign({'alg': 'HS256', 'kid': 'retirada'}, claims, 'old-secret'), False)
+    check('kid no es texto (lista)', sign({'alg': 'HS256', 'kid': ['x']}, claims, 'new-secret'), False)
+    check('kid no es texto (objeto)', sign({'alg': 'HS256', 'kid': {'a': 1}}, claims, 'new-secret'), False)
+    check('alg none', sign({'alg': 'none', 'kid': 'new'}, claims, 'new-secret'), False)
+    check('Cabecera no es objeto', sign(['HS256'], claims, 'new-secret'), False)
+    check('Payload no es objeto', sign({'alg': 'HS256', 'kid': 'new'}, [1, 2], 'new-secret'), False)
+    check('Cabecera no es JSON', f'bm9wZQ.{payload}.{signature}', False)
+    check('Base64 inválido', f'{header}.@@@.{signature}', False)
+    check('Dos segmentos', f'{header}.{payload}', False)
+    check('Cadena vacía', '', False)
+
+    # decode_token must serve the cache only until exp
+    short = sign({'alg': 'HS256', 'kid': 'new'}, {**claims, 'exp': now + 1}, 'new-secret')
+    first = security.decode_token(short) is not None
+    time.sleep(1.1)
+    ok = first and security.decode_token(short) is None
+    failures += not ok
+    print(f"{'✓' if ok else '✗'} decode_token descarta de la caché un token expirado")
+
+    print(f"\n{'✅ Todas las pruebas pasaron' if not failures else f'✗ {failures} pruebas fallaron'}")
+
+if __name__ == '__main__':
+    test_jwt()
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,117 @@
+import asyncio
+import asyncpg
+import sys
+import os
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import utils.notifications as notifications
+from utils.notifications import (
+    NotificationDispatcher, StubProvider, send_notification_to_parent, send_notifications_to_parents
+)
+
+MARKER = '[test_notifications]'
+
+async def test_notifications():
+    pool = await asyncpg.create_pool(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME', 'academia_final'),
+        port=int(os.getenv('DB_PORT', '5432')),
+        min_size=1,
+        max_size=2
+    )
+
+    print('=== Probando cola de notificaciones ===\n')
+
+    async with pool.acquire() as conn:
+        student_id = await conn.fetchval('SELECT id FROM students ORDER BY id LIMIT 1')
+        if student_id is None:
+            print('✗ No hay estudiantes para la prueba')
+            await pool.close()
+            return
+        # Earlier pending rows would be claimed by the dispatcher too
+        await conn.execute(
+            "UPDATE notifications_log SET next_attempt_at = NOW() + INTERVAL '1 hour' "
+            "WHERE status = 'pending' AND message NOT LIKE $1",
+            f'{MARKER}%'
+        )
+
+    # No backoff between attempts so the retry is due immediately
+    notifications.BACKOFF_BASE_S = 0
+    notifications.MAX_ATTEMPTS = 2
+
+    try:
+        # Test 1: enqueue inside a transaction that rolls back -> nothing queued
+        print('Test 1: Rollback descarta la notificación')
+        async with pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    await send_notification_to_parent(conn, student_id, '999000111', f'{MARKER} rollback', 'other')
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+            count = await conn.fetchval(
+                'SELECT COUNT(*) FROM notifications_log WHERE message = $1', f'{MARKER} rollback'
+            )
+        print(f"{'✓' if count == 0 else '✗'} Filas tras rollback: {count}\n")
+
+        # Test 2: successful send
+        print('Test 2: Envío con proveedor stub')
+        provider = StubProvider()
+        dispatcher = NotificationDispatcher(provider=provider, batch_size=10)
+        async with pool.acquire() as conn:
+            await send_notifications_to_parents(conn, [
+                (student_id, '999000111', f'{MARKER} ok 1', 'other'),
+                (student_id, '999000112', f'{MARKER} ok 2', 'other'),
+                (student_id, None, f'{MARKER} sin telefono', 'other'),
+            ])
+        await dispatcher.drain_once(pool)
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                'SELECT message, status, attempts, last_error FROM notifications_log '
+                'WHERE message LIKE $1 ORDER BY id', f'{MARKER}%'
+            )
+        for r in rows:
+            print(f"  {r['message']}: {r['status']} (intentos={r['attempts']}, error={r['last_error']})")
+        ok = (len(provider.sent) == 2
+              and [r['status'] for r in rows] == ['sent', 'sent', 'failed'])
+        print(f"{'✓' if ok else '✗'} Enviadas: {len(provider.sent)}\n")
+
+        # Test 3: retry, then give up after MAX_ATTEMPTS
+        print('Test 3: Reintentos con proveedor que falla')
+        provider = StubProvider(fail_times=3)
+        dispatcher = NotificationDispatcher(provider=provider, batch_size=10)
+        async with pool.acquire() as conn:
+            await send_notification_to_parent(conn, student_id, '999000113', f'{MARKER} retry', 'other')
+        await dispatcher.drain_once(pool)
+        async with pool.acquire() as conn:
+            first = await conn.fetchrow(
+                'SELECT status, attempts FROM notifications_log WHERE message = $1', f'{MARKER} retry'
+            )
+        await dispatcher.drain_once(pool)
+        async with pool.acquire() as conn:
+            second = await conn.fetchrow(
+                'SELECT status, attempts, last_error FROM notifications_log WHERE message = $1',
+                f'{MARKER} retry'
+            )
+        print(f"  Tras 1er intento: {first['status']} (intentos={first['attempts']})")
+        print(f"  Tras 2do intento: {second['status']} (intentos={second['attempts']}, error={second['last_error']})")
+        ok = first['status'] == 'pending' and second['status'] == 'failed' and not provider.sent
+        print(f"{'✓' if ok else '✗'} Reintento y fallo definitivo\n")
+        print(f"Estadísticas: {dispatcher.stats}")
+
+    finally:
+        async with pool.acquire() as conn:
+            await conn.execute('DELETE FROM notifications_log WHERE message LIKE $1', f'{MARKER}%')
+        await pool.close()
+
+if __name__ == '__main__':
+    asyncio.run(test_notifications())
@@ -1,47 +1,44 @@
 import asyncio
 import asyncpg
-from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from utils.security import pwd_context, hash_passwords
 
 DATABASE_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
+# Hashes with an outdated scheme or cost are upgraded at login
+# (verify_and_update_password); this script only hashes plaintext rows.
+def is_plaintext(password_hash: str) -> bool:
+    return pwd_context.identify(password_hash, required=False) is None
+
+async def hash_table(conn, table: str, label: str):
+    rows = await conn.fetch(f"SELECT id, password_hash FROM {table} WHERE password_hash IS NOT NULL")
+    plain = [r for r in rows if is_plaintext(r['password_hash'])]
+    print(f"⊘ {len(rows) - len(plain)} {label} ya están hasheados correctamente")
+    if not plain:
+        return
+    
+    # Hashed in parallel on the worker pool, written in one batch
+    hashed = await hash_passwords([r['password_hash'] for r in plain])
+    await conn.executemany(
+        f"UPDATE {table} SET password_hash = $1 WHERE id = $2",
+        [(h, r['id']) for h, r in zip(hashed, plain)]
+    )
+    for r in plain:
+        print(f"✓ {label.capitalize()} ID {r['id']} actualizado")
+
 async def update_passwords():
     conn = await asyncpg.connect(DATABASE_URL)
     
     try:
         print("Actualizando contraseñas de estudiantes...")
-        students = await conn.fetch("SELECT id, password_hash FROM students WHERE password_hash IS NOT NULL")
-        
-        for student in students:
-            # Si la contraseña NO empieza con $2b$ (bcrypt), hashearla
-            if student['password_hash'] and not student['password_hash'].startswith('$2b$'):
-                hashed = pwd_context.hash(student['password_hash'])
-                await conn.execute(
-                    "UPDATE students SET password_hash = $1 WHERE id = $2",
-                    hashed, student['id']
-                )
-                print(f"✓ Student ID {student['id']} actualizado")
-            else:
-                print(f"⊘ Student ID {student['id']} ya está hasheado correctamente")
+        await hash_table(conn, "students", "estudiantes")
         
         print("\nActualizando contraseñas de usuarios (admins)...")
-        users = await conn.fetch("SELECT id, password_hash FROM users")
-        
-        for user in users:
-            if not user['password_hash'].startswith('$2b$'):
-                hashed = pwd_context.hash(user['password_hash'])
-                await conn.execute(
-                    "UPDATE users SET password_hash = $1 WHERE id = $2",
-                    hashed, user['id']
-                )
-                print(f"✓ User ID {user['id']} actualizado")
-            else:
-                print(f"⊘ User ID {user['id']} ya está hasheado correctamente")
+        await hash_table(conn, "users", "usuarios")
         
         print("\n✅ Todas las contraseñas actualizadas correctamente!")
         
@@ -50,4 +47,4 @@ async def update_passwords():
     finally:
         await conn.close()
 
-asyncio.run(update_passwords())
\ No newline at end of file
+asyncio.run(update_passwords())
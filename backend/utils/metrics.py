@@ -0,0 +1,185 @@
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from utils.query_log import record_statement
+from config.statements import STATEMENT_NAMES, track_statement, stats as statement_stats, get_statement_stats
+from utils.notifications import dispatcher
+from utils.security import get_token_cache_stats
+from utils.revocation import revocations
+from utils.rate_limit import login_limiter
+
+# Budgets above which a request is reported in the slow-request log
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "20"))
+HISTOGRAM_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class RequestStats:
+    """Timings collected while serving a single request"""
+    __slots__ = ("started", "db_time", "query_count", "acquire_wait")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.query_count = 0
+        self.acquire_wait = 0.0
+
+    @property
+    def wall_time(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current_stats: ContextVar = ContextVar("request_stats", default=None)
+
+
+def start_request() -> RequestStats:
+    stats = RequestStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def current_request():
+    return _current_stats.get()
+
+
+def record_acquire(elapsed: float):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.acquire_wait += elapsed
+
+
+def record_query(elapsed: float):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.db_time += elapsed
+        stats.query_count += 1
+
+
+class InstrumentedConnection:
+    """Proxy around an asyncpg connection that times every statement.
+
+    Only the query methods are wrapped; everything else (transaction(),
+    prepare(), ...) is delegated untouched.
+    """
+
+    def __init__(self, connection):
+        self._conn = connection
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def _timed(self, method, query, args, *call_args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*call_args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            record_query(elapsed)
+            record_statement(query, args, elapsed)
+
+    async def _query(self, method: str, query, args, kwargs):
+        """Registered statements were parsed when the connection opened
+        (config.statements.init_connection); both kinds run from asyncpg's
+        statement cache, only the stats differ."""
+        name = STATEMENT_NAMES.get(query)
+        if name is not None:
+            track_statement(self._conn, name)
+        else:
+            statement_stats["adhoc"] += 1
+        return await self._timed(getattr(self._conn, method), query, args, query, *args, **kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        return await self._query("execute", query, args, kwargs)
+
+    async def executemany(self, command, args, **kwargs):
+        # Batched statements are logged without arguments (never EXPLAINed)
+        return await self._timed(self._conn.executemany, command, None, command, args, **kwargs)
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._query("fetch", query, args, kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._query("fetchrow", query, args, kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._query("fetchval", query, args, kwargs)
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        return await self._timed(self._conn.copy_records_to_table, f"COPY {table_name}", None,
+                                 table_name, **kwargs)
+
+
+class RollingHistogram:
+    """Keeps the last HISTOGRAM_WINDOW samples per endpoint"""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+
+    def add(self, endpoint: str, wall_ms: float, db_ms: float, queries: int, acquire_ms: float,
+            status_code: int):
+        window = self.samples.get(endpoint)
+        if window is None:
+            window = self.samples[endpoint] = deque(maxlen=self.window)
+            self.totals[endpoint] = {"requests": 0, "errors": 0, "slow": 0}
+        window.append((wall_ms, db_ms, queries, acquire_ms))
+        totals = self.totals[endpoint]
+        totals["requests"] += 1
+        if status_code >= 500:
+            totals["errors"] += 1
+        if wall_ms > SLOW_REQUEST_MS or queries > SLOW_REQUEST_QUERIES:
+            totals["slow"] += 1
+
+    def snapshot(self) -> dict:
+        result = {}
+        for endpoint, window in sorted(self.samples.items()):
+            wall = sorted(s[0] for s in window)
+            buckets = {}
+            for bound in HISTOGRAM_BUCKETS_MS:
+                buckets[f"le_{bound}"] = sum(1 for w in wall if w <= bound)
+            buckets["inf"] = len(wall)
+            result[endpoint] = {
+                **self.totals[endpoint],
+                "window": len(wall),
+                "wall_ms": {
+                    "p50": _percentile(wall, 50),
+                    "p95": _percentile(wall, 95),
+                    "p99": _percentile(wall, 99),
+                    "max": round(wall[-1], 2),
+                },
+                "avg_db_ms": round(sum(s[1] for s in window) / len(window), 2),
+                "avg_queries": round(sum(s[2] for s in window) / len(window), 2),
+                "max_queries": max(s[2] for s in window),
+                "avg_acquire_ms": round(sum(s[3] for s in window) / len(window), 3),
+                "buckets": buckets,
+            }
+        return result
+
+    def reset(self):
+        self.samples.clear()
+        self.totals.clear()
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round((len(sorted_values) - 1) * pct / 100)))
+    return round(sorted_values[index], 2)
+
+
+histogram = RollingHistogram()
+
+
+def get_metrics_snapshot() -> dict:
+    return {
+        "budgets": {"slow_request_ms": SLOW_REQUEST_MS, "slow_request_queries": SLOW_REQUEST_QUERIES},
+        "statements": get_statement_stats(),
+        "notifications": dict(dispatcher.stats),
+        "token_cache": get_token_cache_stats(),
+        "revocations": revocations.stats,
+        "login_rate_limit": dict(login_limiter.stats),
+        "endpoints": histogram.snapshot(),
+    }
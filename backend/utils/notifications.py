@@ -0,0 +1,234 @@
+import asyncio
+import os
+import random
+from config.statements import NOTIFICATION_ENQUEUE, NOTIFICATION_ENQUEUE_MANY
+from utils.rate_limit import TokenBucket
+
+# ===========================================================
+# Transactional outbox on notifications_log.
+# Controllers only insert 'pending' rows on their own connection, so a
+# notification commits or rolls back with the change that caused it.
+# NotificationDispatcher drains the table in the background.
+# ===========================================================
+
+NOTIFICATION_PROVIDER = os.getenv("NOTIFICATION_PROVIDER", "log")
+NOTIFICATION_DISPATCHER = os.getenv("NOTIFICATION_DISPATCHER", "1") == "1"
+BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "50"))
+POLL_INTERVAL_S = float(os.getenv("NOTIFICATION_POLL_S", "5"))
+MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE_S = float(os.getenv("NOTIFICATION_BACKOFF_S", "30"))
+BACKOFF_MAX_S = 3600
+# A claimed row stays invisible to other dispatchers this long; if the
+# process dies mid-batch the row becomes due again on its own
+CLAIM_LEASE_S = 120
+
+CLAIM_BATCH = """
+    UPDATE notifications_log n
+    SET attempts = n.attempts + 1,
+        next_attempt_at = NOW() + make_interval(secs => $2)
+    WHERE n.id IN (
+        SELECT id FROM notifications_log
+        WHERE status = 'pending' AND next_attempt_at <= NOW()
+        ORDER BY next_attempt_at
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING n.id, n.student_id, n.parent_phone, n.type, n.message, n.attempts
+"""
+
+MARK_SENT = """
+    UPDATE notifications_log
+    SET status = 'sent', sent_at = NOW(), last_error = NULL
+    WHERE id = ANY($1::int[])
+"""
+
+MARK_FAILED_ATTEMPT = """
+    UPDATE notifications_log
+    SET status = $2::notification_status,
+        last_error = $3,
+        next_attempt_at = NOW() + make_interval(secs => $4)
+    WHERE id = $1
+"""
+
+
+async def send_notification_to_parent(db, student_id: int, parent_phone: str, message: str,
+                                      type: str) -> int:
+    """Queue a message for the parent. Runs on the caller's connection, so
+    call it inside the same transaction as the change being notified."""
+    notification_id = await db.fetchval(NOTIFICATION_ENQUEUE, student_id, parent_phone, message, type)
+    dispatcher.wake()
+    return notification_id
+
+
+async def send_notifications_to_parents(db, notifications: list):
+    """Bulk variant: `notifications` is a list of
+    (student_id, parent_phone, message, type) tuples, inserted in one statement"""
+    if not notifications:
+        return
+    student_ids, phones, messages, types = (list(col) for col in zip(*notifications))
+    await db.execute(NOTIFICATION_ENQUEUE_MANY, student_ids, phones, messages, types)
+    dispatcher.wake()
+
+
+# ===========================================================
+# Providers
+# ===========================================================
+
+class LogProvider:
+    """Development provider: prints the message instead of sending it"""
+    name = "log"
+    rate_per_second = 20
+
+    async def send(self, phone: str, message: str):
+        print(f"📱 Notificación a {phone}: {message}")
+
+
+class StubProvider:
+    """In-memory provider for tests. Records every message and fails the
+    first `fail_times` sends to exercise the retry path."""
+    name = "stub"
+
+    def __init__(self, fail_times: int = 0, rate_per_second: float = 1000):
+        self.fail_times = fail_times
+        self.rate_per_second = rate_per_second
+        self.sent = []
+
+    async def send(self, phone: str, message: str):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("stub provider failure")
+        self.sent.append((phone, message))
+
+
+PROVIDERS = {
+    "log": LogProvider,
+    "stub": StubProvider,
+}
+
+# One bucket per provider, shared by every dispatcher in the process
+_buckets = {}
+
+
+def get_provider(name: str = None):
+    name = name or NOTIFICATION_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Proveedor de notificaciones desconocido: {name}")
+    return PROVIDERS[name]()
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with ±20% jitter, capped at BACKOFF_MAX_S"""
+    delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+# ===========================================================
+# Dispatcher
+# ===========================================================
+
+class NotificationDispatcher:
+    """Background task that drains pending notifications in batches.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and leased by pushing
+    next_attempt_at forward, so several workers or replicas can run a
+    dispatcher against the same table without sending anything twice.
+    """
+
+    def __init__(self, provider=None, batch_size: int = BATCH_SIZE,
+                 poll_interval: float = POLL_INTERVAL_S):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stats = {"batches": 0, "sent": 0, "retried": 0, "failed": 0}
+        self._wake = asyncio.Event()
+        self._task = None
+        self._stopping = False
+
+    def wake(self):
+        """Skip the rest of the poll interval (new rows were queued)"""
+        self._wake.set()
+
+    async def start(self, pool):
+        if self._task is not None:
+            return
+        if self.provider is None:
+            self.provider = get_provider()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(pool))
+        print(f"✓ Notification dispatcher started (provider={self.provider.name})")
+
+    async def stop(self, timeout: float = 10):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        print("✓ Notification dispatcher stopped")
+
+    async def _run(self, pool):
+        while not self._stopping:
+            try:
+                claimed = await self.drain_once(pool)
+            except Exception as e:
+                print(f"⚠ Notification dispatcher error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Queue drained: sleep until the next poll or an enqueue
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain_once(self, pool) -> int:
+        """Claim, send and settle one batch. Returns the number of rows claimed.
+        The connection is released while messages are being sent."""
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(CLAIM_BATCH, self.batch_size, CLAIM_LEASE_S)
+        if not rows:
+            return 0
+
+        results = await asyncio.gather(*(self._deliver(row) for row in rows))
+
+        sent = [row['id'] for row, error in zip(rows, results) if error is None]
+        failed = []
+        for row, error in zip(rows, results):
+            if error is None:
+                continue
+            if row['attempts'] >= MAX_ATTEMPTS or not row['parent_phone']:
+                failed.append((row['id'], "failed", error, 0))
+                self.stats["failed"] += 1
+            else:
+                failed.append((row['id'], "pending", error, backoff_seconds(row['attempts'])))
+                self.stats["retried"] += 1
+
+        async with pool.acquire() as conn:
+            if sent:
+                await conn.execute(MARK_SENT, sent)
+            if failed:
+                await conn.executemany(MARK_FAILED_ATTEMPT, failed)
+
+        self.stats["batches"] += 1
+        self.stats["sent"] += len(sent)
+        return len(rows)
+
+    async def _deliver(self, row):
+        """Send one message; returns None on success or the error text"""
+        if not row['parent_phone']:
+            return "Sin teléfono del apoderado"
+        bucket = _buckets.get(self.provider.name)
+        if bucket is None:
+            bucket = _buckets[self.provider.name] = TokenBucket(self.provider.rate_per_second)
+        await bucket.acquire()
+        try:
+            await self.provider.send(row['parent_phone'], row['message'])
+            return None
+        except Exception as e:
+            return str(e)[:500] or e.__class__.__name__
+
+
+dispatcher = NotificationDispatcher()
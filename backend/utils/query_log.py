@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import re
+import time
+
+# Statements slower than this are reported and may get an EXPLAIN sample
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Set EXPLAIN_SLOW_QUERIES=0 to disable EXPLAIN (ANALYZE, BUFFERS) sampling
+EXPLAIN_SLOW_QUERIES = os.getenv("EXPLAIN_SLOW_QUERIES", "1") == "1"
+EXPLAIN_INTERVAL_S = float(os.getenv("EXPLAIN_INTERVAL_S", "300"))
+EXPLAIN_SAMPLES_PER_FINGERPRINT = 3
+MAX_FINGERPRINTS = 2000
+
+_comment_re = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_string_re = re.compile(r"'(?:[^']|'')*'")
+_param_re = re.compile(r"\$\d+")
+_number_re = re.compile(r"\b\d+(?:\.\d+)?\b")
+_in_list_re = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_values_list_re = re.compile(r"(\(\?(?:\.\.\.)?\))(?:\s*,\s*\(\?(?:\.\.\.)?\))+")
+_space_re = re.compile(r"\s+")
+
+
+def fingerprint(query: str) -> str:
+    """Normalize a statement so that dynamically built variants of the same
+    query collapse into one key: comments and whitespace are dropped,
+    literals and $n placeholders become ?, IN/VALUES lists are folded."""
+    sql = _comment_re.sub(" ", query)
+    sql = _string_re.sub("?", sql)
+    sql = _param_re.sub("?", sql)
+    sql = _number_re.sub("?", sql)
+    sql = _in_list_re.sub("(?...)", sql)
+    sql = _values_list_re.sub(r"\1, ...", sql)
+    return _space_re.sub(" ", sql).strip().lower()
+
+
+class QueryLog:
+    """Aggregates count, total and max time per statement fingerprint"""
+
+    def __init__(self):
+        self.entries = {}
+        self._last_explain = {}
+
+    def record(self, query: str, elapsed: float):
+        key = fingerprint(query)
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= MAX_FINGERPRINTS:
+                return None
+            entry = self.entries[key] = {
+                "fingerprint": key,
+                "example": _space_re.sub(" ", query).strip()[:2000],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "slow_count": 0,
+                "explain_samples": [],
+            }
+        elapsed_ms = elapsed * 1000
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        if elapsed_ms > entry["max_ms"]:
+            entry["max_ms"] = elapsed_ms
+        if elapsed_ms > SLOW_QUERY_MS:
+            entry["slow_count"] += 1
+            print(f"⚠ Slow query ({elapsed_ms:.1f}ms): {entry['example'][:200]}")
+        return entry
+
+    def wants_explain(self, entry: dict, query: str, args, elapsed: float) -> bool:
+        if not EXPLAIN_SLOW_QUERIES or elapsed * 1000 <= SLOW_QUERY_MS:
+            return False
+        # EXPLAIN ANALYZE executes the statement again, so only read-only queries
+        head = query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+        if head not in ("SELECT", "WITH") or args is None:
+            return False
+        if len(entry["explain_samples"]) >= EXPLAIN_SAMPLES_PER_FINGERPRINT:
+            return False
+        now = time.monotonic()
+        if now - self._last_explain.get(entry["fingerprint"], -EXPLAIN_INTERVAL_S) < EXPLAIN_INTERVAL_S:
+            return False
+        self._last_explain[entry["fingerprint"]] = now
+        return True
+
+    def snapshot(self, order_by: str = "total_ms", limit: int = 100) -> dict:
+        rows = sorted(self.entries.values(), key=lambda e: e.get(order_by, 0), reverse=True)
+        return {
+            "slow_query_ms": SLOW_QUERY_MS,
+            "fingerprints": len(self.entries),
+            "queries": [
+                {
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                }
+                for entry in rows[:limit]
+            ],
+        }
+
+    def reset(self):
+        self.entries.clear()
+        self._last_explain.clear()
+
+
+query_log = QueryLog()
+
+# The loop only keeps weak references to tasks: hold the in-flight EXPLAINs
+# so they are not garbage-collected mid-run
+_explain_tasks = set()
+
+
+def record_statement(query: str, args: tuple, elapsed: float):
+    """Called by InstrumentedConnection after each statement"""
+    entry = query_log.record(query, elapsed)
+    if entry is not None and query_log.wants_explain(entry, query, args, elapsed):
+        task = asyncio.get_running_loop().create_task(_explain(entry, query, args, elapsed))
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+
+
+async def _explain(entry: dict, query: str, args: tuple, elapsed: float):
+    """Capture EXPLAIN (ANALYZE, BUFFERS) on a separate pooled connection so
+    the request that triggered it does not pay for the second execution"""
+    from config.database import get_db_pool
+
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction(readonly=True):
+                plan = await conn.fetchval(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, *args
+                )
+        entry["explain_samples"].append({
+            "captured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "plan": json.loads(plan) if isinstance(plan, str) else plan,
+        })
+    except Exception as e:
+        print(f"EXPLAIN sample failed: {e}")
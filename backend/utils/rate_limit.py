@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` are available"""
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available"""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+# ===========================================================
+# Keyed buckets with a pluggable store: in-process by default, or a
+# Postgres table so every replica sees the same counts.
+# ===========================================================
+
+class MemoryBucketStore:
+    """One TokenBucket per key in this process, least recently used evicted"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def hit(self, key: str, rate: float, capacity: float, db=None):
+        """Take one token. Returns (allowed, seconds until the next token)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, capacity)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        if bucket.try_acquire():
+            return True, 0.0
+        return False, bucket.retry_after()
+
+
+class PostgresBucketStore:
+    """Buckets in the rate_limit_buckets table (migration 008): refill and
+    take happen in one upsert, so concurrent replicas cannot both spend
+    the last token. Uses the request's connection when one is given."""
+
+    HIT_SQL = """
+        INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+        VALUES ($1, $3::float8 - 1, true, NOW())
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = LEAST($3::float8, b.tokens + EXTRACT(EPOCH FROM NOW() - b.updated_at) * $2::float8)
+                     - CASE WHEN LEAST($3::float8, b.tokens + EXTRACT(EPOCH FROM NOW() - b.updated_at) * $2::float8) >= 1
+                            THEN 1 ELSE 0 END,
+            allowed = LEAST($3::float8, b.tokens + EXTRACT(EPOCH FROM NOW() - b.updated_at) * $2::float8) >= 1,
+            updated_at = NOW()
+        RETURNING allowed, tokens
+    """
+    # Idle buckets are full again: dropping them changes nothing
+    PURGE_SQL = "DELETE FROM rate_limit_buckets WHERE updated_at < NOW() - INTERVAL '1 day'"
+    PURGE_EVERY = 1000
+
+    def __init__(self):
+        self._hits = 0
+
+    async def hit(self, key: str, rate: float, capacity: float, db=None):
+        if db is None:
+            from config.database import get_db_pool
+            async with (await get_db_pool()).acquire() as conn:
+                return await self.hit(key, rate, capacity, conn)
+        
+        row = await db.fetchrow(self.HIT_SQL, key, rate, capacity)
+        self._hits += 1
+        if self._hits % self.PURGE_EVERY == 0:
+            await db.execute(self.PURGE_SQL)
+        if row['allowed']:
+            return True, 0.0
+        return False, max(0.0, (1 - row['tokens']) / rate)
+
+
+BUCKET_STORES = {
+    "memory": MemoryBucketStore,
+    "postgres": PostgresBucketStore,
+}
+
+# Login throttling: attempts per DNI (brute force on one account) and per
+# IP (credential stuffing). The IP budget is generous because a whole
+# classroom may log in from the same address.
+# In-memory buckets are per process: with several workers (APP_WORKERS,
+# set by gunicorn.conf.py) they must live in Postgres or every limit is
+# multiplied by the worker count
+APP_WORKERS = max(1, int(os.getenv("APP_WORKERS", "1")))
+LOGIN_RATE_STORE = os.getenv("LOGIN_RATE_STORE") or ("postgres" if APP_WORKERS > 1 else "memory")
+if LOGIN_RATE_STORE == "memory" and APP_WORKERS > 1:
+    print(f"⚠ LOGIN_RATE_STORE=memory con {APP_WORKERS} workers: "
+          f"los límites de login son {APP_WORKERS} veces más laxos")
+LOGIN_DNI_BURST = float(os.getenv("LOGIN_DNI_BURST", "5"))
+LOGIN_DNI_PER_MINUTE = float(os.getenv("LOGIN_DNI_PER_MINUTE", "2"))
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "60"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+
+
+def bucket_key(prefix: str, value: str) -> str:
+    """Bounded key: long values are hashed so they fit rate_limit_buckets.key
+    (VARCHAR(120)) and cannot bloat the in-memory store"""
+    if len(value) > 64:
+        value = hashlib.sha256(value.encode()).hexdigest()
+    return f"{prefix}:{value}"
+
+
+class LoginRateLimiter:
+    """Checked before the credentials lookup, so a rejected attempt costs
+    no bcrypt work"""
+
+    def __init__(self, store):
+        self.store = store
+        self.stats = {"allowed": 0, "blocked_dni": 0, "blocked_ip": 0}
+
+    async def check(self, dni: str, ip: str, db=None):
+        """None when the attempt may proceed, else seconds to wait"""
+        allowed, wait = await self.store.hit(
+            bucket_key("login:ip", ip), LOGIN_IP_PER_MINUTE / 60, LOGIN_IP_BURST, db
+        )
+        if not allowed:
+            self.stats["blocked_ip"] += 1
+            return wait
+        allowed, wait = await self.store.hit(
+            bucket_key("login:dni", dni.strip().lower()), LOGIN_DNI_PER_MINUTE / 60, LOGIN_DNI_BURST, db
+        )
+        if not allowed:
+            self.stats["blocked_dni"] += 1
+            return wait
+        self.stats["allowed"] += 1
+        return None
+
+
+login_limiter = LoginRateLimiter(BUCKET_STORES[LOGIN_RATE_STORE]())
@@ -0,0 +1,115 @@
+import asyncio
+import os
+from utils.notifications import dispatcher
+
+# ===========================================================
+# Payment-due reminders: one reminder per student with unpaid
+# installments due within REMINDER_DAYS_AHEAD days (or already overdue),
+# queued in the notifications outbox.
+# ===========================================================
+
+PAYMENT_REMINDERS = os.getenv("PAYMENT_REMINDERS", "1") == "1"
+REMINDER_INTERVAL_S = float(os.getenv("REMINDER_INTERVAL_S", "3600"))
+REMINDER_DAYS_AHEAD = int(os.getenv("REMINDER_DAYS_AHEAD", "3"))
+# Matches the 7-day "Deuda reciente notificada" window of the admin dashboard
+REMINDER_COOLDOWN_DAYS = int(os.getenv("REMINDER_COOLDOWN_DAYS", "7"))
+# Only one replica runs a pass at a time
+REMINDER_LOCK_KEY = 734201
+
+# Scan, de-duplication and enqueue in one statement: the partial index on
+# unpaid installments drives the scan and the (student_id, type, sent_at)
+# index answers the NOT EXISTS, so no rows travel to the application.
+ENQUEUE_PAYMENT_REMINDERS = """
+    WITH due AS (
+        SELECT e.student_id,
+               COUNT(*) AS installments,
+               SUM(i.amount) AS total,
+               MIN(i.due_date) AS first_due,
+               BOOL_OR(i.due_date < CURRENT_DATE) AS overdue
+        FROM installments i
+        JOIN payment_plans pp ON pp.id = i.payment_plan_id
+        JOIN enrollments e ON e.id = pp.enrollment_id
+        WHERE i.status IN ('pending', 'overdue')
+          AND i.due_date <= CURRENT_DATE + $1::int
+          AND i.voucher_url IS NULL
+          AND e.status IN ('pendiente', 'aceptado')
+        GROUP BY e.student_id
+    ), queued AS (
+        INSERT INTO notifications_log (student_id, parent_phone, message, type)
+        SELECT s.id, s.parent_phone,
+               CASE WHEN due.overdue
+                    THEN format('%s %s tiene %s cuota(s) vencida(s) o por vencer por S/ %s (desde el %s). Por favor regularice el pago.',
+                                s.first_name, s.last_name, due.installments, due.total,
+                                to_char(due.first_due, 'DD/MM/YYYY'))
+                    ELSE format('Recordatorio: %s %s tiene %s cuota(s) por S/ %s con vencimiento el %s.',
+                                s.first_name, s.last_name, due.installments, due.total,
+                                to_char(due.first_due, 'DD/MM/YYYY'))
+               END,
+               'payment_due'
+        FROM due
+        JOIN students s ON s.id = due.student_id
+        WHERE s.parent_phone IS NOT NULL AND s.parent_phone <> ''
+          AND NOT EXISTS (
+              SELECT 1 FROM notifications_log nl
+              WHERE nl.student_id = due.student_id
+                AND nl.type = 'payment_due'
+                AND nl.sent_at >= NOW() - make_interval(days => $2)
+          )
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM queued
+"""
+
+
+async def run_payment_reminders(conn, days_ahead: int = REMINDER_DAYS_AHEAD,
+                                cooldown_days: int = REMINDER_COOLDOWN_DAYS):
+    """Queue one pass of payment reminders. Returns the number of reminders
+    queued, or None when another replica holds the lock."""
+    async with conn.transaction():
+        locked = await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", REMINDER_LOCK_KEY)
+        if not locked:
+            return None
+        queued = await conn.fetchval(ENQUEUE_PAYMENT_REMINDERS, days_ahead, cooldown_days)
+    if queued:
+        dispatcher.wake()
+    return queued
+
+
+class PaymentReminderJob:
+    """Runs run_payment_reminders every REMINDER_INTERVAL_S seconds"""
+
+    def __init__(self, interval: float = REMINDER_INTERVAL_S):
+        self.interval = interval
+        self._task = None
+        self._stop = asyncio.Event()
+
+    async def start(self, pool):
+        if self._task is not None:
+            return
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(pool))
+        print(f"✓ Payment reminder job started (every {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+    async def _run(self, pool):
+        while not self._stop.is_set():
+            try:
+                async with pool.acquire() as conn:
+                    queued = await run_payment_reminders(conn)
+                if queued:
+                    print(f"✓ {queued} recordatorios de pago en cola")
+            except Exception as e:
+                print(f"⚠ Payment reminder job error: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+reminder_job = PaymentReminderJob()
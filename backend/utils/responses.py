@@ -0,0 +1,60 @@
+import decimal
+import os
+import asyncpg
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+
+# Opt-in: Postgres builds the JSON array of the big list endpoints itself
+PG_JSON_LISTS = os.getenv("PG_JSON_LISTS", "0") == "1"
+
+
+def _default(obj):
+    """Types orjson does not handle natively. Decimal follows FastAPI's
+    jsonable_encoder (int when there are no decimals, float otherwise) so
+    payloads are identical to the ones produced before."""
+    if isinstance(obj, asyncpg.Record):
+        # orjson cannot read a Record itself: one short-lived dict per row,
+        # encoded natively right away (no jsonable_encoder walk)
+        return dict(obj)
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class AcademiaJSONResponse(ORJSONResponse):
+    """Default response class: orjson with Decimal and asyncpg.Record support"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, status_code: int = 200) -> AcademiaJSONResponse:
+    """Return this from a route to skip FastAPI's jsonable_encoder pass.
+
+    Lists of asyncpg.Record can be passed as they are. Each row still
+    becomes a dict inside the serializer (see _default), but there is no
+    jsonable_encoder pass and no second copy of the list; dates, datetimes
+    and Decimals are encoded by orjson. Use it for the large list endpoints."""
+    return AcademiaJSONResponse(content, status_code=status_code)
+
+
+def json_array_sql(sql: str, order_by: str) -> str:
+    """Wrap a SELECT so the whole result comes back as one JSON array (text);
+    no rows gives []. json_agg does not promise the subquery's order, so
+    `order_by` (over the subquery's output columns, e.g. "id DESC") is
+    applied inside the aggregate."""
+    return f"SELECT COALESCE(json_agg(t ORDER BY {order_by}), '[]'::json)::text FROM ({sql}) t"
+
+
+def list_response(result):
+    """json_response for Records; JSON text built by Postgres (see
+    json_array_sql) is sent as-is, without parsing or re-encoding."""
+    if isinstance(result, str):
+        return Response(content=result, media_type="application/json")
+    return json_response(result)
@@ -0,0 +1,144 @@
+import asyncio
+import math
+import os
+import time
+from utils.security import ACCESS_TOKEN_EXPIRE_MINUTES
+
+# ===========================================================
+# Revoked sessions. Access tokens are verified from their claims alone,
+# so logging out (or a refresh token reuse) must reach every worker:
+# each one keeps the sessions revoked within the access-token lifetime
+# in memory and re-reads them from refresh_tokens every few seconds.
+# ===========================================================
+
+REVOCATION_SYNC_S = float(os.getenv("REVOCATION_SYNC_S", "10"))
+REVOCATION_CAPACITY = int(os.getenv("REVOCATION_CAPACITY", "100000"))
+REFRESH_PURGE_S = 3600
+
+REVOKED_SESSIONS_SQL = """
+    SELECT DISTINCT session_id FROM refresh_tokens
+    WHERE revoked_at > NOW() - make_interval(mins => $1)
+"""
+PURGE_REFRESH_TOKENS_SQL = "DELETE FROM refresh_tokens WHERE expires_at < NOW() - INTERVAL '1 day'"
+
+
+class BloomFilter:
+    """Bloom filter over session ids (uuid4 hex). The ids are already
+    random, so the k bit positions come straight from their 128 bits
+    (double hashing) instead of a hash function."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, sid: str):
+        value = int(sid, 16)
+        h1, h2 = value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, sid: str):
+        for p in self._positions(sid):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, sid: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(sid))
+
+
+class RevocationList:
+    """Bloom filter in front of the exact set of revoked sessions: almost
+    every request is a clear negative from the filter, and a positive is
+    confirmed against the set, so a false positive never rejects a token."""
+
+    def __init__(self, capacity: int = REVOCATION_CAPACITY):
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._revoked = set()
+        self._local = {}
+        self.synced_at = None
+
+    def add(self, sid: str):
+        self._local[sid] = time.monotonic()
+        self._revoked.add(sid)
+        self._bloom.add(sid)
+
+    def is_revoked(self, sid: str) -> bool:
+        try:
+            return sid in self._bloom and sid in self._revoked
+        except (TypeError, ValueError):
+            return True  # not a session id we issued
+
+    def replace(self, sids):
+        """Swap in a fresh snapshot (a bloom filter cannot forget entries)"""
+        bloom, revoked = BloomFilter(max(self.capacity, len(sids))), set(sids)
+        for sid in revoked:
+            bloom.add(sid)
+        self._bloom, self._revoked = bloom, revoked
+        self.synced_at = time.time()
+
+    async def sync(self, conn):
+        started = time.monotonic()
+        rows = await conn.fetch(REVOKED_SESSIONS_SQL, ACCESS_TOKEN_EXPIRE_MINUTES)
+        # Revocations made here while the query ran may not be in its snapshot
+        self._local = {sid: at for sid, at in self._local.items() if at >= started}
+        self.replace({r['session_id'].hex for r in rows} | self._local.keys())
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "revoked_sessions": len(self._revoked),
+            "bloom_bytes": len(self._bloom.bits),
+            "synced_at": self.synced_at,
+        }
+
+
+class RevocationSync:
+    """Reloads the revocation list every REVOCATION_SYNC_S seconds and
+    purges expired refresh tokens once an hour"""
+
+    def __init__(self, revocations: RevocationList, interval: float = REVOCATION_SYNC_S):
+        self.revocations = revocations
+        self.interval = interval
+        self._task = None
+        self._stop = asyncio.Event()
+        self._purged_at = 0.0
+
+    async def start(self, pool):
+        if self._task is not None:
+            return
+        try:
+            async with pool.acquire() as conn:
+                await self.revocations.sync(conn)
+        except Exception as e:
+            print(f"⚠ Revocation sync error: {e}")
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(pool))
+        print(f"✓ Revocation sync started (every {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+    async def _run(self, pool):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                async with pool.acquire() as conn:
+                    await self.revocations.sync(conn)
+                    if time.monotonic() - self._purged_at > REFRESH_PURGE_S:
+                        await conn.execute(PURGE_REFRESH_TOKENS_SQL)
+                        self._purged_at = time.monotonic()
+            except Exception as e:
+                print(f"⚠ Revocation sync error: {e}")
+
+
+revocations = RevocationList()
+revocation_sync = RevocationSync(revocations)
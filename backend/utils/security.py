@@ -1,13 +1,111 @@
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import jwt
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import orjson
 import os
+import secrets
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. The configured scheme and cost hash new passwords; a
+# stored hash with another scheme or cost is re-hashed at the next login
+# (verify_and_update_password). tests/bench_password_cost.py picks a cost
+# for a target login latency.
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_MEMORY_KIB = int(os.getenv("ARGON2_MEMORY_KIB", "65536"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
+PASSWORD_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_pwd_context(scheme: str = PASSWORD_SCHEME, bcrypt_rounds: int = BCRYPT_ROUNDS,
+                      argon2_memory_kib: int = ARGON2_MEMORY_KIB,
+                      argon2_time_cost: int = ARGON2_TIME_COST,
+                      argon2_parallelism: int = ARGON2_PARALLELISM) -> CryptContext:
+    if scheme not in PASSWORD_SCHEMES:
+        raise RuntimeError(f"PASSWORD_SCHEME debe ser uno de {', '.join(PASSWORD_SCHEMES)}")
+    if scheme == "argon2":
+        from passlib.hash import argon2
+        if not argon2.has_backend():
+            raise RuntimeError("PASSWORD_SCHEME=argon2 requiere el paquete argon2-cffi")
+    # min = max = default: a hash with any other cost counts as outdated
+    return CryptContext(
+        schemes=[scheme, *(s for s in PASSWORD_SCHEMES if s != scheme)],
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__memory_cost=argon2_memory_kib,
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_pwd_context()
+
+# bcrypt (and argon2-cffi) release the GIL while hashing, so hashes run in
+# parallel on a thread pool instead of blocking the event loop
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 4)))
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+
+# Bulk imports hash on their own, smaller pool so logins never queue behind
+# them, and at a lower cost: pwd_context marks those hashes as outdated, so
+# verify_and_update_password re-hashes them at the full cost on first login
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(max(1, HASH_WORKERS // 2))))
+IMPORT_BCRYPT_ROUNDS = int(os.getenv("IMPORT_BCRYPT_ROUNDS", "4"))
+import_pwd_context = build_pwd_context(bcrypt_rounds=IMPORT_BCRYPT_ROUNDS, argon2_time_cost=1)
+_import_hash_executor = ThreadPoolExecutor(max_workers=IMPORT_HASH_WORKERS,
+                                           thread_name_prefix="bcrypt-import")
 
-SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-here")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 24 * 60  # 24 hours
+# Short-lived access tokens carry the principal (see access_claims); clients
+# renew them with the refresh token at /auth/refresh
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+# Signing keys by key ID, for rotation without logging everyone out:
+#   JWT_KEYS="2025a:old-secret,2025b:new-secret"  JWT_ACTIVE_KID=2025b
+# New tokens are signed with the active key and carry its kid in the
+# header; tokens signed with any listed key stay valid until they expire.
+# JWT_SECRET is the key "default", also used for tokens without a kid.
+LEGACY_KID = "default"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+def _load_keys() -> dict:
+    keys = {}
+    for entry in os.getenv("JWT_KEYS", "").split(","):
+        kid, sep, secret = entry.strip().partition(":")
+        if sep and kid and secret:
+            keys[kid] = secret
+    if os.getenv("JWT_SECRET"):
+        keys.setdefault(LEGACY_KID, os.getenv("JWT_SECRET"))
+    if not keys:
+        print("⚠ JWT_SECRET/JWT_KEYS no configurado: se usa una clave aleatoria, "
+              "los tokens no sobreviven a un reinicio")
+        keys[LEGACY_KID] = secrets.token_urlsafe(32)
+    return keys
+
+
+SIGNING_KEYS = _load_keys()
+ACTIVE_KID = os.getenv("JWT_ACTIVE_KID") or next(reversed(SIGNING_KEYS))
+if ACTIVE_KID not in SIGNING_KEYS:
+    raise RuntimeError(f"JWT_ACTIVE_KID={ACTIVE_KID} no está en JWT_KEYS")
+SECRET_KEY = SIGNING_KEYS[ACTIVE_KID]
+_hmac_keys = {kid: secret.encode() for kid, secret in SIGNING_KEYS.items()}
+
+# Verified token -> payload, oldest first. Bounded; entries die with `exp`.
+_token_cache = OrderedDict()
+token_cache_stats = {"hits": 0, "misses": 0}
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -15,6 +113,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _verify_and_update(plain_password: str, hashed_password: str):
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except (ValueError, TypeError):
+        return False, None  # NULL or unrecognized stored hash
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(valid, new_hash) computed on the worker pool. new_hash is set when
+    the stored hash uses an outdated scheme or cost and should be saved."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, _verify_and_update, plain_password, hashed_password
+    )
+
+async def hash_password(password: str) -> str:
+    """get_password_hash on the worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+async def hash_passwords(passwords) -> list:
+    """Hash many passwords on the worker pool, in input order"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(_hash_executor, pwd_context.hash, p) for p in passwords
+    ))
+
+async def hash_import_passwords(passwords) -> list:
+    """Hash imported passwords at the import cost on the import pool, in
+    input order. They are upgraded to the full cost at the first login."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(_import_hash_executor, import_pwd_context.hash, p)
+        for p in passwords
+    ))
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -22,12 +155,76 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM, headers={"kid": ACTIVE_KID})
     return encoded_jwt
 
-def decode_token(token: str):
+def access_claims(principal: dict, session_id: str) -> dict:
+    """Claims of an access token: enough to authorize without a DB lookup"""
+    return {
+        "id": principal["id"],
+        "role": principal["role"],
+        "username": principal["username"],
+        "related_id": principal.get("related_id"),
+        "sid": session_id,
+    }
+
+def new_refresh_token():
+    """Opaque refresh token and the hash stored in refresh_tokens"""
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+def hash_refresh_token(token: str) -> str:
+    # High-entropy random token: a plain SHA-256 is enough (no bcrypt needed)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def verify_token(token: str):
+    """HS256 verification for our own tokens: HMAC of the signing input
+    with the key named by `kid`, then `exp`. Same result as python-jose's
+    jwt.decode for what we issue, without its generic JWS machinery."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+        header_b64, payload_b64, signature = token.split(".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+            return None
+        kid = header.get("kid", LEGACY_KID)
+        if not isinstance(kid, str) or kid not in _hmac_keys:
+            return None  # a crafted non-string kid must not reach the dict lookup
+        key = _hmac_keys[kid]
+        digest = hmac.new(key, f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+        expected = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+        if not hmac.compare_digest(expected, signature):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, AttributeError, binascii.Error):
+        return None  # orjson.JSONDecodeError and UnicodeError are ValueErrors
+    if not isinstance(payload, dict):
+        return None
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= time.time():
         return None
+    return payload
+
+def decode_token(token: str):
+    """Verified payload or None. Tokens already verified are served from a
+    bounded LRU until their `exp`; the returned dict must not be mutated."""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        if cached["exp"] > time.time():
+            _token_cache.move_to_end(token)
+            token_cache_stats["hits"] += 1
+            return cached
+        del _token_cache[token]
+    
+    token_cache_stats["misses"] += 1
+    payload = verify_token(token)
+    if payload is not None:
+        _token_cache[token] = payload
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
+def get_token_cache_stats() -> dict:
+    return {**token_cache_stats, "size": len(_token_cache), "max_size": TOKEN_CACHE_SIZE}
@@ -0,0 +1,127 @@
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+# Excel's hard limit, header row included
+XLSX_MAX_ROWS = 1_048_576
+
+_illegal_xml_re = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""
+
+_SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>"""
+
+_SHEET_END = "</sheetData></worksheet>"
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object: zipfile then streams entries
+    with data descriptors, and whatever it wrote can be drained as bytes"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    text = escape(_illegal_xml_re.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class StreamingXlsxWriter:
+    """Single-sheet XLSX produced incrementally.
+
+    Rows are written as inline strings or numbers straight into a deflated
+    zip entry; each call returns the compressed bytes produced so far, so
+    memory stays constant whatever the number of rows.
+
+        writer = StreamingXlsxWriter("Matrículas", columns)
+        yield writer.start()
+        for batch in batches:
+            yield writer.write_rows(batch)
+        yield writer.finish()
+    """
+
+    def __init__(self, sheet_name: str, columns):
+        self.sheet_name = sheet_name[:31]
+        self.columns = list(columns)
+        self.rows_written = 0
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+        self._sheet = None
+
+    def start(self) -> bytes:
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(self.sheet_name, {'"': "&quot;"})))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(_SHEET_START.encode())
+        self._write([self.columns])
+        return self._sink.drain()
+
+    def write_rows(self, rows) -> bytes:
+        self._write(rows)
+        return self._sink.drain()
+
+    def _write(self, rows):
+        parts = []
+        for row in rows:
+            if self.rows_written >= XLSX_MAX_ROWS:
+                break
+            parts.append("<row>" + "".join(_cell(v) for v in row) + "</row>")
+            self.rows_written += 1
+        if parts:
+            self._sheet.write("".join(parts).encode())
+
+    @property
+    def full(self) -> bool:
+        return self.rows_written >= XLSX_MAX_ROWS
+
+    def finish(self) -> bytes:
+        self._sheet.write(_SHEET_END.encode())
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()
@@ -12,6 +12,24 @@ export const useAuth = () => {
   return context;
 };
 
+// Renovar el access token (dura pocos minutos) un minuto antes de que expire
+const REFRESH_MARGIN_MS = 60 * 1000;
+// Las pestañas abiertas comparten los tokens de localStorage: la primera que
+// renueva guarda el par nuevo y las demás lo reutilizan en lugar de gastar
+// otra vez el refresh token (que es de un solo uso)
+const REFRESH_JITTER_MS = 10 * 1000;
+const REFRESH_RETRY_MS = 2 * 1000;
+const REFRESH_OFFLINE_RETRY_MS = 15 * 1000;
+
+const tokenExpiry = (token) => {
+  try {
+    const payload = JSON.parse(atob(token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')));
+    return payload.exp * 1000;
+  } catch (error) {
+    return 0;
+  }
+};
+
 export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -33,10 +51,71 @@ export const AuthProvider = ({ children }) => {
     setLoading(false);
   }, []);
 
+  useEffect(() => {
+    if (!user) return undefined;
+    let timer;
+
+    const scheduleRefresh = () => {
+      clearTimeout(timer);
+      // El jitter evita que todas las pestañas renueven en el mismo instante
+      const jitter = Math.random() * REFRESH_JITTER_MS;
+      const delay = tokenExpiry(localStorage.getItem('token')) - Date.now() - REFRESH_MARGIN_MS - jitter;
+      timer = setTimeout(refresh, Math.max(delay, 0));
+    };
+
+    const refresh = async () => {
+      // Otra pestaña ya renovó: basta con reprogramar
+      if (tokenExpiry(localStorage.getItem('token')) - Date.now() > REFRESH_MARGIN_MS) {
+        scheduleRefresh();
+        return;
+      }
+      const refreshToken = localStorage.getItem('refresh_token');
+      if (!refreshToken) {
+        clearSession();
+        return;
+      }
+      try {
+        const data = await authAPI.refresh(refreshToken);
+        localStorage.setItem('token', data.token);
+        localStorage.setItem('refresh_token', data.refresh_token);
+        scheduleRefresh();
+      } catch (error) {
+        // Sin conexión (fetch lanza TypeError): reintentar sin tocar la sesión
+        if (error instanceof TypeError) {
+          timer = setTimeout(refresh, REFRESH_OFFLINE_RETRY_MS);
+          return;
+        }
+        // Si otra pestaña ganó la carrera, su par nuevo aparece en localStorage
+        await new Promise((resolve) => setTimeout(resolve, REFRESH_RETRY_MS));
+        if (localStorage.getItem('refresh_token') !== refreshToken) {
+          scheduleRefresh();
+          return;
+        }
+        console.error('Error renovando la sesión:', error);
+        // Sin /auth/logout: revocaría la sesión que comparten las otras pestañas
+        clearSession();
+      }
+    };
+
+    // Tokens renovados o sesión cerrada en otra pestaña
+    const onStorage = (event) => {
+      if (event.key === 'token' && event.newValue) scheduleRefresh();
+      if (event.key === 'user' && !event.newValue) clearSession();
+    };
+
+    scheduleRefresh();
+    window.addEventListener('storage', onStorage);
+    return () => {
+      clearTimeout(timer);
+      window.removeEventListener('storage', onStorage);
+    };
+  }, [user]);
+
   const login = async (dni, password) => {
     try {
       const data = await authAPI.login(dni, password);
       localStorage.setItem('token', data.token);
+      localStorage.setItem('refresh_token', data.refresh_token);
       localStorage.setItem('user', JSON.stringify(data.user));
       setUser(data.user);
       return data;
@@ -45,13 +124,23 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
+  // Solo local: borra los tokens de esta pestaña (y, vía localStorage, de las demás)
+  const clearSession = () => {
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('token');
     localStorage.removeItem('user');
     setUser(null);
     window.location.href = '/login';
   };
 
+  const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      authAPI.logout(refreshToken).catch(() => {});
+    }
+    clearSession();
+  };
+
   const isAuthenticated = () => {
     return !!user && !!localStorage.getItem('token');
   };
@@ -46,6 +46,14 @@ export const authAPI = {
     method: 'POST',
     body: JSON.stringify(data),
   }),
+  refresh: (refreshToken) => request('/auth/refresh', {
+    method: 'POST',
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  }),
+  logout: (refreshToken) => request('/auth/logout', {
+    method: 'POST',
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  }),
 };
 
 // API de estudiantes